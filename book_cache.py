@@ -0,0 +1,442 @@
+"""
+Columnar in-memory copy of one book's transactions
+
+A BookCache keeps a book's transactions as parallel arrays (amount,
+timestamp, category, payment mode and description index), newest first, so
+filtering, totals and grouping run over contiguous integer buffers instead
+of going back to SQLite. Descriptions are interned into a pool shared by
+every row with the same text.
+
+NumPy is used for vectorised masks when it is installed; otherwise the same
+operations run as plain Python loops over the arrays, which is no faster
+than the indexed SQL, so screens only open a cache when VECTORISED is true.
+The matches of the last filter are kept until the cache changes, so paging
+through one filter selects once. DatabaseManager opens, patches and evicts
+caches; see DatabaseManager.open_book_cache.
+"""
+
+import sys
+import threading
+from array import array
+from datetime import timedelta
+
+from database import (
+    FilteredTransactions,
+    TransactionRow,
+    ascii_lower,
+    from_paise,
+    from_timestamp,
+    to_paise,
+    to_timestamp,
+)
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional; the app does not ship it on Android
+    numpy = None
+
+# Whether filtering runs vectorised; without NumPy SQL is as fast
+VECTORISED = numpy is not None
+
+# Rows added at once beyond which the arrays are re-sorted wholesale rather
+# than each row being inserted in place
+RESORT_THRESHOLD = 64
+
+
+class BookCache:
+    """Parallel arrays holding one book's transactions, newest first"""
+
+    def __init__(self, book_id, rows, categories, payment_modes):
+        """rows are (id, signed paise, timestamp, category id, payment mode
+        id, description) tuples in newest-first order; categories and
+        payment_modes map option ids to names"""
+        self.book_id = book_id
+        self._lock = threading.RLock()
+        self.reset(rows, categories, payment_modes)
+
+    def reset(self, rows, categories, payment_modes):
+        """Replace the whole contents, taking the constructor's arguments"""
+        with self._lock:
+            self._fill(rows, categories, payment_modes)
+
+    def _fill(self, rows, categories, payment_modes):
+        self.categories = dict(categories)
+        self.payment_modes = dict(payment_modes)
+        self.ids = array("q")
+        self.amounts = array("q")  # Signed paise
+        self.timestamps = array("q")
+        self.category_ids = array("i")
+        self.payment_mode_ids = array("i")
+        self.description_ids = array("i")
+        self.descriptions = []  # Interned pool indexed by description_ids
+        self._description_index = {}
+        self._matches = None
+        for row in rows:
+            self._append(row)
+
+    def _columns(self):
+        return (
+            self.ids,
+            self.amounts,
+            self.timestamps,
+            self.category_ids,
+            self.payment_mode_ids,
+            self.description_ids,
+        )
+
+    def _intern(self, description):
+        """Index of description in the pool, adding it if new"""
+        index = self._description_index.get(description)
+        if index is None:
+            index = len(self.descriptions)
+            self.descriptions.append(description)
+            self._description_index[description] = index
+        return index
+
+    def _append(self, row):
+        trans_id, paise, timestamp, category_id, payment_mode_id, description = row
+        self.ids.append(trans_id)
+        self.amounts.append(paise)
+        self.timestamps.append(timestamp)
+        self.category_ids.append(category_id)
+        self.payment_mode_ids.append(payment_mode_id)
+        self.description_ids.append(self._intern(description))
+
+    def _position(self, timestamp, trans_id):
+        """Index at which a row keeps the newest-first (timestamp, id) order"""
+        low, high = 0, len(self.ids)
+        while low < high:
+            middle = (low + high) // 2
+            if (self.timestamps[middle], self.ids[middle]) > (timestamp, trans_id):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, trans_id):
+        with self._lock:
+            return trans_id in self.ids
+
+    # Patching, called by DatabaseManager after a write commits
+
+    def insert_rows(self, rows):
+        """Add rows (same shape as the constructor's), keeping the order"""
+        with self._lock:
+            self._matches = None
+            if len(rows) > RESORT_THRESHOLD:
+                for row in rows:
+                    self._append(row)
+                self._resort()
+                return
+            for row in rows:
+                trans_id, paise, timestamp, category_id, payment_mode_id, text = row
+                position = self._position(timestamp, trans_id)
+                values = (
+                    trans_id,
+                    paise,
+                    timestamp,
+                    category_id,
+                    payment_mode_id,
+                    self._intern(text),
+                )
+                for column, value in zip(self._columns(), values):
+                    column.insert(position, value)
+
+    def _resort(self):
+        """Restore newest-first order after rows were appended out of order"""
+        order = sorted(
+            range(len(self.ids)),
+            key=lambda index: (self.timestamps[index], self.ids[index]),
+            reverse=True,
+        )
+        for column in self._columns():
+            column[:] = array(column.typecode, (column[index] for index in order))
+
+    def remove_ids(self, ids):
+        """Drop the rows with the given ids; ids not in the cache are ignored"""
+        with self._lock:
+            self._matches = None
+            for trans_id in ids:
+                try:
+                    position = self.ids.index(trans_id)
+                except ValueError:
+                    continue
+                for column in self._columns():
+                    del column[position]
+
+    def set_option_names(self, categories, payment_modes):
+        """Replace the option id to name maps after options change"""
+        with self._lock:
+            self._matches = None
+            self.categories = dict(categories)
+            self.payment_modes = dict(payment_modes)
+
+    # Queries
+
+    def query(
+        self,
+        date_from=None,
+        date_to=None,
+        payment_modes=None,
+        types=None,
+        amount_min=None,
+        amount_max=None,
+        text=None,
+        limit=None,
+        after=None,
+    ):
+        """Filter the book in memory, mirroring get_transactions_filtered
+
+        Takes the same criteria and keyset cursor and returns the same
+        FilteredTransactions, with the count and totals over every match.
+        """
+        with self._lock:
+            positions, (total_in, total_out) = self._match(
+                date_from,
+                date_to,
+                payment_modes,
+                types,
+                amount_min,
+                amount_max,
+                text,
+            )
+            count = len(positions)
+
+            if after is not None:
+                # Matches are newest first, so the page starts at the first
+                # match past the cursor
+                start = self._first_after(positions, after)
+                positions = positions[start:]
+            page = positions if limit is None else positions[: limit + 1]
+            rows = [self._row(position) for position in page]
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (to_timestamp(rows[-1].transaction_date), rows[-1].id)
+        return FilteredTransactions(
+            rows, next_cursor, count, from_paise(total_in), from_paise(total_out)
+        )
+
+    def group_totals(self, by="category", **filters):
+        """Cash in and out per category or payment mode over the matches
+
+        Returns {name: (total_in, total_out)} as Decimals.
+        """
+        if by == "category":
+            column, names = self.category_ids, self.categories
+        elif by == "payment_mode":
+            column, names = self.payment_mode_ids, self.payment_modes
+        else:
+            raise ValueError(f"Unknown grouping: {by}")
+
+        with self._lock:
+            positions, _ = self._match(**filters)
+            sums = {}
+            if numpy is not None:
+                keys = numpy.frombuffer(column, dtype=numpy.int32)[positions]
+                amounts = numpy.frombuffer(self.amounts, dtype=numpy.int64)[positions]
+                for key in numpy.unique(keys):
+                    group = amounts[keys == key]
+                    sums[int(key)] = (
+                        int(group[group > 0].sum()),
+                        int(-group[group < 0].sum()),
+                    )
+            else:
+                for position in positions:
+                    key = column[position]
+                    paise = self.amounts[position]
+                    cash_in, cash_out = sums.get(key, (0, 0))
+                    if paise > 0:
+                        cash_in += paise
+                    else:
+                        cash_out -= paise
+                    sums[key] = (cash_in, cash_out)
+            return {
+                names.get(key, str(key)): (from_paise(cash_in), from_paise(cash_out))
+                for key, (cash_in, cash_out) in sums.items()
+            }
+
+    def memory_usage(self):
+        """Approximate bytes held by the cache, split by part"""
+        with self._lock:
+            columns = sum(
+                column.buffer_info()[1] * column.itemsize for column in self._columns()
+            )
+            descriptions = sys.getsizeof(self.descriptions) + sum(
+                sys.getsizeof(text) for text in self.descriptions
+            )
+            index = sys.getsizeof(self._description_index)
+        return {
+            "rows": len(self.ids),
+            "columns": columns,
+            "descriptions": descriptions + index,
+            "total": columns + descriptions + index,
+        }
+
+    # Internals; all run with the lock held
+
+    def _match(
+        self,
+        date_from=None,
+        date_to=None,
+        payment_modes=None,
+        types=None,
+        amount_min=None,
+        amount_max=None,
+        text=None,
+    ):
+        """Matching positions and their (in, out) paise totals
+
+        The result for the last criteria is reused until the cache changes,
+        so later pages of the same filter only slice it.
+        """
+        key = (
+            date_from,
+            date_to,
+            tuple(payment_modes or ()),
+            tuple(types or ()),
+            amount_min,
+            amount_max,
+            text,
+        )
+        if self._matches is None or self._matches[0] != key:
+            positions = self._select(*key)
+            self._matches = (key, positions, self._totals(positions))
+        return self._matches[1:]
+
+    def _select(
+        self,
+        date_from=None,
+        date_to=None,
+        payment_modes=None,
+        types=None,
+        amount_min=None,
+        amount_max=None,
+        text=None,
+    ):
+        """Positions of the rows matching every given criterion, in order"""
+        low_ts = to_timestamp(date_from) if date_from is not None else None
+        high_ts = (
+            to_timestamp(date_to + timedelta(days=1)) if date_to is not None else None
+        )
+        low_paise = to_paise(amount_min) if amount_min is not None else None
+        high_paise = to_paise(amount_max) if amount_max is not None else None
+        category_set = (
+            {key for key, name in self.categories.items() if name in types}
+            if types
+            else None
+        )
+        mode_set = (
+            {key for key, name in self.payment_modes.items() if name in payment_modes}
+            if payment_modes
+            else None
+        )
+        # Match the pool once; rows then only compare pool indexes
+        text_set = None
+        if text:
+            # Folds A-Z only, as LIKE does, so both paths match the same rows
+            needle = ascii_lower(text)
+            text_set = {
+                index
+                for index, description in enumerate(self.descriptions)
+                if needle in ascii_lower(description)
+            }
+
+        if numpy is not None:
+            return self._select_numpy(
+                low_ts, high_ts, low_paise, high_paise, category_set, mode_set, text_set
+            )
+
+        positions = []
+        for position, (timestamp, paise, category, mode, description) in enumerate(
+            zip(
+                self.timestamps,
+                self.amounts,
+                self.category_ids,
+                self.payment_mode_ids,
+                self.description_ids,
+            )
+        ):
+            if low_ts is not None and timestamp < low_ts:
+                continue
+            if high_ts is not None and timestamp >= high_ts:
+                continue
+            if low_paise is not None and abs(paise) < low_paise:
+                continue
+            if high_paise is not None and abs(paise) > high_paise:
+                continue
+            if category_set is not None and category not in category_set:
+                continue
+            if mode_set is not None and mode not in mode_set:
+                continue
+            if text_set is not None and description not in text_set:
+                continue
+            positions.append(position)
+        return positions
+
+    def _select_numpy(
+        self, low_ts, high_ts, low_paise, high_paise, category_set, mode_set, text_set
+    ):
+        """Vectorised _select over zero-copy views of the arrays"""
+        timestamps = numpy.frombuffer(self.timestamps, dtype=numpy.int64)
+        mask = numpy.ones(len(timestamps), dtype=bool)
+        if low_ts is not None:
+            mask &= timestamps >= low_ts
+        if high_ts is not None:
+            mask &= timestamps < high_ts
+        if low_paise is not None or high_paise is not None:
+            sizes = numpy.abs(numpy.frombuffer(self.amounts, dtype=numpy.int64))
+            if low_paise is not None:
+                mask &= sizes >= low_paise
+            if high_paise is not None:
+                mask &= sizes <= high_paise
+        for column, accepted in (
+            (self.category_ids, category_set),
+            (self.payment_mode_ids, mode_set),
+            (self.description_ids, text_set),
+        ):
+            if accepted is not None:
+                values = numpy.frombuffer(column, dtype=numpy.int32)
+                mask &= numpy.isin(values, list(accepted))
+        return numpy.flatnonzero(mask).tolist()
+
+    def _totals(self, positions):
+        """Cash in and out paise over positions"""
+        total_in = total_out = 0
+        if numpy is not None:
+            amounts = numpy.frombuffer(self.amounts, dtype=numpy.int64)[positions]
+            return int(amounts[amounts > 0].sum()), int(-amounts[amounts < 0].sum())
+        for position in positions:
+            paise = self.amounts[position]
+            if paise > 0:
+                total_in += paise
+            else:
+                total_out -= paise
+        return total_in, total_out
+
+    def _first_after(self, positions, after):
+        """Index in positions of the first row older than the (ts, id) cursor"""
+        low, high = 0, len(positions)
+        while low < high:
+            middle = (low + high) // 2
+            position = positions[middle]
+            if (self.timestamps[position], self.ids[position]) >= tuple(after):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _row(self, position):
+        """Build the API row for one position"""
+        return TransactionRow(
+            self.ids[position],
+            from_paise(self.amounts[position]),
+            self.descriptions[self.description_ids[position]],
+            self.categories.get(self.category_ids[position]),
+            self.payment_modes.get(self.payment_mode_ids[position]),
+            from_timestamp(self.timestamps[position]).isoformat(),
+        )
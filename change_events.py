@@ -0,0 +1,123 @@
+"""
+Change notifications for Cashlytics
+
+DatabaseManager describes every committed write as ChangeEvents and hands
+them to its listeners. A ChangeBus collects those events from whichever
+thread committed, merges everything that arrived during one frame and
+passes the result to the screens on the UI thread, so a bulk import or a
+burst of edits costs each screen one update instead of thousands.
+"""
+
+import threading
+from collections import namedtuple
+
+from ui_thread import next_frame
+
+# Event kinds
+TRANSACTIONS_ADDED = "transactions_added"
+TRANSACTIONS_UPDATED = "transactions_updated"
+TRANSACTIONS_DELETED = "transactions_deleted"
+BOOK_CREATED = "book_created"
+BOOK_DELETED = "book_deleted"
+OPTIONS_CHANGED = "options_changed"
+
+TRANSACTION_EVENTS = (TRANSACTIONS_ADDED, TRANSACTIONS_UPDATED, TRANSACTIONS_DELETED)
+
+# One committed change: its kind, the book it touched (None for dropdown
+# options) and the transaction ids involved as a tuple (empty for books
+# and options). setting_type is set for OPTIONS_CHANGED only.
+ChangeEvent = namedtuple(
+    "ChangeEvent", ["kind", "book_id", "ids", "setting_type"], defaults=((), None)
+)
+
+
+def coalesce(events):
+    """Merge a run of events into at most one event per kind and book
+
+    Ids keep their first-seen order. A transaction added and then deleted
+    within the run disappears entirely, one added and then updated is
+    reported as added, and one updated and then deleted only as deleted.
+    Deleting a book drops every other event for it.
+    """
+    merged = {}  # (kind, book_id, setting_type) -> ordered ids
+    deleted_books = {event.book_id for event in events if event.kind == BOOK_DELETED}
+
+    for event in events:
+        if event.book_id in deleted_books and event.kind != BOOK_DELETED:
+            continue
+        ids = merged.setdefault((event.kind, event.book_id, event.setting_type), {})
+        ids.update(dict.fromkeys(event.ids))
+
+    for (kind, book_id, _), ids in merged.items():
+        if kind != TRANSACTIONS_DELETED:
+            continue
+        added = merged.get((TRANSACTIONS_ADDED, book_id, None), {})
+        updated = merged.get((TRANSACTIONS_UPDATED, book_id, None), {})
+        for trans_id in list(ids):
+            updated.pop(trans_id, None)
+            if trans_id in added:
+                del added[trans_id]
+                del ids[trans_id]
+    for (kind, book_id, _), ids in merged.items():
+        if kind == TRANSACTIONS_UPDATED:
+            added = merged.get((TRANSACTIONS_ADDED, book_id, None), {})
+            for trans_id in [trans_id for trans_id in ids if trans_id in added]:
+                del ids[trans_id]
+
+    return [
+        ChangeEvent(kind, book_id, tuple(ids), setting_type)
+        for (kind, book_id, setting_type), ids in merged.items()
+        if ids or kind not in TRANSACTION_EVENTS
+    ]
+
+
+class ChangeBus:
+    """Delivers a DatabaseManager's change events to UI subscribers
+
+    Subscribers are called on the UI thread with the list of coalesced
+    events gathered since the previous frame.
+    """
+
+    def __init__(self, db_manager, dispatch=None):
+        self.db_manager = db_manager
+        # Schedules the flush for the next frame; tests pass a direct call
+        self._dispatch = dispatch or next_frame
+        self._subscribers = []
+        self._pending = []
+        self._scheduled = False
+        self._lock = threading.Lock()
+        db_manager.add_change_listener(self.publish)
+
+    def subscribe(self, callback):
+        """Call callback(events) after every frame with changes"""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Stop calling callback"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, events):
+        """Queue events for the next frame; safe to call from any thread"""
+        with self._lock:
+            self._pending.extend(events)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._dispatch(self.flush)
+
+    def flush(self):
+        """Deliver the queued events, merged, to every subscriber"""
+        with self._lock:
+            events, self._pending = self._pending, []
+            self._scheduled = False
+        events = coalesce(events)
+        if not events:
+            return
+        for callback in list(self._subscribers):
+            callback(events)
+
+    def close(self):
+        """Stop listening to the database"""
+        self.db_manager.remove_change_listener(self.publish)
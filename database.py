@@ -1,232 +1,1227 @@
 import sqlite3
 import json
-from datetime import datetime
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import wraps
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from time import sleep
+from urllib.request import pathname2url
+
+from change_events import (
+    BOOK_CREATED,
+    BOOK_DELETED,
+    OPTIONS_CHANGED,
+    TRANSACTIONS_ADDED,
+    TRANSACTIONS_DELETED,
+    TRANSACTIONS_UPDATED,
+    ChangeEvent,
+)
+from migrations import MIGRATIONS, ROLLUP_REBUILD, SCHEMA_VERSION
+
+
+# Tuning applied once to the long-lived connection
+CONNECTION_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -8000),  # negative = size in KiB, i.e. ~8 MB page cache
+    ("mmap_size", 64 * 1024 * 1024),
+    ("busy_timeout", 5000),
+    ("foreign_keys", "ON"),
+    ("temp_store", "MEMORY"),
+)
+
+# Columns of a transaction row as returned by the API; amounts are stored
+# as unsigned paise plus a direction and come back as signed paise
+TRANSACTION_COLUMNS = (
+    "t.id, t.direction * t.amount_paise, t.description, c.name, pm.name, "
+    "t.transaction_ts"
+)
+
+# FROM clause resolving a transaction's category and payment mode names
+TRANSACTION_SOURCE = (
+    "transactions t "
+    "JOIN categories c ON c.id = t.category_id "
+    "JOIN payment_modes pm ON pm.id = t.payment_mode_id"
+)
+
+# Tuning for the read-only connections behind DatabaseManager.snapshot()
+SNAPSHOT_PRAGMAS = (
+    ("query_only", "ON"),
+    ("cache_size", -4000),
+    ("mmap_size", 64 * 1024 * 1024),
+    ("busy_timeout", 5000),
+    ("temp_store", "MEMORY"),
+)
+
+# Transactions removed per write transaction when deleting a whole book
+DELETE_CHUNK_SIZE = 500
+
+# Option table and transaction column behind each dropdown's setting_type
+OPTION_TABLES = {
+    "transaction_type": ("categories", "category_id"),
+    "payment_mode": ("payment_modes", "payment_mode_id"),
+}
+
+# Read results kept by the LRU result cache, see cached_result()
+RESULT_CACHE_SIZE = 128
+
+# Timestamps count seconds from this instant on the local wall clock
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_paise(amount):
+    """Convert a rupee amount (int, float, str or Decimal) to exact integer paise"""
+    # str() gives the shortest repr of a float, so 0.1 becomes exactly 10 paise
+    rupees = Decimal(str(amount))
+    return int((rupees * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_paise(paise):
+    """Convert integer paise to an exact Decimal rupee amount"""
+    return Decimal(paise).scaleb(-2)
+
+
+def to_timestamp(value):
+    """Convert a datetime, date or ISO string to an integer wall-clock timestamp
+
+    Values with a UTC offset become the device's local wall-clock time they
+    denote, and fractions of a second are dropped. migrate_5 converts legacy
+    dates with this same function.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            # Store aware values as the local wall-clock time they denote
+            value = value.astimezone().replace(tzinfo=None)
+    elif isinstance(value, date):
+        value = datetime.combine(value, time())
+    return (value - EPOCH) // timedelta(seconds=1)
+
+
+def _day_bound(value):
+    """Day number of a date, as daily_totals.day stores it"""
+    return to_timestamp(value) // 86400
+
+
+def _month_bound(value):
+    """yyyymm of a date, as monthly_category_totals.month stores it"""
+    return value.year * 100 + value.month
+
+
+def _day_date(day):
+    """Date of a daily_totals day number"""
+    return EPOCH.date() + timedelta(days=day)
+
+
+def _month_date(month):
+    """First day of a yyyymm month"""
+    return date(month // 100, month % 100, 1)
+
+
+def _year_date(year):
+    """First day of a year"""
+    return date(year, 1, 1)
+
+
+# Rollup period value (day number, yyyymm or year) to its first day
+_PERIOD_DATES = {"day": _day_date, "month": _month_date, "year": _year_date}
+
+
+def from_timestamp(timestamp):
+    """Convert an integer wall-clock timestamp back to a naive datetime"""
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+def _option_table(setting_type):
+    """Get the table holding a dropdown's options and the column referencing it"""
+    try:
+        return OPTION_TABLES[setting_type]
+    except KeyError:
+        raise ValueError(f"Unknown setting type: {setting_type}") from None
+
+
+def _split_amount(amount, is_cash_in):
+    """Get the (amount_paise, direction) pair stored for a signed entry"""
+    # Make amount negative for cash out
+    signed_paise = to_paise(amount) if is_cash_in else -to_paise(amount)
+    return abs(signed_paise), (1 if signed_paise >= 0 else -1)
+
+
+# A transaction as returned by the API. A plain tuple underneath, so rows
+# cost no more memory than before and still unpack positionally.
+TransactionRow = namedtuple(
+    "TransactionRow",
+    [
+        "id",
+        "amount",
+        "description",
+        "transaction_type",
+        "payment_mode",
+        "transaction_date",
+    ],
+)
+
+
+def _transaction_row(row):
+    """Turn a TRANSACTION_COLUMNS row into a TransactionRow
+
+    The amount becomes a signed Decimal and the timestamp an ISO string.
+    """
+    trans_id, paise, description, trans_type, payment_mode, timestamp = row
+    return TransactionRow(
+        trans_id,
+        from_paise(paise),
+        description,
+        trans_type,
+        payment_mode,
+        from_timestamp(timestamp).isoformat(),
+    )
+
+
+def _filter_conditions(
+    book_id,
+    date_from=None,
+    date_to=None,
+    payment_modes=None,
+    types=None,
+    amount_min=None,
+    amount_max=None,
+    text=None,
+):
+    """Build the WHERE conditions and parameters for the transaction filters
+
+    The conditions refer to the aliases of TRANSACTION_SOURCE.
+    """
+    conditions = ["t.book_id = ?"]
+    params = [book_id]
+
+    # Date bounds are ranges on the (book_id, transaction_ts) index
+    if date_from is not None:
+        conditions.append("t.transaction_ts >= ?")
+        params.append(to_timestamp(date_from))
+    if date_to is not None:
+        conditions.append("t.transaction_ts < ?")
+        params.append(to_timestamp(date_to + timedelta(days=1)))
+    if payment_modes:
+        conditions.append(f"pm.name IN ({', '.join('?' * len(payment_modes))})")
+        params.extend(payment_modes)
+    if types:
+        conditions.append(f"c.name IN ({', '.join('?' * len(types))})")
+        params.extend(types)
+    if amount_min is not None:
+        conditions.append("t.amount_paise >= ?")
+        params.append(to_paise(amount_min))
+    if amount_max is not None:
+        conditions.append("t.amount_paise <= ?")
+        params.append(to_paise(amount_max))
+    if text:
+        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conditions.append("t.description LIKE ? ESCAPE '\\'")
+        params.append(f"%{escaped}%")
+
+    return conditions, params
+
+
+# One row per book card, read from the trigger-maintained book_summary table
+BookSummary = namedtuple(
+    "BookSummary",
+    [
+        "id",
+        "name",
+        "created_date",
+        "balance",
+        "total_in",
+        "total_out",
+        "transaction_count",
+        "last_activity",
+    ],
+)
+
+# One page of filtered transactions plus totals over every match
+FilteredTransactions = namedtuple(
+    "FilteredTransactions",
+    ["rows", "next_cursor", "count", "total_in", "total_out"],
+)
+
+# One row of get_period_summary: the first day of the period, the category
+# name when grouping by category (else None) and the period's totals
+PeriodTotal = namedtuple(
+    "PeriodTotal",
+    ["period", "category", "total_in", "total_out", "transaction_count"],
+)
+
+
+# A full-text search hit; the transaction fields followed by its book
+SearchResult = namedtuple(
+    "SearchResult",
+    [
+        "id",
+        "amount",
+        "description",
+        "transaction_type",
+        "payment_mode",
+        "transaction_date",
+        "book_id",
+        "book_name",
+    ],
+)
+
+
+# A-Z to a-z; the only case folding done by LIKE and the NOCASE collation
+_ASCII_LOWER = {code: code + 32 for code in range(ord("A"), ord("Z") + 1)}
+
+
+def ascii_lower(text):
+    """text with ASCII letters lowercased and everything else left alone"""
+    return text.translate(_ASCII_LOWER)
+
+
+def name_prefix_bounds(prefix):
+    """Range [low, high) of names starting with prefix, for a NOCASE index
+
+    A range on the indexed column is used where LIKE 'prefix%' would scan.
+    The bounds are worked out on the prefix as NOCASE sees it, with A-Z
+    folded to a-z, and high never ends in an upper-case letter, which
+    NOCASE would read as its lower-case twin. high is None when the prefix
+    cannot be bounded above.
+    """
+    folded = ascii_lower(prefix)
+    last = ord(folded[-1])
+    if last >= 0x10FFFF:
+        return folded, None
+    successor = chr(last + 1)
+    if "A" <= successor <= "Z":
+        successor = "["  # Next after "@" once A-Z are folded away
+    return folded, folded[:-1] + successor
+
+
+def fts_prefix_query(text):
+    """Turn typed text into an FTS5 query matching every word as a prefix
+
+    Words are quoted so characters with a meaning in FTS5 syntax (quotes,
+    operators, column filters) are searched for literally. Returns None when
+    the text has no searchable words.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _cache_key(value):
+    """Hashable form of a call argument, with lists and sets as tuples"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_cache_key(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_cache_key(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _cache_key(item)) for key, item in value.items()))
+    return value
+
+
+def _copy_result(result):
+    """Copy of a cached result with every list in it copied
+
+    Lists at the top or directly inside a tuple (a page's rows, a
+    FilteredTransactions' rows) are copied; the rows themselves are tuples
+    and safe to share.
+    """
+    if isinstance(result, list):
+        return list(result)
+    if isinstance(result, tuple) and any(isinstance(item, list) for item in result):
+        items = [list(item) if isinstance(item, list) else item for item in result]
+        return result._make(items) if hasattr(result, "_make") else tuple(items)
+    return result
+
+
+def cached_result(method):
+    """Serve repeated calls of a read method from the result cache
+
+    Results are keyed by method name and arguments and dropped whenever the
+    database changes, see DatabaseManager._check_result_cache(). Lists,
+    including those inside returned tuples, are copied on the way out so
+    callers cannot alter the cached value.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            if self._depth:
+                # Reads inside a write transaction may see uncommitted rows
+                return method(self, *args, **kwargs)
+            try:
+                key = (method.__name__, _cache_key(args), _cache_key(kwargs))
+                hash(key)
+            except TypeError:
+                return method(self, *args, **kwargs)
+
+            self._check_result_cache()
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.cache_hits += 1
+                result = self._results[key]
+            else:
+                self.cache_misses += 1
+                result = method(self, *args, **kwargs)
+                self._results[key] = result
+                if len(self._results) > RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+        return _copy_result(result)
+
+    return wrapper
 
 
 class DatabaseManager:
     def __init__(self, db_name="transaction_tracker.db"):
         self.db_name = db_name
+        self._conn = None
+        self._lock = threading.RLock()
+        self._depth = 0  # Nesting level of _transaction() blocks
+        self._book_caches = {}  # book_id -> BookCache, see open_book_cache()
+        self._cache_patches = []  # Cache updates waiting for the commit
+        self._change_listeners = []  # See add_change_listener()
+        self._pending_events = []  # ChangeEvents waiting for the commit
+        # LRU result cache of the read methods marked @cached_result
+        self._results = OrderedDict()
+        self._write_generation = 0  # Bumped by every commit on this connection
+        self._cached_generation = 0
+        self._data_version = None  # Changes when another connection commits
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._deletes_stopped = threading.Event()  # See stop_deletes()
         self.init_database()
 
-    def init_database(self):
-        """Initialize the database with required tables"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+    def __enter__(self):
+        return self
 
-        # Create books table
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS books (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                created_date TEXT NOT NULL
-            )
-        """
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def conn(self):
+        """Shared connection, opened and tuned on first use"""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    self._conn = self._connect()
+        return self._conn
+
+    def _connect(self):
+        """Open the connection and apply the pragmas once"""
+        # Transactions are managed explicitly through _transaction()
+        conn = sqlite3.connect(
+            self.db_name, check_same_thread=False, isolation_level=None
         )
+        for pragma, value in CONNECTION_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
 
-        # Create transactions table
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                book_id INTEGER NOT NULL,
-                amount REAL NOT NULL,
-                description TEXT NOT NULL,
-                transaction_type TEXT NOT NULL,
-                payment_mode TEXT NOT NULL,
-                transaction_date TEXT NOT NULL,
-                FOREIGN KEY (book_id) REFERENCES books (id)
-            )
+    def close(self):
+        """Close the shared connection"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.execute("PRAGMA optimize")
+                finally:
+                    self._conn.close()
+                    self._conn = None
+                    self._results.clear()
+                    self._data_version = None
+
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements as one write transaction
+
+        Nested blocks become savepoints of the outermost transaction, so a
+        failing inner block is undone on its own and only the outermost
+        block commits.
         """
-        )
+        with self._lock:
+            conn = self.conn
+            if self._depth == 0:
+                begin, commit, rollback = "BEGIN IMMEDIATE", "COMMIT", ("ROLLBACK",)
+            else:
+                savepoint = f"sp_{self._depth}"
+                begin = f"SAVEPOINT {savepoint}"
+                commit = f"RELEASE {savepoint}"
+                rollback = (f"ROLLBACK TO {savepoint}", f"RELEASE {savepoint}")
+            marks = len(self._cache_patches), len(self._pending_events)
+            conn.execute(begin)
+            self._depth += 1
+            try:
+                yield conn.cursor()
+            except BaseException:
+                self._depth -= 1
+                for statement in rollback:
+                    conn.execute(statement)
+                del self._cache_patches[marks[0] :]
+                del self._pending_events[marks[1] :]
+                raise
+            self._depth -= 1
+            conn.execute(commit)
+            if self._depth == 0:
+                self._write_generation += 1
+                if self._cache_patches:
+                    self._apply_cache_patches()
+                if self._pending_events:
+                    events, self._pending_events = self._pending_events, []
+                    for listener in list(self._change_listeners):
+                        listener(events)
 
-        # Create settings table for dropdown options
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS settings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                setting_type TEXT NOT NULL,
-                value TEXT NOT NULL
+    def _check_result_cache(self):
+        """Drop every cached result if the database changed since it was read
+
+        Commits on this connection bump the write generation; commits by
+        any other connection, including other processes, change PRAGMA
+        data_version. Called with the lock held.
+        """
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if (
+            data_version != self._data_version
+            or self._write_generation != self._cached_generation
+        ):
+            self._results.clear()
+            self._data_version = data_version
+            self._cached_generation = self._write_generation
+
+    def add_change_listener(self, callback):
+        """Call callback(events) with the ChangeEvents of every commit
+
+        The callback runs on the committing thread with the lock held, so
+        it should only hand the events on, as ChangeBus does.
+        """
+        with self._lock:
+            self._change_listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        """Stop calling a callback added with add_change_listener()"""
+        with self._lock:
+            if callback in self._change_listeners:
+                self._change_listeners.remove(callback)
+
+    def _emit(self, kind, book_id=None, ids=(), setting_type=None):
+        """Record a change to announce once the transaction commits"""
+        if self._change_listeners:
+            self._pending_events.append(
+                ChangeEvent(kind, book_id, tuple(ids), setting_type)
             )
+
+    def _emit_by_book(self, kind, rows):
+        """Emit one event per book for (book_id, transaction id) rows"""
+        by_book = {}
+        for book_id, trans_id in rows:
+            by_book.setdefault(book_id, []).append(trans_id)
+        for book_id, ids in by_book.items():
+            self._emit(kind, book_id, ids)
+
+    def result_cache_stats(self):
+        """Hit and miss counts and current size of the result cache"""
+        with self._lock:
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "size": len(self._results),
+            }
+
+    @contextmanager
+    def snapshot(self):
+        """Read-only view of the database as committed when the block starts
+
+        ``with db.snapshot() as ro:`` opens a separate read-only connection
+        and holds one WAL read transaction on it, so every read method
+        called on ro sees the same state however long the block runs.
+        Writes committed meanwhile neither wait for it nor show up in it,
+        and it never takes this manager's lock. Needs a database file.
         """
-        )
+        if self.db_name == ":memory:" or self.db_name.startswith("file:"):
+            raise ValueError("Snapshots need a database file path")
+        snapshot = DatabaseSnapshot(self.db_name)
+        try:
+            yield snapshot
+        finally:
+            snapshot.close()
 
-        # Insert default dropdown options only if settings table is empty
-        cursor.execute("SELECT COUNT(*) FROM settings")
-        settings_count = cursor.fetchone()[0]
-
-        if settings_count == 0:
-            # Only add defaults if no settings exist
-            default_types = [
-                "Food",
-                "Transport",
-                "Shopping",
-                "Bills",
-                "Entertainment",
-                "Other",
-            ]
-            default_payment_modes = [
-                "Cash",
-                "Credit Card",
-                "Debit Card",
-                "UPI",
-                "Net Banking",
-                "Cheque",
-            ]
+    @contextmanager
+    def batch(self):
+        """Group several writes into one atomic commit
 
-            for type_val in default_types:
+        Every add, update, delete or option change made inside
+        ``with db.batch():`` is committed together when the block ends, or
+        rolled back together if it raises.
+        """
+        with self._transaction():
+            yield self
+
+    def init_database(self):
+        """Bring the schema up to date, skipping all DDL when it is current"""
+        with self._lock:
+            conn = self.conn
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+
+            # Table rebuilds inside migrations need foreign keys off, and
+            # the pragma cannot change inside a transaction
+            conn.execute("PRAGMA foreign_keys = OFF")
+            try:
+                for target in range(version + 1, SCHEMA_VERSION + 1):
+                    with self._transaction() as cursor:
+                        MIGRATIONS[target - 1](cursor)
+                        cursor.execute("PRAGMA foreign_key_check")
+                        if cursor.fetchone() is not None:
+                            raise sqlite3.IntegrityError(
+                                f"Migration to schema version {target} broke a foreign key"
+                            )
+                        cursor.execute(f"PRAGMA user_version = {target}")
+            finally:
+                conn.execute("PRAGMA foreign_keys = ON")
+
+    def create_book(self, name):
+        """Create a new transaction book"""
+        try:
+            with self._transaction() as cursor:
                 cursor.execute(
                     """
-                    INSERT INTO settings (setting_type, value) VALUES (?, ?)
+                    INSERT INTO books (name, created_date) VALUES (?, ?)
                 """,
-                    ("transaction_type", type_val),
+                    (name, datetime.now().isoformat()),
                 )
+                self._emit(BOOK_CREATED, cursor.lastrowid)
+                return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            return None  # Book name already exists
+
+    @cached_result
+    def get_books(self):
+        """Get all books"""
+        with self._lock:
+            cursor = self.conn.execute(
+                """
+                SELECT id, name, created_date FROM books
+                WHERE id NOT IN (SELECT book_id FROM pending_book_deletes)
+                ORDER BY created_date DESC
+            """
+            )
+            return cursor.fetchall()
+
+    @cached_result
+    def get_book_summaries(self, book_ids=None, name_prefix=None):
+        """Get every book with its balance, totals and activity in one query
+
+        book_ids limits the result to those books, for refreshing a few
+        cards after a change. name_prefix keeps the books whose name starts
+        with it, ignoring ASCII case, through the idx_books_name_nocase
+        index.
+        """
+        sql = """
+            SELECT b.id, b.name, b.created_date, s.balance, s.total_in,
+                   s.total_out, s.transaction_count, s.last_activity
+            FROM books b JOIN book_summary s ON s.book_id = b.id
+            WHERE b.id NOT IN (SELECT book_id FROM pending_book_deletes)
+        """
+        params = []
+        if book_ids is not None:
+            sql += " AND b.id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(list(book_ids)))
+        if name_prefix:
+            low, high = name_prefix_bounds(name_prefix)
+            sql += " AND b.name >= ? COLLATE NOCASE"
+            params.append(low)
+            if high is not None:
+                sql += " AND b.name < ? COLLATE NOCASE"
+                params.append(high)
+        sql += " ORDER BY b.created_date DESC"
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [
+            BookSummary(
+                book_id,
+                name,
+                created_date,
+                from_paise(balance),
+                from_paise(total_in),
+                from_paise(total_out),
+                transaction_count,
+                (
+                    from_timestamp(last_activity).isoformat()
+                    if last_activity is not None
+                    else None
+                ),
+            )
+            for (
+                book_id,
+                name,
+                created_date,
+                balance,
+                total_in,
+                total_out,
+                transaction_count,
+                last_activity,
+            ) in rows
+        ]
+
+    def delete_book(self, book_id, progress=None, chunk_size=DELETE_CHUNK_SIZE):
+        """Delete a book and all its transactions
+
+        Transactions are removed chunk_size at a time, each chunk in its own
+        short write transaction, and the lock is given up between chunks so
+        other threads' calls can run. Run it on its own DatabaseExecutor;
+        on the screens' shared worker every queued call would still wait
+        for the whole delete. progress, if given, is called after every
+        chunk with the number of transactions deleted so far and the total.
+
+        The book is marked as pending first, which hides it from the book
+        list and skips the per-row summary upkeep; its summary and rollup
+        rows go with the book row at the end. A delete cut short (by
+        stop_deletes(), or by the app being killed) is finished by
+        finish_pending_deletes().
+        """
+        self.close_book_cache(book_id)
+        with self._transaction() as cursor:
+            cursor.execute(
+                "INSERT OR IGNORE INTO pending_book_deletes (book_id) "
+                "SELECT id FROM books WHERE id = ?",
+                (book_id,),
+            )
+            cursor.execute(
+                "SELECT COUNT(*) FROM transactions WHERE book_id = ?", (book_id,)
+            )
+            total = cursor.fetchone()[0]
+            # The book leaves the book list now, not when the rows are gone
+            self._emit(BOOK_DELETED, book_id)
 
-            for mode_val in default_payment_modes:
+        deleted = 0
+        while True:
+            if self._deletes_stopped.is_set():
+                return  # Left pending for the next finish_pending_deletes()
+            with self._transaction() as cursor:
                 cursor.execute(
                     """
-                    INSERT INTO settings (setting_type, value) VALUES (?, ?)
+                    DELETE FROM transactions WHERE id IN (
+                        SELECT id FROM transactions WHERE book_id = ? LIMIT ?
+                    )
                 """,
-                    ("payment_mode", mode_val),
+                    (book_id, chunk_size),
                 )
+                removed = cursor.rowcount
+            if removed == 0:
+                break
+            deleted += removed
+            if progress is not None:
+                progress(deleted, total)
+            sleep(0)  # Let other workers waiting on the lock in first
 
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            # Cascades to book_summary, the rollups and the pending mark
+            cursor.execute("DELETE FROM books WHERE id = ?", (book_id,))
 
-    def create_book(self, name):
-        """Create a new transaction book"""
-        try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO books (name, created_date) VALUES (?, ?)
-            """,
-                (name, datetime.now().isoformat()),
-            )
-            conn.commit()
-            book_id = cursor.lastrowid
-            conn.close()
-            return book_id
-        except sqlite3.IntegrityError:
-            return None  # Book name already exists
+    def stop_deletes(self):
+        """Make running and later book deletes stop after their current chunk
 
-    def get_books(self):
-        """Get all books"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, name, created_date FROM books ORDER BY created_date DESC"
-        )
-        books = cursor.fetchall()
-        conn.close()
-        return books
-
-    def delete_book(self, book_id):
-        """Delete a book and all its transactions"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM transactions WHERE book_id = ?", (book_id,))
-        cursor.execute("DELETE FROM books WHERE id = ?", (book_id,))
-        conn.commit()
-        conn.close()
+        Meant for shutdown, so closing the app never waits for a big delete;
+        the books stay marked and finish_pending_deletes() completes them on
+        the next start. Safe to call from any thread.
+        """
+        self._deletes_stopped.set()
+
+    def finish_pending_deletes(self):
+        """Complete book deletes that were interrupted part way"""
+        with self._lock:
+            book_ids = [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT book_id FROM pending_book_deletes"
+                ).fetchall()
+            ]
+        for book_id in book_ids:
+            self.delete_book(book_id)
+        return len(book_ids)
+
+    def delete_transaction(self, ids):
+        """Delete one transaction by id, or several given an iterable of ids
+
+        All of them go in one write transaction. Returns the number deleted.
+        """
+        ids = [ids] if isinstance(ids, int) else list(ids)
+        with self._transaction() as cursor:
+            if self._change_listeners:
+                cursor.execute(
+                    "SELECT book_id, id FROM transactions "
+                    "WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(ids),),
+                )
+                self._emit_by_book(TRANSACTIONS_DELETED, cursor.fetchall())
+            cursor.executemany(
+                "DELETE FROM transactions WHERE id = ?", ((id_,) for id_ in ids)
+            )
+            self._queue_cache_patch("delete", ids)
+            return cursor.rowcount
 
     def add_transaction(
         self, book_id, amount, description, transaction_type, payment_mode, is_cash_in
     ):
         """Add a new transaction"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        amount_paise, direction = _split_amount(amount, is_cash_in)
 
-        # Make amount negative for cash out
-        final_amount = amount if is_cash_in else -amount
+        with self._transaction() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO transactions (book_id, amount_paise, direction, description, category_id, payment_mode_id, transaction_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    book_id,
+                    amount_paise,
+                    direction,
+                    description,
+                    self._option_id(cursor, "transaction_type", transaction_type),
+                    self._option_id(cursor, "payment_mode", payment_mode),
+                    to_timestamp(datetime.now()),
+                ),
+            )
+            self._queue_cache_patch("upsert", [cursor.lastrowid])
+            self._emit(TRANSACTIONS_ADDED, book_id, [cursor.lastrowid])
 
-        cursor.execute(
-            """
-            INSERT INTO transactions (book_id, amount, description, transaction_type, payment_mode, transaction_date)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """,
-            (
-                book_id,
-                final_amount,
-                description,
-                transaction_type,
-                payment_mode,
-                datetime.now().isoformat(),
-            ),
-        )
-        conn.commit()
-        conn.close()
+    def add_transactions_bulk(self, rows):
+        """Add many transactions in one transaction
+
+        Each row is ``(book_id, amount, description, transaction_type,
+        payment_mode, is_cash_in)`` with an optional seventh
+        ``transaction_date`` (datetime, date or ISO string) for imported
+        entries; rows without one are dated now. Returns the number of rows
+        added.
+        """
+        now = to_timestamp(datetime.now())
+        option_ids = {}
+
+        with self._transaction() as cursor:
+            last_id = None
+            if self._book_caches or self._change_listeners:
+                # Rows past the current last id are the ones added here
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transactions")
+                last_id = cursor.fetchone()[0]
+                self._queue_cache_patch("upsert_after", last_id)
+
+            # Options are looked up on a second cursor while executemany
+            # is still consuming rows from the first
+            lookup = self.conn.cursor()
 
+            def option_id(setting_type, value):
+                key = (setting_type, value)
+                if key not in option_ids:
+                    option_ids[key] = self._option_id(lookup, setting_type, value)
+                return option_ids[key]
+
+            def prepared():
+                for row in rows:
+                    book_id, amount, description, trans_type, mode, is_cash_in = row[:6]
+                    amount_paise, direction = _split_amount(amount, is_cash_in)
+                    yield (
+                        book_id,
+                        amount_paise,
+                        direction,
+                        description,
+                        option_id("transaction_type", trans_type),
+                        option_id("payment_mode", mode),
+                        to_timestamp(row[6]) if len(row) > 6 else now,
+                    )
+
+            cursor.executemany(
+                """
+                INSERT INTO transactions (book_id, amount_paise, direction, description, category_id, payment_mode_id, transaction_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                prepared(),
+            )
+            added = cursor.rowcount
+            if last_id is not None and self._change_listeners:
+                cursor.execute(
+                    "SELECT book_id, id FROM transactions WHERE id > ?", (last_id,)
+                )
+                self._emit_by_book(TRANSACTIONS_ADDED, cursor.fetchall())
+            return added
+
+    @cached_result
     def get_transactions(self, book_id):
         """Get all transactions for a book"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT id, amount, description, transaction_type, payment_mode, transaction_date
-            FROM transactions WHERE book_id = ? ORDER BY transaction_date DESC
-        """,
-            (book_id,),
+        with self._lock:
+            cursor = self.conn.execute(
+                f"""
+                SELECT {TRANSACTION_COLUMNS}
+                FROM {TRANSACTION_SOURCE} WHERE t.book_id = ?
+                ORDER BY t.transaction_ts DESC, t.id DESC
+            """,
+                (book_id,),
+            )
+            return [_transaction_row(row) for row in cursor.fetchall()]
+
+    @cached_result
+    def get_transactions_page(self, book_id, limit=50, after=None):
+        """Get one page of a book's transactions, newest first
+
+        Pages are keyed on (transaction_ts, id) rather than OFFSET, so each
+        page is a single index seek however far the user has scrolled. Pass
+        the returned cursor back as ``after`` to fetch the next page; it is
+        None once the last page has been read.
+        """
+        query = f"""
+            SELECT {TRANSACTION_COLUMNS}
+            FROM {TRANSACTION_SOURCE} WHERE t.book_id = ?
+        """
+        params = [book_id]
+        if after is not None:
+            query += " AND (t.transaction_ts, t.id) < (?, ?)"
+            params.extend(after)
+        query += " ORDER BY t.transaction_ts DESC, t.id DESC LIMIT ?"
+        # Read one extra row to learn whether another page exists
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][5], rows[-1][0])
+        return [_transaction_row(row) for row in rows], next_cursor
+
+    @cached_result
+    def get_transactions_filtered(
+        self,
+        book_id,
+        date_from=None,
+        date_to=None,
+        payment_modes=None,
+        types=None,
+        amount_min=None,
+        amount_max=None,
+        text=None,
+        limit=None,
+        after=None,
+    ):
+        """Get a book's transactions matching the filter dialog's criteria
+
+        Dates are inclusive ``date`` bounds, payment_modes and types are
+        collections of accepted values (empty or None means any), the amount
+        bounds apply to the unsigned amount and text is a case-insensitive
+        substring of the description. The match count and cash in/out totals
+        cover every match, not just the returned page; pagination works as
+        in get_transactions_page.
+        """
+        conditions, params = _filter_conditions(
+            book_id,
+            date_from=date_from,
+            date_to=date_to,
+            payment_modes=payment_modes,
+            types=types,
+            amount_min=amount_min,
+            amount_max=amount_max,
+            text=text,
+        )
+        where = " AND ".join(conditions)
+        page_where = where
+        page_params = list(params)
+        if after is not None:
+            page_where += " AND (t.transaction_ts, t.id) < (?, ?)"
+            page_params.extend(after)
+        # Read one extra row to learn whether another page exists
+        page_params.append(-1 if limit is None else limit + 1)
+
+        # The totals and the page are separate subqueries so the page can
+        # stream from the date index with its LIMIT instead of sorting
+        # every match
+        query = f"""
+            SELECT totals.match_count, totals.total_in, totals.total_out, page.*
+            FROM (
+                SELECT COUNT(*) AS match_count,
+                       COALESCE(SUM(CASE WHEN t.direction = 1 THEN t.amount_paise END), 0)
+                           AS total_in,
+                       COALESCE(SUM(CASE WHEN t.direction = -1 THEN t.amount_paise END), 0)
+                           AS total_out
+                FROM {TRANSACTION_SOURCE} WHERE {where}
+            ) AS totals
+            LEFT JOIN (
+                SELECT {TRANSACTION_COLUMNS}
+                FROM {TRANSACTION_SOURCE} WHERE {page_where}
+                ORDER BY t.transaction_ts DESC, t.id DESC LIMIT ?
+            ) AS page
+        """
+        params = params + page_params
+
+        with self._lock:
+            result = self.conn.execute(query, params).fetchall()
+
+        count, total_in, total_out = result[0][:3]
+        rows = [row[3:] for row in result if row[3] is not None]
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][5], rows[-1][0])
+        return FilteredTransactions(
+            [_transaction_row(row) for row in rows],
+            next_cursor,
+            count,
+            from_paise(total_in),
+            from_paise(total_out),
+        )
+
+    @cached_result
+    def get_period_summary(
+        self, book_id=None, granularity="month", start=None, end=None, group_by=None
+    ):
+        """Get cash in/out totals per day, month or year from the rollup tables
+
+        book_id None sums every book. start and end are inclusive dates; for
+        month and year granularity they select whole months, since that is
+        the finest level the monthly rollup keeps. group_by="category" splits
+        each month or year by category. Returns PeriodTotal rows in period
+        order.
+        """
+        if granularity not in ("day", "month", "year"):
+            raise ValueError(f"Unknown granularity: {granularity}")
+        if group_by not in (None, "category"):
+            raise ValueError(f"Unknown grouping: {group_by}")
+
+        conditions = []
+        params = []
+        if granularity == "day":
+            if group_by is not None:
+                raise ValueError("Daily totals are not kept per category")
+            source = "daily_totals r"
+            period = "r.day"
+            bound = "r.day"
+            to_bound = _day_bound
+        else:
+            source = "monthly_category_totals r"
+            period = "r.month" if granularity == "month" else "r.month / 100"
+            bound = "r.month"
+            to_bound = _month_bound
+        category = "NULL"
+        if group_by == "category":
+            source += " JOIN categories c ON c.id = r.category_id"
+            category = "c.name"
+
+        if book_id is not None:
+            conditions.append("r.book_id = ?")
+            params.append(book_id)
+        else:
+            conditions.append(
+                "r.book_id NOT IN (SELECT book_id FROM pending_book_deletes)"
+            )
+        if start is not None:
+            conditions.append(f"{bound} >= ?")
+            params.append(to_bound(start))
+        if end is not None:
+            conditions.append(f"{bound} <= ?")
+            params.append(to_bound(end))
+        where = " AND ".join(conditions)
+
+        with self._lock:
+            rows = self.conn.execute(
+                f"""
+                SELECT {period} AS period, {category} AS category,
+                       SUM(r.total_in), SUM(r.total_out), SUM(r.transaction_count)
+                FROM {source} WHERE {where}
+                GROUP BY 1, 2 ORDER BY 1, 2
+            """,
+                params,
+            ).fetchall()
+
+        to_date = _PERIOD_DATES[granularity]
+        return [
+            PeriodTotal(
+                to_date(value),
+                category_name,
+                from_paise(total_in),
+                from_paise(total_out),
+                count,
+            )
+            for value, category_name, total_in, total_out, count in rows
+        ]
+
+    def rebuild_rollups(self):
+        """Recompute the period rollup tables from the transactions
+
+        The triggers keep them current; this is for repairing a database
+        edited outside the app.
+        """
+        with self._transaction() as cursor:
+            for statement in ROLLUP_REBUILD:
+                cursor.execute(statement)
+
+    def iter_transactions(self, book_id, order="desc", filters=None, batch_size=500):
+        """Yield a book's transactions as TransactionRows, using bounded memory
+
+        order is "desc" (newest first) or "asc"; filters is a dict of the
+        get_transactions_filtered criteria. Rows are read batch_size at a
+        time, each batch a keyset query of its own, so no statement stays
+        open on the shared connection while the consumer works and other
+        threads can use it between batches.
+        """
+        if order not in ("desc", "asc"):
+            raise ValueError(f"Unknown order: {order}")
+        conditions, params = _filter_conditions(book_id, **(filters or {}))
+        query = f"""
+            SELECT {TRANSACTION_COLUMNS}
+            FROM {TRANSACTION_SOURCE} WHERE {' AND '.join(conditions)}
+        """
+        after_condition = (
+            " AND (t.transaction_ts, t.id) "
+            + ("<" if order == "desc" else ">")
+            + " (?, ?)"
         )
-        transactions = cursor.fetchall()
-        conn.close()
-        return transactions
+        ordering = f" ORDER BY t.transaction_ts {order}, t.id {order} LIMIT ?"
 
+        batch_query = query + ordering
+        batch_params = params + [batch_size]
+        while True:
+            with self._lock:
+                # Reading the batch to the end finishes the statement, so
+                # it doesn't pin a read snapshot while rows are consumed
+                rows = self.conn.execute(batch_query, batch_params).fetchall()
+            for row in rows:
+                yield _transaction_row(row)
+            if len(rows) < batch_size:
+                return
+            batch_query = query + after_condition + ordering
+            batch_params = params + [rows[-1][5], rows[-1][0], batch_size]
+
+    @cached_result
     def get_balance(self, book_id):
         """Get the balance for a book"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT SUM(amount) FROM transactions WHERE book_id = ?", (book_id,)
-        )
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result[0] is not None else 0.0
+        with self._lock:
+            cursor = self.conn.execute(
+                "SELECT balance FROM book_summary WHERE book_id = ?", (book_id,)
+            )
+            result = cursor.fetchone()
+        return from_paise(result[0] if result is not None else 0)
 
+    @cached_result
     def get_dropdown_options(self, setting_type):
         """Get dropdown options for transaction types or payment modes"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        table, _ = _option_table(setting_type)
+        with self._lock:
+            cursor = self.conn.execute(
+                f"SELECT name FROM {table} WHERE is_active = 1 ORDER BY id"
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def _option_id(self, cursor, setting_type, value):
+        """Get the id of an option by name, adding it as hidden if unknown"""
+        table, _ = _option_table(setting_type)
+        cursor.execute(f"SELECT id FROM {table} WHERE name = ?", (value,))
+        row = cursor.fetchone()
+        if row is not None:
+            return row[0]
+        # Values typed outside the dropdown are stored but not offered
         cursor.execute(
-            "SELECT value FROM settings WHERE setting_type = ?", (setting_type,)
+            f"INSERT INTO {table} (name, is_active) VALUES (?, 0)", (value,)
         )
-        options = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return options
+        return cursor.lastrowid
 
     def add_dropdown_option(self, setting_type, value):
-        """Add a new dropdown option"""
-        try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
+        """Add a new dropdown option, restoring it if it was removed while in use"""
+        table, _ = _option_table(setting_type)
+        with self._transaction() as cursor:
             cursor.execute(
-                """
-                INSERT INTO settings (setting_type, value) VALUES (?, ?)
+                f"""
+                INSERT INTO {table} (name) VALUES (?)
+                ON CONFLICT (name) DO UPDATE SET is_active = 1 WHERE is_active = 0
             """,
-                (setting_type, value),
+                (value,),
             )
-            conn.commit()
-            conn.close()
-            return True
-        except sqlite3.IntegrityError:
-            return False
+            rows_affected = cursor.rowcount
+            if rows_affected:
+                self._emit(OPTIONS_CHANGED, setting_type=setting_type)
+        return rows_affected > 0
 
-    def remove_dropdown_option(self, setting_type, value):
-        """Remove a dropdown option"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            DELETE FROM settings WHERE setting_type = ? AND value = ?
-        """,
-            (setting_type, value),
-        )
-        rows_affected = cursor.rowcount
-        conn.commit()
-        conn.close()
+    @cached_result
+    def get_option_usage(self, setting_type, value):
+        """Count the transactions that use a dropdown option"""
+        table, column = _option_table(setting_type)
+        with self._lock:
+            cursor = self.conn.execute(
+                f"""
+                SELECT COUNT(*) FROM transactions
+                WHERE {column} = (SELECT id FROM {table} WHERE name = ?)
+            """,
+                (value,),
+            )
+            return cursor.fetchone()[0]
+
+    def remove_dropdown_option(self, setting_type, value, replacement=None):
+        """Remove a dropdown option
+
+        An option no transaction uses is deleted. One still in use is hidden
+        from the dropdown but kept on its transactions, unless a replacement
+        option is given, in which case those transactions are moved to it.
+        """
+        if replacement is not None:
+            return self.merge_dropdown_options(setting_type, value, replacement)
+
+        table, column = _option_table(setting_type)
+        with self._transaction() as cursor:
+            cursor.execute(
+                f"""
+                DELETE FROM {table} WHERE name = ? AND NOT EXISTS (
+                    SELECT 1 FROM transactions WHERE {column} = {table}.id
+                )
+            """,
+                (value,),
+            )
+            rows_affected = cursor.rowcount
+            if rows_affected == 0:
+                cursor.execute(
+                    f"UPDATE {table} SET is_active = 0 WHERE name = ? AND is_active = 1",
+                    (value,),
+                )
+                rows_affected = cursor.rowcount
+            if rows_affected:
+                self._emit(OPTIONS_CHANGED, setting_type=setting_type)
         return rows_affected > 0
 
+    def rename_dropdown_option(self, setting_type, value, new_value):
+        """Rename a dropdown option; its transactions follow automatically"""
+        table, _ = _option_table(setting_type)
+        try:
+            with self._transaction() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET name = ? WHERE name = ?", (new_value, value)
+                )
+                rows_affected = cursor.rowcount
+                if rows_affected:
+                    self._queue_cache_patch("options")
+                    self._emit(OPTIONS_CHANGED, setting_type=setting_type)
+            return rows_affected > 0
+        except sqlite3.IntegrityError:
+            return False  # An option with the new name already exists
+
+    def merge_dropdown_options(self, setting_type, value, into_value):
+        """Move every transaction from one option to another and delete the first"""
+        table, column = _option_table(setting_type)
+        with self._transaction() as cursor:
+            cursor.execute(f"SELECT id FROM {table} WHERE name = ?", (value,))
+            source = cursor.fetchone()
+            if source is None or value == into_value:
+                return False
+            target_id = self._option_id(cursor, setting_type, into_value)
+            cursor.execute(
+                f"UPDATE {table} SET is_active = 1 WHERE id = ?", (target_id,)
+            )
+            cursor.execute(
+                f"UPDATE transactions SET {column} = ? WHERE {column} = ?",
+                (target_id, source[0]),
+            )
+            cursor.execute(f"DELETE FROM {table} WHERE id = ?", (source[0],))
+            self._queue_cache_patch("reload")
+            self._emit(OPTIONS_CHANGED, setting_type=setting_type)
+        return True
+
     def update_transaction(
         self,
         trans_id,
@@ -237,49 +1232,248 @@ class DatabaseManager:
         is_cash_in,
         transaction_date=None,
     ):
-        """Update an existing transaction"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        """Update an existing transaction
 
-        # Make amount negative for cash out
-        final_amount = amount if is_cash_in else -amount
+        transaction_date may be a datetime, a date or an ISO string.
+        """
+        amount_paise, direction = _split_amount(amount, is_cash_in)
 
         # Use provided date or current datetime
         if transaction_date is None:
-            transaction_date = datetime.now().isoformat()
+            transaction_date = datetime.now()
 
-        cursor.execute(
+        with self._transaction() as cursor:
+            cursor.execute(
+                """
+                UPDATE transactions
+                SET amount_paise = ?, direction = ?, description = ?, category_id = ?, payment_mode_id = ?, transaction_ts = ?
+                WHERE id = ?
+            """,
+                (
+                    amount_paise,
+                    direction,
+                    description,
+                    self._option_id(cursor, "transaction_type", transaction_type),
+                    self._option_id(cursor, "payment_mode", payment_mode),
+                    to_timestamp(transaction_date),
+                    trans_id,
+                ),
+            )
+            rows_affected = cursor.rowcount
+            self._queue_cache_patch("upsert", [trans_id])
+            if rows_affected and self._change_listeners:
+                cursor.execute(
+                    "SELECT book_id FROM transactions WHERE id = ?", (trans_id,)
+                )
+                self._emit(TRANSACTIONS_UPDATED, cursor.fetchone()[0], [trans_id])
+        return rows_affected > 0
+
+    @cached_result
+    def search_transactions(self, query, book_id=None, limit=50):
+        """Find transactions whose description contains words starting with
+        each word of query, best matches first
+
+        Searches every book unless book_id is given. Returns SearchResult
+        rows, which start with the same fields as get_transactions rows.
+        """
+        match = fts_prefix_query(query)
+        if match is None:
+            return []
+
+        sql = f"""
+            SELECT {TRANSACTION_COLUMNS}, b.id, b.name
+            FROM transactions_fts f
+            JOIN {TRANSACTION_SOURCE}
+            JOIN books b ON b.id = t.book_id
+            WHERE t.id = f.rowid AND transactions_fts MATCH ?
+        """
+        params = [match]
+        if book_id is not None:
+            sql += " AND t.book_id = ?"
+            params.append(book_id)
+        else:
+            sql += " AND t.book_id NOT IN (SELECT book_id FROM pending_book_deletes)"
+        # bm25 rank, newest first among equally good matches
+        sql += " ORDER BY f.rank, t.transaction_ts DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [
+            SearchResult(*_transaction_row(row[:6]), row[6], row[7]) for row in rows
+        ]
+
+    def open_book_cache(self, book_id):
+        """Load a book into a columnar BookCache and keep it up to date
+
+        Until close_book_cache(book_id), every committed add, edit and
+        delete on the book is patched into the returned cache in place, so
+        it can be filtered and totalled without going back to SQLite.
+        Opening an already open book returns its existing cache.
+        """
+        from book_cache import BookCache
+
+        with self._lock:
+            cache = self._book_caches.get(book_id)
+            if cache is None:
+                cache = BookCache(book_id, [], {}, {})
+                self._reload_book_cache(cache)
+                self._book_caches[book_id] = cache
+            return cache
+
+    def close_book_cache(self, book_id):
+        """Stop maintaining a book's cache and drop it"""
+        with self._lock:
+            self._book_caches.pop(book_id, None)
+
+    def book_cache_memory(self):
+        """Memory used by each open cache, as {book_id: memory_usage()}"""
+        with self._lock:
+            caches = list(self._book_caches.values())
+        return {cache.book_id: cache.memory_usage() for cache in caches}
+
+    def _option_names(self):
+        """Id to name maps of every category and payment mode, hidden too"""
+        return tuple(
+            dict(self.conn.execute(f"SELECT id, name FROM {table}").fetchall())
+            for table, _ in OPTION_TABLES.values()
+        )
+
+    def _reload_book_cache(self, cache):
+        """Refill a cache from the database"""
+        rows = self.conn.execute(
             """
-            UPDATE transactions 
-            SET amount = ?, description = ?, transaction_type = ?, payment_mode = ?, transaction_date = ?
-            WHERE id = ?
+            SELECT id, direction * amount_paise, transaction_ts, category_id,
+                   payment_mode_id, description
+            FROM transactions WHERE book_id = ?
+            ORDER BY transaction_ts DESC, id DESC
         """,
-            (
-                final_amount,
-                description,
-                transaction_type,
-                payment_mode,
-                transaction_date,
-                trans_id,
-            ),
-        )
+            (cache.book_id,),
+        ).fetchall()
+        cache.reset(rows, *self._option_names())
 
-        rows_affected = cursor.rowcount
-        conn.commit()
-        conn.close()
-        return rows_affected > 0
+    def _queue_cache_patch(self, kind, value=None):
+        """Record a change to apply to the open caches once it commits
+
+        kind is "upsert" (ids added or edited), "upsert_after" (every id
+        past value), "delete" (ids removed), "options" (names changed) or
+        "reload" (rows moved between options).
+        """
+        if self._book_caches:
+            self._cache_patches.append((kind, value))
+
+    def _apply_cache_patches(self):
+        """Bring the open caches in line with the transaction just committed"""
+        patches, self._cache_patches = self._cache_patches, []
+        caches = list(self._book_caches.values())
+        for kind, value in patches:
+            if kind == "reload":
+                for cache in caches:
+                    self._reload_book_cache(cache)
+            elif kind == "options":
+                names = self._option_names()
+                for cache in caches:
+                    cache.set_option_names(*names)
+            elif kind == "delete":
+                for cache in caches:
+                    cache.remove_ids(value)
+            else:
+                columns = (
+                    "book_id, id, direction * amount_paise, transaction_ts, "
+                    "category_id, payment_mode_id, description"
+                )
+                if kind == "upsert":
+                    placeholders = ", ".join("?" * len(value))
+                    sql = f"SELECT {columns} FROM transactions WHERE id IN ({placeholders})"
+                    params = value
+                else:
+                    sql = f"SELECT {columns} FROM transactions WHERE id > ?"
+                    params = (value,)
+                rows = self.conn.execute(sql, params).fetchall()
+                names = None
+                for cache in caches:
+                    if kind == "upsert":
+                        cache.remove_ids(value)
+                    book_rows = [row[1:] for row in rows if row[0] == cache.book_id]
+                    if any(
+                        row[3] not in cache.categories
+                        or row[4] not in cache.payment_modes
+                        for row in book_rows
+                    ):
+                        # The write created a new option
+                        names = names or self._option_names()
+                        cache.set_option_names(*names)
+                    cache.insert_rows(book_rows)
 
+    @cached_result
+    def get_transactions_by_ids(self, ids):
+        """Get the transactions with the given ids, newest first
+
+        Ids that no longer exist are skipped.
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                f"""
+                SELECT {TRANSACTION_COLUMNS}
+                FROM {TRANSACTION_SOURCE}
+                WHERE t.id IN (SELECT value FROM json_each(?))
+                ORDER BY t.transaction_ts DESC, t.id DESC
+            """,
+                (json.dumps(list(ids)),),
+            )
+            return [_transaction_row(row) for row in cursor.fetchall()]
+
+    @cached_result
     def get_transaction_by_id(self, trans_id):
         """Get a specific transaction by ID"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT id, amount, description, transaction_type, payment_mode, transaction_date
-            FROM transactions WHERE id = ?
-        """,
-            (trans_id,),
+        with self._lock:
+            cursor = self.conn.execute(
+                f"""
+                SELECT {TRANSACTION_COLUMNS}
+                FROM {TRANSACTION_SOURCE} WHERE t.id = ?
+            """,
+                (trans_id,),
+            )
+            row = cursor.fetchone()
+        return _transaction_row(row) if row is not None else None
+
+
+class DatabaseSnapshot(DatabaseManager):
+    """The read methods of DatabaseManager over a pinned read transaction
+
+    Created by DatabaseManager.snapshot(); any write raises
+    sqlite3.OperationalError.
+    """
+
+    def _connect(self):
+        """Open the file read-only and start the read transaction"""
+        uri = f"file:{pathname2url(os.path.abspath(self.db_name))}?mode=ro"
+        conn = sqlite3.connect(
+            uri, uri=True, check_same_thread=False, isolation_level=None
         )
-        transaction = cursor.fetchone()
-        conn.close()
-        return transaction
+        for pragma, value in SNAPSHOT_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        conn.execute("BEGIN")
+        # A deferred transaction takes its snapshot at the first read
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        return conn
+
+    def init_database(self):
+        """Pin the snapshot now; the schema is the writer's business"""
+        self.conn
+
+    def close(self):
+        """End the read transaction and close the connection"""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.execute("ROLLBACK")
+                finally:
+                    self._conn.close()
+                    self._conn = None
+                    self._results.clear()
+
+    @contextmanager
+    def _transaction(self):
+        raise sqlite3.OperationalError("Snapshots are read-only")
+        yield
@@ -0,0 +1,160 @@
+"""
+Background database worker for Cashlytics
+
+Screens hand DatabaseManager calls to a DatabaseExecutor instead of running
+them on the Kivy main thread. A single worker thread runs the calls in order
+and their results come back on the main thread through Clock.schedule_once,
+so the UI keeps drawing while SQLite works.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+
+from ui_thread import next_frame
+
+
+class DatabaseRequest(Future):
+    """Future for one queued database call
+
+    Besides the usual Future API, discard() drops a request whose owner no
+    longer wants it: a queued call is cancelled outright and a call already
+    running finishes but never delivers its callbacks.
+    """
+
+    def __init__(self, owner=None):
+        super().__init__()
+        self.owner = owner
+        self.discarded = False
+
+    def discard(self):
+        """Cancel the call if it has not started and suppress its callbacks"""
+        self.discarded = True
+        self.cancel()
+
+
+class DatabaseExecutor:
+    """Runs DatabaseManager calls on a dedicated worker thread
+
+    Every call goes through submit(), which queues it and returns a
+    DatabaseRequest. The worker runs calls one at a time in submission order,
+    so writes made by one screen are visible to the reads it queues after
+    them.
+    """
+
+    def __init__(self, db_manager, dispatch=None):
+        self.db_manager = db_manager
+        # Hands result callbacks to the UI thread; tests pass a direct call
+        self._dispatch = dispatch or next_frame
+        self._queue = queue.Queue()
+        self._pending = {}  # id(owner) -> set of unfinished requests
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="database-worker", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self, method, *args, on_result=None, on_error=None, owner=None, **kwargs
+    ):
+        """Queue a database call and return its DatabaseRequest
+
+        method is the name of a DatabaseManager method, called with the
+        remaining arguments, or a callable taking the DatabaseManager, for
+        several calls that belong together. on_result receives the return
+        value and on_error the exception, both on the UI thread; a failure
+        without an on_error is only logged, so user-facing writes should
+        pass one. Requests
+        submitted with an owner can be dropped together with cancel(owner);
+        writes are normally submitted without one so they always complete.
+        """
+        if isinstance(method, str):
+            call = getattr(self.db_manager, method)
+        else:
+            call = lambda *call_args, **call_kwargs: method(
+                self.db_manager, *call_args, **call_kwargs
+            )
+
+        request = DatabaseRequest(owner)
+        if owner is not None:
+            with self._pending_lock:
+                self._pending.setdefault(id(owner), set()).add(request)
+
+        def finished(request):
+            if owner is not None:
+                with self._pending_lock:
+                    requests = self._pending.get(id(owner))
+                    if requests is not None:
+                        requests.discard(request)
+                        if not requests:
+                            del self._pending[id(owner)]
+            if request.cancelled():
+                return
+            self._dispatch(lambda: self._deliver(request, on_result, on_error))
+
+        request.add_done_callback(finished)
+        self._queue.put((request, call, args, kwargs))
+        return request
+
+    def on_ui_thread(self, callback):
+        """Wrap callback so calls made on the worker run it on the UI thread
+
+        Meant for progress callbacks handed to long DatabaseManager calls.
+        """
+        return lambda *args: self._dispatch(lambda: callback(*args))
+
+    def cancel(self, owner):
+        """Discard every unfinished request submitted for owner"""
+        with self._pending_lock:
+            requests = self._pending.pop(id(owner), set())
+        for request in requests:
+            request.discard()
+
+    def shutdown(self, wait=True, cancel_queued=False):
+        """Stop the worker after the calls already queued have run
+
+        With cancel_queued, calls that have not started are cancelled
+        instead; only the one running, if any, is waited for.
+        """
+        if cancel_queued:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].discard()
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _deliver(self, request, on_result, on_error):
+        """Hand a finished request's outcome to its callbacks"""
+        if request.discarded:
+            return
+        error = request.exception()
+        if error is None:
+            if on_result is not None:
+                on_result(request.result())
+        elif on_error is not None:
+            on_error(error)
+        else:
+            from kivy.logger import Logger
+
+            Logger.error("Database: call failed", exc_info=error)
+
+    def _run(self):
+        """Worker loop: run queued calls until shutdown"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            request, call, args, kwargs = item
+            if not request.set_running_or_notify_cancel():
+                continue
+            try:
+                result = call(*args, **kwargs)
+            except Exception as error:
+                request.set_exception(error)
+            else:
+                request.set_result(result)
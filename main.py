@@ -5,7 +5,10 @@ from screens.book_list import BookListScreen
 from screens.transaction_list import TransactionListScreen
 from screens.transaction_form import TransactionFormScreen
 from screens.settings import SettingsScreen
+from screens.reports import ReportsScreen
+from change_events import ChangeBus
 from database import DatabaseManager
+from db_executor import DatabaseExecutor
 
 
 class TransactionTrackerApp(MDApp):
@@ -16,6 +19,18 @@ class TransactionTrackerApp(MDApp):
         self.theme_cls.theme_style = "Light"
         # Create shared database manager
         self.db_manager = DatabaseManager()
+        # Screens run their database calls on this worker thread
+        self.db_executor = DatabaseExecutor(self.db_manager)
+        # Reports read from snapshots on their own worker, so a long report
+        # and the form's writes never wait for each other
+        self.report_executor = DatabaseExecutor(self.db_manager)
+        # Book deletes run here; the connection lock is given up between
+        # chunks, so the other workers' calls run while a big book goes
+        self.delete_executor = DatabaseExecutor(self.db_manager)
+        # Committed changes reach the screens once per frame
+        self.change_bus = ChangeBus(self.db_manager)
+        # Finish any book delete the app was closed in the middle of
+        self.delete_executor.submit("finish_pending_deletes")
 
         # Set window size for mobile simulation (optional - remove for actual mobile deployment)
         # Moto Edge 40 approximate resolution: 1080x2400 pixels
@@ -31,24 +46,51 @@ class TransactionTrackerApp(MDApp):
         transaction_list_screen = TransactionListScreen()
         transaction_form_screen = TransactionFormScreen()
         settings_screen = SettingsScreen()
+        reports_screen = ReportsScreen()
 
         # Set shared database manager
         book_list_screen.db_manager = self.db_manager
         transaction_list_screen.db_manager = self.db_manager
         transaction_form_screen.db_manager = self.db_manager
         settings_screen.db_manager = self.db_manager
+        reports_screen.db_manager = self.db_manager
+        for screen in (
+            book_list_screen,
+            transaction_list_screen,
+            transaction_form_screen,
+            settings_screen,
+            reports_screen,
+        ):
+            screen.db_executor = self.db_executor
+        reports_screen.db_executor = self.report_executor
+        book_list_screen.delete_executor = self.delete_executor
+        for screen in (book_list_screen, transaction_list_screen):
+            screen.change_bus = self.change_bus
+            self.change_bus.subscribe(screen.on_database_changes)
 
         # Add all screens
         screen_manager.add_widget(book_list_screen)
         screen_manager.add_widget(transaction_list_screen)
         screen_manager.add_widget(transaction_form_screen)
         screen_manager.add_widget(settings_screen)
+        screen_manager.add_widget(reports_screen)
 
         # Set initial screen
         screen_manager.current = "book_list"
 
         return screen_manager
 
+    def on_stop(self):
+        """Finish queued database work and close the connection on exit"""
+        # A big delete stops after its current chunk and resumes on the
+        # next start through finish_pending_deletes
+        self.db_manager.stop_deletes()
+        self.delete_executor.shutdown(cancel_queued=True)
+        self.db_executor.shutdown()
+        self.report_executor.shutdown()
+        self.change_bus.close()
+        self.db_manager.close()
+
 
 def main():
     """Main function to run the app"""
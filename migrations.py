@@ -0,0 +1,937 @@
+"""
+Ordered schema migrations for the transaction tracker database.
+
+Each step receives a cursor inside an open transaction and upgrades the
+schema by exactly one version. The version reached is stored in
+PRAGMA user_version, so steps only ever run once per database. Append new
+steps to MIGRATIONS; never edit a step that has already shipped.
+"""
+
+DEFAULT_TRANSACTION_TYPES = [
+    "Food",
+    "Transport",
+    "Shopping",
+    "Bills",
+    "Entertainment",
+    "Other",
+]
+
+DEFAULT_PAYMENT_MODES = [
+    "Cash",
+    "Credit Card",
+    "Debit Card",
+    "UPI",
+    "Net Banking",
+    "Cheque",
+]
+
+
+def _table_sql(cursor, table):
+    """Return the CREATE statement of a table, or None if it does not exist"""
+    cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _create_triggers(cursor, triggers):
+    """(Re)create triggers one statement at a time
+
+    executescript() would commit the migration's open transaction, so the
+    statements are run individually instead.
+    """
+    for trigger_sql in triggers:
+        name = trigger_sql.split()[2]
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(trigger_sql)
+
+
+def _replace_table(cursor, table, new_table):
+    """Swap a rebuilt table in for the original, keeping its id sequence
+
+    Dropping the original also drops its indexes and triggers, so callers
+    recreate whichever of those they still need.
+    """
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    row = cursor.fetchone()
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+    if row is not None:
+        # Never hand out ids of rows deleted before the rebuild
+        cursor.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+            (row[0], table),
+        )
+
+
+def migrate_1_base_schema(cursor):
+    """Create the original tables and make settings values unique"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            created_date TEXT NOT NULL
+        )
+    """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT NOT NULL,
+            transaction_type TEXT NOT NULL,
+            payment_mode TEXT NOT NULL,
+            transaction_date TEXT NOT NULL,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+    """
+    )
+
+    # Older installs created settings without the UNIQUE constraint, so
+    # rebuild it and drop duplicate values (keeping the first one added)
+    settings_sql = _table_sql(cursor, "settings")
+    if settings_sql is not None and "UNIQUE" not in settings_sql.upper():
+        cursor.execute("ALTER TABLE settings RENAME TO settings_old")
+        settings_sql = None
+
+    if settings_sql is None:
+        cursor.execute(
+            """
+            CREATE TABLE settings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                setting_type TEXT NOT NULL,
+                value TEXT NOT NULL,
+                UNIQUE(setting_type, value)
+            )
+        """
+        )
+
+    if _table_sql(cursor, "settings_old") is not None:
+        cursor.execute(
+            """
+            INSERT OR IGNORE INTO settings (id, setting_type, value)
+            SELECT id, setting_type, value FROM settings_old ORDER BY id
+        """
+        )
+        cursor.execute("DROP TABLE settings_old")
+
+    # Insert default dropdown options only if settings table is empty
+    cursor.execute("SELECT COUNT(*) FROM settings")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany(
+            "INSERT INTO settings (setting_type, value) VALUES (?, ?)",
+            [("transaction_type", value) for value in DEFAULT_TRANSACTION_TYPES]
+            + [("payment_mode", value) for value in DEFAULT_PAYMENT_MODES],
+        )
+
+
+def migrate_2_transaction_indexes(cursor):
+    """Index transactions for per-book, date-ordered access and totals"""
+    # Serves get_transactions' ORDER BY without a temp B-tree, and the
+    # book_id prefix serves delete_book
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_transactions_book_date
+        ON transactions (book_id, transaction_date DESC, id DESC)
+    """
+    )
+    # Covering index for SUM(amount) per book
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_transactions_book_amount
+        ON transactions (book_id, amount)
+    """
+    )
+    # settings lookups by setting_type are already served by the
+    # UNIQUE(setting_type, value) index, so no extra index is needed there
+
+
+# Triggers that keep book_summary in step with books and transactions
+BOOK_SUMMARY_TRIGGERS_V3 = (
+    """
+    CREATE TRIGGER trg_books_summary_insert AFTER INSERT ON books
+    BEGIN
+        INSERT INTO book_summary (book_id) VALUES (NEW.id);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_summary_insert AFTER INSERT ON transactions
+    BEGIN
+        UPDATE book_summary SET
+            balance = balance + NEW.amount,
+            total_in = total_in + MAX(NEW.amount, 0),
+            total_out = total_out + MAX(-NEW.amount, 0),
+            transaction_count = transaction_count + 1,
+            last_activity = CASE
+                WHEN last_activity IS NULL OR NEW.transaction_date > last_activity
+                THEN NEW.transaction_date ELSE last_activity END
+        WHERE book_id = NEW.book_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_summary_delete AFTER DELETE ON transactions
+    BEGIN
+        UPDATE book_summary SET
+            balance = balance - OLD.amount,
+            total_in = total_in - MAX(OLD.amount, 0),
+            total_out = total_out - MAX(-OLD.amount, 0),
+            transaction_count = transaction_count - 1,
+            last_activity = (
+                SELECT MAX(transaction_date) FROM transactions
+                WHERE book_id = OLD.book_id
+            )
+        WHERE book_id = OLD.book_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_summary_update
+    AFTER UPDATE OF book_id, amount, transaction_date ON transactions
+    BEGIN
+        UPDATE book_summary SET
+            balance = balance - OLD.amount,
+            total_in = total_in - MAX(OLD.amount, 0),
+            total_out = total_out - MAX(-OLD.amount, 0),
+            transaction_count = transaction_count - 1
+        WHERE book_id = OLD.book_id;
+        UPDATE book_summary SET
+            balance = balance + NEW.amount,
+            total_in = total_in + MAX(NEW.amount, 0),
+            total_out = total_out + MAX(-NEW.amount, 0),
+            transaction_count = transaction_count + 1
+        WHERE book_id = NEW.book_id;
+        UPDATE book_summary SET
+            last_activity = (
+                SELECT MAX(transaction_date) FROM transactions
+                WHERE book_id = book_summary.book_id
+            )
+        WHERE book_id IN (OLD.book_id, NEW.book_id);
+    END
+    """,
+)
+
+
+def migrate_3_book_summary(cursor):
+    """Keep per-book totals in a table maintained by triggers"""
+    cursor.execute(
+        """
+        CREATE TABLE book_summary (
+            book_id INTEGER PRIMARY KEY REFERENCES books (id) ON DELETE CASCADE,
+            balance REAL NOT NULL DEFAULT 0,
+            total_in REAL NOT NULL DEFAULT 0,
+            total_out REAL NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            last_activity TEXT
+        )
+    """
+    )
+    cursor.execute(
+        """
+        INSERT INTO book_summary
+            (book_id, balance, total_in, total_out, transaction_count, last_activity)
+        SELECT
+            b.id,
+            COALESCE(SUM(t.amount), 0),
+            COALESCE(SUM(CASE WHEN t.amount > 0 THEN t.amount ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN t.amount < 0 THEN -t.amount ELSE 0 END), 0),
+            COUNT(t.id),
+            MAX(t.transaction_date)
+        FROM books b LEFT JOIN transactions t ON t.book_id = b.id
+        GROUP BY b.id
+    """
+    )
+    _create_triggers(cursor, BOOK_SUMMARY_TRIGGERS_V3)
+
+
+# book_summary triggers once amounts are integer paise with a direction
+BOOK_SUMMARY_TRIGGERS_V4 = (
+    """
+    CREATE TRIGGER trg_transactions_summary_insert AFTER INSERT ON transactions
+    BEGIN
+        UPDATE book_summary SET
+            balance = balance + NEW.direction * NEW.amount_paise,
+            total_in = total_in
+                + CASE WHEN NEW.direction = 1 THEN NEW.amount_paise ELSE 0 END,
+            total_out = total_out
+                + CASE WHEN NEW.direction = -1 THEN NEW.amount_paise ELSE 0 END,
+            transaction_count = transaction_count + 1,
+            last_activity = CASE
+                WHEN last_activity IS NULL OR NEW.transaction_date > last_activity
+                THEN NEW.transaction_date ELSE last_activity END
+        WHERE book_id = NEW.book_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_summary_delete AFTER DELETE ON transactions
+    BEGIN
+        UPDATE book_summary SET
+            balance = balance - OLD.direction * OLD.amount_paise,
+            total_in = total_in
+                - CASE WHEN OLD.direction = 1 THEN OLD.amount_paise ELSE 0 END,
+            total_out = total_out
+                - CASE WHEN OLD.direction = -1 THEN OLD.amount_paise ELSE 0 END,
+            transaction_count = transaction_count - 1,
+            last_activity = (
+                SELECT MAX(transaction_date) FROM transactions
+                WHERE book_id = OLD.book_id
+            )
+        WHERE book_id = OLD.book_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_summary_update
+    AFTER UPDATE OF book_id, amount_paise, direction, transaction_date ON transactions
+    BEGIN
+        UPDATE book_summary SET
+            balance = balance - OLD.direction * OLD.amount_paise,
+            total_in = total_in
+                - CASE WHEN OLD.direction = 1 THEN OLD.amount_paise ELSE 0 END,
+            total_out = total_out
+                - CASE WHEN OLD.direction = -1 THEN OLD.amount_paise ELSE 0 END,
+            transaction_count = transaction_count - 1
+        WHERE book_id = OLD.book_id;
+        UPDATE book_summary SET
+            balance = balance + NEW.direction * NEW.amount_paise,
+            total_in = total_in
+                + CASE WHEN NEW.direction = 1 THEN NEW.amount_paise ELSE 0 END,
+            total_out = total_out
+                + CASE WHEN NEW.direction = -1 THEN NEW.amount_paise ELSE 0 END,
+            transaction_count = transaction_count + 1
+        WHERE book_id = NEW.book_id;
+        UPDATE book_summary SET
+            last_activity = (
+                SELECT MAX(transaction_date) FROM transactions
+                WHERE book_id = book_summary.book_id
+            )
+        WHERE book_id IN (OLD.book_id, NEW.book_id);
+    END
+    """,
+)
+
+
+def migrate_4_integer_amounts(cursor):
+    """Store amounts as exact integer paise with a separate direction"""
+    cursor.execute(
+        """
+        CREATE TABLE transactions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            amount_paise INTEGER NOT NULL CHECK (amount_paise >= 0),
+            direction INTEGER NOT NULL CHECK (direction IN (1, -1)),
+            description TEXT NOT NULL,
+            transaction_type TEXT NOT NULL,
+            payment_mode TEXT NOT NULL,
+            transaction_date TEXT NOT NULL,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+    """
+    )
+    # The old REAL amount was signed: negative meant cash out. Scaling the
+    # float in SQL would round its binary value (1.005 is stored a shade
+    # under, so ROUND gives 100 paise); database.to_paise goes through the
+    # float's shortest decimal form and rounds half up, as every write does
+    from database import to_paise  # database imports this module
+
+    cursor.connection.create_function(
+        "legacy_paise", 1, lambda amount: to_paise(abs(amount)), deterministic=True
+    )
+    cursor.execute(
+        """
+        INSERT INTO transactions_new
+            (id, book_id, amount_paise, direction, description,
+             transaction_type, payment_mode, transaction_date)
+        SELECT id, book_id, legacy_paise(amount),
+               CASE WHEN amount < 0 THEN -1 ELSE 1 END, description,
+               transaction_type, payment_mode, transaction_date
+        FROM transactions
+    """
+    )
+    _replace_table(cursor, "transactions", "transactions_new")
+
+    cursor.execute(
+        """
+        CREATE INDEX idx_transactions_book_date
+        ON transactions (book_id, transaction_date DESC, id DESC)
+    """
+    )
+    # Covering index for per-book, per-direction totals
+    cursor.execute(
+        """
+        CREATE INDEX idx_transactions_book_amount
+        ON transactions (book_id, direction, amount_paise)
+    """
+    )
+
+    # Summary totals are integer paise too
+    cursor.execute("DROP TABLE book_summary")
+    cursor.execute(
+        """
+        CREATE TABLE book_summary (
+            book_id INTEGER PRIMARY KEY REFERENCES books (id) ON DELETE CASCADE,
+            balance INTEGER NOT NULL DEFAULT 0,
+            total_in INTEGER NOT NULL DEFAULT 0,
+            total_out INTEGER NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            last_activity TEXT
+        )
+    """
+    )
+    cursor.execute(
+        """
+        INSERT INTO book_summary
+            (book_id, balance, total_in, total_out, transaction_count, last_activity)
+        SELECT
+            b.id,
+            COALESCE(SUM(t.direction * t.amount_paise), 0),
+            COALESCE(SUM(CASE WHEN t.direction = 1 THEN t.amount_paise END), 0),
+            COALESCE(SUM(CASE WHEN t.direction = -1 THEN t.amount_paise END), 0),
+            COUNT(t.id),
+            MAX(t.transaction_date)
+        FROM books b LEFT JOIN transactions t ON t.book_id = b.id
+        GROUP BY b.id
+    """
+    )
+    _create_triggers(cursor, BOOK_SUMMARY_TRIGGERS_V4)
+
+
+# book_summary triggers once dates are integer timestamps
+BOOK_SUMMARY_TRIGGERS_V5 = (
+    """
+    CREATE TRIGGER trg_transactions_summary_insert AFTER INSERT ON transactions
+    BEGIN
+        UPDATE book_summary SET
+            balance = balance + NEW.direction * NEW.amount_paise,
+            total_in = total_in
+                + CASE WHEN NEW.direction = 1 THEN NEW.amount_paise ELSE 0 END,
+            total_out = total_out
+                + CASE WHEN NEW.direction = -1 THEN NEW.amount_paise ELSE 0 END,
+            transaction_count = transaction_count + 1,
+            last_activity = CASE
+                WHEN last_activity IS NULL OR NEW.transaction_ts > last_activity
+                THEN NEW.transaction_ts ELSE last_activity END
+        WHERE book_id = NEW.book_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_summary_delete AFTER DELETE ON transactions
+    BEGIN
+        UPDATE book_summary SET
+            balance = balance - OLD.direction * OLD.amount_paise,
+            total_in = total_in
+                - CASE WHEN OLD.direction = 1 THEN OLD.amount_paise ELSE 0 END,
+            total_out = total_out
+                - CASE WHEN OLD.direction = -1 THEN OLD.amount_paise ELSE 0 END,
+            transaction_count = transaction_count - 1,
+            last_activity = (
+                SELECT MAX(transaction_ts) FROM transactions
+                WHERE book_id = OLD.book_id
+            )
+        WHERE book_id = OLD.book_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_summary_update
+    AFTER UPDATE OF book_id, amount_paise, direction, transaction_ts ON transactions
+    BEGIN
+        UPDATE book_summary SET
+            balance = balance - OLD.direction * OLD.amount_paise,
+            total_in = total_in
+                - CASE WHEN OLD.direction = 1 THEN OLD.amount_paise ELSE 0 END,
+            total_out = total_out
+                - CASE WHEN OLD.direction = -1 THEN OLD.amount_paise ELSE 0 END,
+            transaction_count = transaction_count - 1
+        WHERE book_id = OLD.book_id;
+        UPDATE book_summary SET
+            balance = balance + NEW.direction * NEW.amount_paise,
+            total_in = total_in
+                + CASE WHEN NEW.direction = 1 THEN NEW.amount_paise ELSE 0 END,
+            total_out = total_out
+                + CASE WHEN NEW.direction = -1 THEN NEW.amount_paise ELSE 0 END,
+            transaction_count = transaction_count + 1
+        WHERE book_id = NEW.book_id;
+        UPDATE book_summary SET
+            last_activity = (
+                SELECT MAX(transaction_ts) FROM transactions
+                WHERE book_id = book_summary.book_id
+            )
+        WHERE book_id IN (OLD.book_id, NEW.book_id);
+    END
+    """,
+)
+
+
+def migrate_5_integer_timestamps(cursor):
+    """Replace ISO date strings with integer wall-clock timestamps"""
+    # transaction_ts counts seconds since 1970-01-01 on the local wall clock
+    # (no timezone shift), so ts / 86400 is the local day number and
+    # ordering, ranges and grouping are integer comparisons. Dates go through
+    # database.to_timestamp, the function every later write uses, so a
+    # string with a UTC offset lands on the same timestamp whichever way it
+    # arrives. Dates it cannot read would come out NULL; those rows get
+    # timestamp 0 and their original text is kept in
+    # unparsed_transaction_dates so it can still be recovered. The table has
+    # no foreign key, so later rebuilds of transactions leave it alone.
+    from database import to_timestamp  # database imports this module
+
+    def legacy_timestamp(text):
+        try:
+            return to_timestamp(text)
+        except (TypeError, ValueError):
+            return None
+
+    cursor.connection.create_function(
+        "legacy_timestamp", 1, legacy_timestamp, deterministic=True
+    )
+    cursor.execute(
+        """
+        CREATE TABLE unparsed_transaction_dates (
+            transaction_id INTEGER PRIMARY KEY,
+            transaction_date TEXT
+        )
+    """
+    )
+    cursor.execute(
+        """
+        INSERT INTO unparsed_transaction_dates (transaction_id, transaction_date)
+        SELECT id, transaction_date FROM transactions
+        WHERE legacy_timestamp(transaction_date) IS NULL
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE transactions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            amount_paise INTEGER NOT NULL CHECK (amount_paise >= 0),
+            direction INTEGER NOT NULL CHECK (direction IN (1, -1)),
+            description TEXT NOT NULL,
+            transaction_type TEXT NOT NULL,
+            payment_mode TEXT NOT NULL,
+            transaction_ts INTEGER NOT NULL,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        )
+    """
+    )
+    cursor.execute(
+        """
+        INSERT INTO transactions_new
+            (id, book_id, amount_paise, direction, description,
+             transaction_type, payment_mode, transaction_ts)
+        SELECT id, book_id, amount_paise, direction, description,
+               transaction_type, payment_mode,
+               COALESCE(legacy_timestamp(transaction_date), 0)
+        FROM transactions
+    """
+    )
+    _replace_table(cursor, "transactions", "transactions_new")
+
+    cursor.execute(
+        """
+        CREATE INDEX idx_transactions_book_date
+        ON transactions (book_id, transaction_ts DESC, id DESC)
+    """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX idx_transactions_book_amount
+        ON transactions (book_id, direction, amount_paise)
+    """
+    )
+
+    # last_activity becomes a timestamp as well. The table is recreated
+    # rather than renamed into place because the trigger on books refers
+    # to it by name
+    cursor.execute(
+        """
+        CREATE TEMP TABLE book_summary_old AS
+        SELECT book_id, balance, total_in, total_out, transaction_count
+        FROM book_summary
+    """
+    )
+    cursor.execute("DROP TABLE book_summary")
+    cursor.execute(
+        """
+        CREATE TABLE book_summary (
+            book_id INTEGER PRIMARY KEY REFERENCES books (id) ON DELETE CASCADE,
+            balance INTEGER NOT NULL DEFAULT 0,
+            total_in INTEGER NOT NULL DEFAULT 0,
+            total_out INTEGER NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            last_activity INTEGER
+        )
+    """
+    )
+    cursor.execute(
+        """
+        INSERT INTO book_summary
+            (book_id, balance, total_in, total_out, transaction_count, last_activity)
+        SELECT s.book_id, s.balance, s.total_in, s.total_out, s.transaction_count,
+               (SELECT MAX(t.transaction_ts) FROM transactions t
+                WHERE t.book_id = s.book_id)
+        FROM book_summary_old s
+    """
+    )
+    cursor.execute("DROP TABLE book_summary_old")
+    _create_triggers(cursor, BOOK_SUMMARY_TRIGGERS_V5)
+
+
+def migrate_6_option_tables(cursor):
+    """Move categories and payment modes into tables referenced by id"""
+    # Options still used by old transactions but deleted from settings are
+    # kept as inactive rows, so history never points at a missing value
+    for table, setting_type, column in (
+        ("categories", "transaction_type", "transaction_type"),
+        ("payment_modes", "payment_mode", "payment_mode"),
+    ):
+        cursor.execute(
+            f"""
+            CREATE TABLE {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                is_active INTEGER NOT NULL DEFAULT 1
+            )
+        """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (name)
+            SELECT value FROM settings WHERE setting_type = ? ORDER BY id
+        """,
+            (setting_type,),
+        )
+        cursor.execute(
+            f"""
+            INSERT OR IGNORE INTO {table} (name, is_active)
+            SELECT DISTINCT {column}, 0 FROM transactions ORDER BY {column}
+        """
+        )
+
+    cursor.execute(
+        """
+        CREATE TABLE transactions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            amount_paise INTEGER NOT NULL CHECK (amount_paise >= 0),
+            direction INTEGER NOT NULL CHECK (direction IN (1, -1)),
+            description TEXT NOT NULL,
+            category_id INTEGER NOT NULL,
+            payment_mode_id INTEGER NOT NULL,
+            transaction_ts INTEGER NOT NULL,
+            FOREIGN KEY (book_id) REFERENCES books (id),
+            FOREIGN KEY (category_id) REFERENCES categories (id),
+            FOREIGN KEY (payment_mode_id) REFERENCES payment_modes (id)
+        )
+    """
+    )
+    cursor.execute(
+        """
+        INSERT INTO transactions_new
+            (id, book_id, amount_paise, direction, description,
+             category_id, payment_mode_id, transaction_ts)
+        SELECT t.id, t.book_id, t.amount_paise, t.direction, t.description,
+               c.id, p.id, t.transaction_ts
+        FROM transactions t
+        JOIN categories c ON c.name = t.transaction_type
+        JOIN payment_modes p ON p.name = t.payment_mode
+    """
+    )
+    _replace_table(cursor, "transactions", "transactions_new")
+    cursor.execute("DROP TABLE settings")
+
+    cursor.execute(
+        """
+        CREATE INDEX idx_transactions_book_date
+        ON transactions (book_id, transaction_ts DESC, id DESC)
+    """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX idx_transactions_book_amount
+        ON transactions (book_id, direction, amount_paise)
+    """
+    )
+    # Usage counts, merges and the foreign key checks on option deletes
+    cursor.execute(
+        "CREATE INDEX idx_transactions_category ON transactions (category_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX idx_transactions_payment_mode ON transactions (payment_mode_id)"
+    )
+    _create_triggers(cursor, BOOK_SUMMARY_TRIGGERS_V5)
+
+
+# Keep the external-content search index in step with transactions. Only a
+# description change touches the index; amount or date edits skip it.
+TRANSACTIONS_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER trg_transactions_fts_insert
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO transactions_fts (rowid, description)
+        VALUES (NEW.id, NEW.description);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_fts_delete
+    AFTER DELETE ON transactions
+    BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description)
+        VALUES ('delete', OLD.id, OLD.description);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_transactions_fts_update
+    AFTER UPDATE OF description ON transactions
+    BEGIN
+        INSERT INTO transactions_fts (transactions_fts, rowid, description)
+        VALUES ('delete', OLD.id, OLD.description);
+        INSERT INTO transactions_fts (rowid, description)
+        VALUES (NEW.id, NEW.description);
+    END
+    """,
+)
+
+
+def migrate_7_description_search(cursor):
+    """Add an FTS5 index over transaction descriptions
+
+    The index stores only tokens and reads descriptions back from
+    transactions by id, so later rebuilds of transactions must keep ids and
+    recreate these triggers.
+    """
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE transactions_fts USING fts5(
+            description,
+            content = 'transactions',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """
+    )
+    cursor.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+    _create_triggers(cursor, TRANSACTIONS_FTS_TRIGGERS)
+
+
+def _day_number(ts):
+    """SQL for the day number of a timestamp expression, rounded down
+
+    SQLite's integer division truncates toward zero, which would put a time
+    on 1969-12-31 on day 0; this floors like Python's //.
+    """
+    return f"(({ts}) - (({ts}) % 86400 + 86400) % 86400) / 86400"
+
+
+# Add a transaction to, or take it off, the rollup rows of its day and of its
+# month and category. Rows whose count drops to zero are removed so the
+# tables only hold periods with activity.
+_ROLLUP_ADD = f"""
+        INSERT INTO daily_totals (book_id, day, total_in, total_out, transaction_count)
+        VALUES (
+            NEW.book_id,
+            {_day_number('NEW.transaction_ts')},
+            CASE WHEN NEW.direction = 1 THEN NEW.amount_paise ELSE 0 END,
+            CASE WHEN NEW.direction = -1 THEN NEW.amount_paise ELSE 0 END,
+            1
+        )
+        ON CONFLICT (book_id, day) DO UPDATE SET
+            total_in = total_in + excluded.total_in,
+            total_out = total_out + excluded.total_out,
+            transaction_count = transaction_count + 1;
+        INSERT INTO monthly_category_totals
+            (book_id, month, category_id, total_in, total_out, transaction_count)
+        VALUES (
+            NEW.book_id,
+            CAST(strftime('%Y%m', NEW.transaction_ts, 'unixepoch') AS INTEGER),
+            NEW.category_id,
+            CASE WHEN NEW.direction = 1 THEN NEW.amount_paise ELSE 0 END,
+            CASE WHEN NEW.direction = -1 THEN NEW.amount_paise ELSE 0 END,
+            1
+        )
+        ON CONFLICT (book_id, month, category_id) DO UPDATE SET
+            total_in = total_in + excluded.total_in,
+            total_out = total_out + excluded.total_out,
+            transaction_count = transaction_count + 1;
+"""
+
+_ROLLUP_REMOVE = f"""
+        UPDATE daily_totals SET
+            total_in = total_in
+                - CASE WHEN OLD.direction = 1 THEN OLD.amount_paise ELSE 0 END,
+            total_out = total_out
+                - CASE WHEN OLD.direction = -1 THEN OLD.amount_paise ELSE 0 END,
+            transaction_count = transaction_count - 1
+        WHERE book_id = OLD.book_id AND day = {_day_number('OLD.transaction_ts')};
+        DELETE FROM daily_totals
+        WHERE book_id = OLD.book_id AND day = {_day_number('OLD.transaction_ts')}
+            AND transaction_count = 0;
+        UPDATE monthly_category_totals SET
+            total_in = total_in
+                - CASE WHEN OLD.direction = 1 THEN OLD.amount_paise ELSE 0 END,
+            total_out = total_out
+                - CASE WHEN OLD.direction = -1 THEN OLD.amount_paise ELSE 0 END,
+            transaction_count = transaction_count - 1
+        WHERE book_id = OLD.book_id
+            AND month = CAST(strftime('%Y%m', OLD.transaction_ts, 'unixepoch') AS INTEGER)
+            AND category_id = OLD.category_id;
+        DELETE FROM monthly_category_totals
+        WHERE book_id = OLD.book_id
+            AND month = CAST(strftime('%Y%m', OLD.transaction_ts, 'unixepoch') AS INTEGER)
+            AND category_id = OLD.category_id
+            AND transaction_count = 0;
+"""
+
+ROLLUP_TRIGGERS = (
+    f"""
+    CREATE TRIGGER trg_transactions_rollup_insert AFTER INSERT ON transactions
+    BEGIN{_ROLLUP_ADD}    END
+    """,
+    f"""
+    CREATE TRIGGER trg_transactions_rollup_delete AFTER DELETE ON transactions
+    BEGIN{_ROLLUP_REMOVE}    END
+    """,
+    f"""
+    CREATE TRIGGER trg_transactions_rollup_update
+    AFTER UPDATE OF book_id, amount_paise, direction, category_id, transaction_ts
+    ON transactions
+    BEGIN{_ROLLUP_REMOVE}{_ROLLUP_ADD}    END
+    """,
+)
+
+# Recompute both rollup tables from transactions; used by the migration and
+# by DatabaseManager.rebuild_rollups
+ROLLUP_REBUILD = (
+    "DELETE FROM daily_totals",
+    f"""
+    INSERT INTO daily_totals (book_id, day, total_in, total_out, transaction_count)
+    SELECT book_id, {_day_number('transaction_ts')},
+           SUM(CASE WHEN direction = 1 THEN amount_paise ELSE 0 END),
+           SUM(CASE WHEN direction = -1 THEN amount_paise ELSE 0 END),
+           COUNT(*)
+    FROM transactions
+    GROUP BY 1, 2
+    """,
+    "DELETE FROM monthly_category_totals",
+    """
+    INSERT INTO monthly_category_totals
+        (book_id, month, category_id, total_in, total_out, transaction_count)
+    SELECT book_id,
+           CAST(strftime('%Y%m', transaction_ts, 'unixepoch') AS INTEGER),
+           category_id,
+           SUM(CASE WHEN direction = 1 THEN amount_paise ELSE 0 END),
+           SUM(CASE WHEN direction = -1 THEN amount_paise ELSE 0 END),
+           COUNT(*)
+    FROM transactions
+    GROUP BY 1, 2, 3
+    """,
+)
+
+
+def migrate_8_period_rollups(cursor):
+    """Add per-day and per-month-and-category totals kept by triggers"""
+    # day is transaction_ts // 86400 (rounded down), the local day number;
+    # month is yyyymm
+    cursor.execute(
+        """
+        CREATE TABLE daily_totals (
+            book_id INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+            day INTEGER NOT NULL,
+            total_in INTEGER NOT NULL DEFAULT 0,
+            total_out INTEGER NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (book_id, day)
+        ) WITHOUT ROWID
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE monthly_category_totals (
+            book_id INTEGER NOT NULL REFERENCES books (id) ON DELETE CASCADE,
+            month INTEGER NOT NULL,
+            category_id INTEGER NOT NULL REFERENCES categories (id),
+            total_in INTEGER NOT NULL DEFAULT 0,
+            total_out INTEGER NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (book_id, month, category_id)
+        ) WITHOUT ROWID
+    """
+    )
+    # Category deletes check for referencing rollup rows
+    cursor.execute(
+        """
+        CREATE INDEX idx_monthly_category_totals_category
+        ON monthly_category_totals (category_id)
+    """
+    )
+    for statement in ROLLUP_REBUILD:
+        cursor.execute(statement)
+    _create_triggers(cursor, ROLLUP_TRIGGERS)
+
+
+# Whole-book deletes register the book in pending_book_deletes first. The
+# per-row summary and rollup upkeep is skipped for its transactions, since
+# those rows go with the book itself through ON DELETE CASCADE.
+BOOK_SUMMARY_DELETE_TRIGGER_V6 = """
+    CREATE TRIGGER trg_transactions_summary_delete AFTER DELETE ON transactions
+    WHEN NOT EXISTS (SELECT 1 FROM pending_book_deletes WHERE book_id = OLD.book_id)
+    BEGIN
+        UPDATE book_summary SET
+            balance = balance - OLD.direction * OLD.amount_paise,
+            total_in = total_in
+                - CASE WHEN OLD.direction = 1 THEN OLD.amount_paise ELSE 0 END,
+            total_out = total_out
+                - CASE WHEN OLD.direction = -1 THEN OLD.amount_paise ELSE 0 END,
+            transaction_count = transaction_count - 1,
+            last_activity = (
+                SELECT MAX(transaction_ts) FROM transactions
+                WHERE book_id = OLD.book_id
+            )
+        WHERE book_id = OLD.book_id;
+    END
+    """
+
+ROLLUP_DELETE_TRIGGER_V2 = f"""
+    CREATE TRIGGER trg_transactions_rollup_delete AFTER DELETE ON transactions
+    WHEN NOT EXISTS (SELECT 1 FROM pending_book_deletes WHERE book_id = OLD.book_id)
+    BEGIN{_ROLLUP_REMOVE}    END
+    """
+
+
+def migrate_9_pending_book_deletes(cursor):
+    """Let book deletes run in chunks without per-row summary upkeep"""
+    cursor.execute(
+        """
+        CREATE TABLE pending_book_deletes (
+            book_id INTEGER PRIMARY KEY REFERENCES books (id) ON DELETE CASCADE
+        )
+    """
+    )
+    _create_triggers(
+        cursor, (BOOK_SUMMARY_DELETE_TRIGGER_V6, ROLLUP_DELETE_TRIGGER_V2)
+    )
+
+
+def migrate_10_book_name_index(cursor):
+    """Index book names case-insensitively for the book list's name filter"""
+    cursor.execute("CREATE INDEX idx_books_name_nocase ON books (name COLLATE NOCASE)")
+
+
+MIGRATIONS = [
+    migrate_1_base_schema,
+    migrate_2_transaction_indexes,
+    migrate_3_book_summary,
+    migrate_4_integer_amounts,
+    migrate_5_integer_timestamps,
+    migrate_6_option_tables,
+    migrate_7_description_search,
+    migrate_8_period_rollups,
+    migrate_9_pending_book_deletes,
+    migrate_10_book_name_index,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
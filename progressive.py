@@ -0,0 +1,95 @@
+"""
+Frame-budgeted progressive rendering for long lists
+
+A ProgressiveRenderer hands a list's first screenful to the screen at once
+and converts the rest in batches, one per frame, each stopped once it has
+used up FRAME_BUDGET seconds. Long lists then appear after one screenful's
+work and the UI keeps drawing while the remainder fills in. Starting a new
+render or calling cancel() drops whatever was left of the previous one.
+"""
+
+from time import perf_counter
+
+from ui_thread import next_frame
+
+# Seconds of work per frame, leaving the rest of a 60 fps frame to drawing
+FRAME_BUDGET = 0.008
+
+
+class ProgressiveRenderer:
+    """Feeds converted items to a sink a frame's budget at a time"""
+
+    def __init__(self, schedule=None, budget=FRAME_BUDGET, clock=perf_counter):
+        # Runs a callback at the next frame; tests pass their own
+        self._schedule = schedule or next_frame
+        self.budget = budget
+        self._clock = clock
+        self._generation = 0  # Bumped by start() and cancel()
+        self._items = None
+        self._convert = None
+        self._sink = None
+        self._on_done = None
+
+    @property
+    def active(self):
+        """Whether items are still waiting to be rendered"""
+        return self._items is not None
+
+    def start(self, items, convert, sink, first_batch, on_done=None):
+        """Render items, replacing any render in progress
+
+        convert turns an item into what the list holds and sink receives
+        each batch as a list. The first first_batch items go to sink right
+        away; on_done is called once everything has been delivered.
+        """
+        self.cancel()
+        self._items = iter(items)
+        self._convert = convert
+        self._sink = sink
+        self._on_done = on_done
+
+        first = []
+        for item in self._items:
+            first.append(convert(item))
+            if len(first) >= first_batch:
+                break
+        sink(first)
+        if len(first) < first_batch:
+            self._finish()
+        else:
+            self._schedule_step()
+
+    def cancel(self):
+        """Drop the rest of the render in progress, if any"""
+        self._generation += 1
+        self._items = None
+        self._convert = self._sink = self._on_done = None
+
+    def _schedule_step(self):
+        generation = self._generation
+        self._schedule(lambda: self._step(generation))
+
+    def _step(self, generation):
+        """Convert items until the frame budget runs out, then yield"""
+        if generation != self._generation:
+            return  # Cancelled or restarted since this step was scheduled
+        deadline = self._clock() + self.budget
+        batch = []
+        exhausted = True
+        for item in self._items:
+            batch.append(self._convert(item))
+            if self._clock() >= deadline:
+                exhausted = False
+                break
+        if batch:
+            self._sink(batch)
+        if exhausted:
+            self._finish()
+        else:
+            self._schedule_step()
+
+    def _finish(self):
+        on_done = self._on_done
+        self.cancel()
+        if on_done is not None:
+            on_done()
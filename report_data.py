@@ -0,0 +1,111 @@
+"""
+Report aggregation for Cashlytics
+
+The pure functions behind the reports screen: choosing a range, reading the
+rollups for it from a snapshot, filling the gaps between periods and cutting
+the series and categories down to what the charts can show. Nothing here
+touches Kivy, so it runs on the report worker and in the tests alike.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+# Ranges are read per day up to this many days, per month beyond
+DAILY_RANGE_DAYS = 92
+
+
+def range_start(today, months):
+    """First day of the range covering the last months calendar months
+
+    The current month counts as one, so months=12 starts on the first of
+    the month eleven months back and the range holds exactly twelve whole
+    or current months. months None means all time and gives None.
+    """
+    if months is None:
+        return None
+    index = today.year * 12 + today.month - 1 - (months - 1)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def downsample(values, max_points):
+    """Sum neighbouring values so the series fits in max_points buckets"""
+    if len(values) <= max_points:
+        return values
+    bucket = -(-len(values) // max_points)  # Ceiling division
+    return [sum(values[i : i + bucket]) for i in range(0, len(values), bucket)]
+
+
+def next_period(period, granularity):
+    """First day of the period following period"""
+    if granularity == "day":
+        return period + timedelta(days=1)
+    return date(period.year + period.month // 12, period.month % 12 + 1, 1)
+
+
+def fill_periods(rows, granularity):
+    """Expand rollup rows to (period, in, out) for every period in their span
+
+    The rollups only hold periods with activity; the gaps are filled with
+    zeros so the chart's horizontal axis stays linear in time.
+    """
+    if not rows:
+        return []
+    by_period = {row.period: row for row in rows}
+    filled = []
+    period = rows[0].period
+    while period <= rows[-1].period:
+        row = by_period.get(period)
+        if row is None:
+            filled.append((period, Decimal(0), Decimal(0)))
+        else:
+            filled.append((period, row.total_in, row.total_out))
+        period = next_period(period, granularity)
+    return filled
+
+
+def fold_categories(categories, slots, label="Other categories"):
+    """Keep the slots - 1 largest (name, total) pairs and sum the rest
+
+    categories must be sorted largest first. The remainder, if any, is
+    appended under label, so at most slots pairs come back.
+    """
+    kept = categories[: slots - 1]
+    rest = sum((total for _, total in categories[len(kept) :]), Decimal(0))
+    if rest:
+        kept.append((label, rest))
+    return kept
+
+
+def load_report(db, book_id, start, end=None):
+    """Read everything the reports screen shows; runs on the report worker
+
+    The series comes from the daily or monthly rollup depending on the
+    range and the category totals from the monthly rollup, so the work is
+    proportional to the number of periods, not of transactions. Both are
+    read from one snapshot, so they agree even while edits commit. start
+    should be the first of a month (see range_start): the monthly rollup
+    only holds whole months. end defaults to today.
+    """
+    end = end or date.today()
+    if start is not None and (end - start).days <= DAILY_RANGE_DAYS:
+        granularity = "day"
+    else:
+        granularity = "month"
+    with db.snapshot() as ro:
+        rows = ro.get_period_summary(book_id, granularity, start=start, end=end)
+        by_category = ro.get_period_summary(
+            book_id, "month", start=start, end=end, group_by="category"
+        )
+    series = fill_periods(rows, granularity)
+
+    category_totals = {}
+    for row in by_category:
+        category_totals[row.category] = (
+            category_totals.get(row.category, Decimal(0)) + row.total_out
+        )
+    categories = sorted(
+        ((name, total) for name, total in category_totals.items() if total > 0),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    return series, categories
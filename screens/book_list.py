@@ -1,4 +1,10 @@
+from kivy.clock import Clock
+from kivy.metrics import dp
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.uix.screenmanager import Screen
+from kivy.utils import escape_markup
 from kivymd.uix.card import MDCard
 from kivymd.uix.button import MDRaisedButton, MDIconButton
 from kivymd.uix.label import MDLabel
@@ -9,7 +15,17 @@ from kivymd.uix.textfield import MDTextField
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.floatlayout import MDFloatLayout
 from kivymd.uix.gridlayout import MDGridLayout
-from kivymd.uix.scrollview import MDScrollView
+from decimal import Decimal
+
+from change_events import BOOK_DELETED, OPTIONS_CHANGED
+from progressive import ProgressiveRenderer
+from ui_thread import show_write_error
+
+# Height of one book card and the gap between cards
+CARD_HEIGHT = dp(136)
+CARD_SPACING = dp(10)
+# Seconds of typing pause before the name filter runs
+NAME_FILTER_DELAY = 0.2
 
 
 def format_indian_currency(amount, short_format=False):
@@ -23,11 +39,11 @@ def format_indian_currency(amount, short_format=False):
     if short_format:
         # Short format for display in cards
         if abs_amount >= 10000000:  # 1 crore
-            return f"{sign}₹{amount/10000000:.1f}Cr"
+            return f"{sign}₹{abs_amount/10000000:.1f}Cr"
         elif abs_amount >= 100000:  # 1 lakh
-            return f"{sign}₹{amount/100000:.1f}L"
+            return f"{sign}₹{abs_amount/100000:.1f}L"
         elif abs_amount >= 1000:  # 1 thousand
-            return f"{sign}₹{amount/1000:.1f}K"
+            return f"{sign}₹{abs_amount/1000:.1f}K"
         else:
             # For small amounts, still add commas
             formatted = format_indian_commas(abs_amount)
@@ -41,8 +57,8 @@ def format_indian_currency(amount, short_format=False):
 def format_indian_commas(number):
     """Add commas according to Indian numbering system"""
     # Convert to string and handle decimals
-    if isinstance(number, float):
-        if number.is_integer():
+    if isinstance(number, (float, Decimal)):
+        if number == int(number):
             num_str = str(int(number))
         else:
             num_str = f"{number:.2f}"
@@ -70,12 +86,185 @@ def format_indian_commas(number):
     return result
 
 
+def book_view_data(book):
+    """Format a BookSummary once into the data dict of a BookCardView"""
+    name = book.name
+    entries = "entry" if book.transaction_count == 1 else "entries"
+    date_text = f"Created: {book.created_date[:10]}"
+    if book.last_activity:
+        date_text += f" • Last entry: {book.last_activity[:10]}"
+    return {
+        "book_id": book.id,
+        "name": name,
+        # The label uses markup, so brackets in a name must show as typed
+        "short_name": escape_markup(
+            name if len(name) <= 20 else name[:17] + "..."
+        ),
+        # Format balance with Indian currency formatting
+        "balance_text": format_indian_currency(book.balance, short_format=True),
+        "balance_color": (
+            [0, 0.7, 0, 1] if book.balance >= 0 else [0.8, 0, 0, 1]
+        ),
+        # Totals and activity, straight from the summary
+        "stats": (
+            f"In {format_indian_currency(book.total_in, short_format=True)}"
+            f" • Out {format_indian_currency(book.total_out, short_format=True)}"
+            f" • {book.transaction_count} {entries}"
+        ),
+        "dates": date_text,
+    }
+
+
+class BookCardView(RecycleDataViewBehavior, MDCard):
+    """A book card reused by the RecycleView for whichever book it shows"""
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            size_hint_y=None,
+            height=CARD_HEIGHT,
+            padding="12dp",
+            elevation=3,
+            radius=[10],
+            md_bg_color=[0.95, 0.95, 0.95, 1],
+            **kwargs,
+        )
+        self.book_id = None
+        self.book_name = None
+        self.list_view = None
+
+        card_layout = MDBoxLayout(orientation="vertical", spacing="8dp")
+
+        # Top row with name and balance
+        top_row = MDBoxLayout(
+            orientation="horizontal", size_hint_y=None, height="30dp", spacing="5dp"
+        )
+
+        self.name_label = MDLabel(
+            font_style="Subtitle1",
+            theme_text_color="Primary",
+            halign="left",
+            valign="middle",
+            markup=True,
+        )
+
+        self.balance_label = MDLabel(
+            font_style="Subtitle1",
+            theme_text_color="Custom",
+            size_hint_x=None,
+            width="100dp",
+            halign="right",
+            valign="middle",
+            text_size=("100dp", None),
+        )
+
+        top_row.add_widget(self.name_label)
+        top_row.add_widget(self.balance_label)
+
+        # Middle rows with totals and activity
+        self.stats_label = MDLabel(
+            font_style="Caption",
+            theme_text_color="Secondary",
+            size_hint_y=None,
+            height="18dp",
+            halign="left",
+        )
+
+        self.date_label = MDLabel(
+            font_style="Caption",
+            theme_text_color="Hint",
+            size_hint_y=None,
+            height="18dp",
+            halign="left",
+        )
+
+        # Bottom row with buttons - properly aligned
+        button_layout = MDBoxLayout(
+            orientation="horizontal", size_hint_y=None, height="40dp", spacing="8dp"
+        )
+
+        open_btn = MDRaisedButton(
+            text="OPEN",
+            size_hint_x=0.65,
+            height="40dp",
+            md_bg_color=[0.2, 0.6, 1, 1],
+            font_size="12sp",
+        )
+        open_btn.bind(
+            on_release=lambda x: self.list_view.on_open(self.book_id, self.book_name)
+        )
+
+        delete_btn = MDRaisedButton(
+            text="DELETE",
+            size_hint_x=0.35,
+            height="40dp",
+            md_bg_color=[0.8, 0.2, 0.2, 1],
+            font_size="12sp",
+        )
+        delete_btn.bind(
+            on_release=lambda x: self.list_view.on_delete(self.book_id, self.book_name)
+        )
+
+        button_layout.add_widget(open_btn)
+        button_layout.add_widget(delete_btn)
+
+        card_layout.add_widget(top_row)
+        card_layout.add_widget(self.stats_label)
+        card_layout.add_widget(self.date_label)
+        card_layout.add_widget(button_layout)
+        self.add_widget(card_layout)
+
+    def refresh_view_attrs(self, rv, index, data):
+        """Show the book at index; data comes from book_view_data()"""
+        self.list_view = rv
+        self.book_id = data["book_id"]
+        self.book_name = data["name"]
+        self.name_label.text = data["short_name"]
+        self.balance_label.text = data["balance_text"]
+        self.balance_label.text_color = data["balance_color"]
+        self.stats_label.text = data["stats"]
+        self.date_label.text = data["dates"]
+
+
+class BookRecycleView(RecycleView):
+    """Virtualised book list; the screen sets on_open and on_delete"""
+
+    def __init__(self, on_open, on_delete, **kwargs):
+        super().__init__(**kwargs)
+        self.on_open = on_open
+        self.on_delete = on_delete
+        self.viewclass = BookCardView
+        self.layout = RecycleBoxLayout(
+            orientation="vertical",
+            default_size=(None, CARD_HEIGHT),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+            spacing=CARD_SPACING,
+        )
+        self.layout.bind(minimum_height=self.layout.setter("height"))
+        self.add_widget(self.layout)
+
+
 class BookListScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = "book_list"
         self.dialog = None
         self.db_manager = None
+        self.db_executor = None
+        # Book deletes run here, chunk by chunk, so the screens' calls on
+        # db_executor keep running between chunks
+        self.delete_executor = None
+        # Delivers database changes; without one the list reloads on enter
+        self.change_bus = None
+        self.delete_progress_dialog = None
+        self.books_loaded = False
+        # Fills the list a frame's budget at a time after the first screenful
+        self.renderer = ProgressiveRenderer()
+        # Name filter typed in the filter box; runs once typing pauses
+        self.name_filter = ""
+        self.name_filter_trigger = Clock.create_trigger(
+            self.apply_name_filter, NAME_FILTER_DELAY
+        )
         self.build_ui()
 
     def build_ui(self):
@@ -84,14 +273,24 @@ class BookListScreen(Screen):
             orientation="vertical", padding=[10, 10, 10, 10], spacing=15
         )
 
-        # Header with settings button only
+        # Header with reports and settings buttons
         header_layout = MDBoxLayout(
             orientation="horizontal", size_hint_y=None, height="48dp", spacing="10dp"
         )
 
-        # Spacer to push settings button to the right
+        # Spacer to push the buttons to the right
         header_layout.add_widget(MDLabel())
 
+        reports_btn = MDIconButton(
+            icon="chart-bar",
+            size_hint_x=None,
+            width="50dp",
+            theme_icon_color="Custom",
+            icon_color=[0.2, 0.6, 1, 1],
+            on_release=self.open_reports,
+        )
+        header_layout.add_widget(reports_btn)
+
         settings_btn = MDIconButton(
             icon="cog",
             size_hint_x=None,
@@ -169,13 +368,31 @@ class BookListScreen(Screen):
         )
         main_layout.add_widget(add_book_btn)
 
-        # Books scroll view
-        self.books_scroll = MDScrollView()
-        self.books_layout = MDBoxLayout(
-            orientation="vertical", adaptive_height=True, spacing="10dp"
+        # Name filter, answered by an indexed prefix query
+        self.name_filter_field = MDTextField(
+            hint_text="Filter books by name",
+            mode="rectangle",
+            size_hint_y=None,
+            height="56dp",
+        )
+        self.name_filter_field.bind(text=self.on_name_filter_text)
+        main_layout.add_widget(self.name_filter_field)
+
+        # Loading and empty-list messages, hidden while cards are shown
+        self.list_message = MDLabel(
+            text="",
+            theme_text_color="Hint",
+            halign="center",
+            size_hint_y=None,
+            height="0dp",
+        )
+        main_layout.add_widget(self.list_message)
+
+        # Only the cards on screen exist; the rest is one dict per book
+        self.books_view = BookRecycleView(
+            on_open=self.open_book, on_delete=self.confirm_delete_book
         )
-        self.books_scroll.add_widget(self.books_layout)
-        main_layout.add_widget(self.books_scroll)
+        main_layout.add_widget(self.books_view)
 
         self.add_widget(main_layout)
 
@@ -186,115 +403,124 @@ class BookListScreen(Screen):
             from database import DatabaseManager
 
             self.db_manager = DatabaseManager()
-        self.refresh_books()
+        if self.db_executor is None:
+            from db_executor import DatabaseExecutor
+
+            self.db_executor = DatabaseExecutor(self.db_manager)
+        if self.delete_executor is None:
+            from db_executor import DatabaseExecutor
+
+            self.delete_executor = DatabaseExecutor(self.db_manager)
+        # Change events keep a loaded list current
+        if self.change_bus is None or not self.books_loaded:
+            self.refresh_books()
+
+    def on_leave(self):
+        """Drop database results this screen is no longer waiting for"""
+        if self.db_executor is not None:
+            self.db_executor.cancel(self)
+        if self.renderer.active:
+            # A half-filled list is reloaded on the way back
+            self.renderer.cancel()
+            self.books_loaded = False
 
     def refresh_books(self):
-        """Refresh the books list"""
-        self.books_layout.clear_widgets()
-
-        books = self.db_manager.get_books()
-
-        if not books:
-            no_books_label = MDLabel(
-                text="No books created yet. Add your first book!",
-                theme_text_color="Hint",
-                halign="center",
-            )
-            self.books_layout.add_widget(no_books_label)
-        else:
-            for book_id, name, created_date in books:
-                balance = self.db_manager.get_balance(book_id)
-                card = self.create_book_card(book_id, name, balance, created_date)
-                self.books_layout.add_widget(card)
-
-    def create_book_card(self, book_id, name, balance, created_date):
-        """Create a card for each book"""
-        card = MDCard(
-            size_hint_y=None,
-            height="110dp",
-            padding="12dp",
-            elevation=3,
-            radius=[10],
-            md_bg_color=[0.95, 0.95, 0.95, 1],
-        )
-
-        card_layout = MDBoxLayout(orientation="vertical", spacing="8dp")
-
-        # Top row with name and balance
-        top_row = MDBoxLayout(
-            orientation="horizontal", size_hint_y=None, height="30dp", spacing="5dp"
-        )
-
-        book_name = MDLabel(
-            text=name if len(name) <= 20 else name[:17] + "...",
-            font_style="Subtitle1",
-            theme_text_color="Primary",
-            halign="left",
-            valign="middle",
-            markup=True,
-        )
-
-        # Format balance with Indian currency formatting
-        display_balance = format_indian_currency(balance, short_format=True)
-
-        balance_color = [0, 0.7, 0, 1] if balance >= 0 else [0.8, 0, 0, 1]
-        balance_label = MDLabel(
-            text=display_balance,
-            font_style="Subtitle1",
-            theme_text_color="Custom",
-            text_color=balance_color,
-            size_hint_x=None,
-            width="100dp",
-            halign="right",
-            valign="middle",
-            text_size=("100dp", None),
-        )
-
-        top_row.add_widget(book_name)
-        top_row.add_widget(balance_label)
-
-        # Middle row with date
-        date_label = MDLabel(
-            text=f"Created: {created_date[:10]}",
-            font_style="Caption",
-            theme_text_color="Hint",
-            size_hint_y=None,
-            height="18dp",
-            halign="left",
+        """Load the books matching the name filter in the background"""
+        self.renderer.cancel()
+        if not self.books_view.data:
+            self.show_list_message("Loading books...")
+        self.db_executor.cancel(self)
+        self.db_executor.submit(
+            "get_book_summaries",
+            name_prefix=self.name_filter or None,
+            on_result=self.show_books,
+            owner=self,
         )
 
-        # Bottom row with buttons - properly aligned
-        button_layout = MDBoxLayout(
-            orientation="horizontal", size_hint_y=None, height="40dp", spacing="8dp"
-        )
+    def on_name_filter_text(self, instance, value):
+        """Restart the debounce timer on every keystroke"""
+        self.name_filter_trigger.cancel()
+        if value.strip() != self.name_filter:
+            self.name_filter_trigger()
 
-        open_btn = MDRaisedButton(
-            text="OPEN",
-            size_hint_x=0.65,
-            height="40dp",
-            md_bg_color=[0.2, 0.6, 1, 1],
-            font_size="12sp",
-        )
-        open_btn.bind(on_release=lambda x: self.open_book(book_id, name))
+    def apply_name_filter(self, *args):
+        """Reload the list for the typed name prefix"""
+        self.name_filter = self.name_filter_field.text.strip()
+        self.refresh_books()
 
-        delete_btn = MDRaisedButton(
-            text="DELETE",
-            size_hint_x=0.35,
-            height="40dp",
-            md_bg_color=[0.8, 0.2, 0.2, 1],
-            font_size="12sp",
+    def show_list_message(self, text):
+        """Show a message above the list, or hide it given an empty text"""
+        self.list_message.text = text
+        self.list_message.height = "40dp" if text else "0dp"
+
+    def show_books(self, books):
+        """Show the loaded books, the first screenful at once"""
+        self.books_loaded = True
+        view = self.books_view
+        view.data = []
+        screenful = int(view.height // (CARD_HEIGHT + CARD_SPACING)) + 2
+        self.renderer.start(
+            books,
+            book_view_data,
+            lambda batch: view.data.extend(batch),
+            first_batch=screenful,
         )
-        delete_btn.bind(on_release=lambda x: self.confirm_delete_book(book_id, name))
-
-        button_layout.add_widget(open_btn)
-        button_layout.add_widget(delete_btn)
+        self.show_empty_message()
+
+    def show_empty_message(self):
+        """Explain an empty list, or hide the message when books are shown"""
+        if self.books_view.data:
+            self.show_list_message("")
+        elif self.name_filter:
+            self.show_list_message(f'No books starting with "{self.name_filter}"')
+        else:
+            self.show_list_message("No books created yet. Add your first book!")
 
-        card_layout.add_widget(top_row)
-        card_layout.add_widget(date_label)
-        card_layout.add_widget(button_layout)
-        card.add_widget(card_layout)
+    def on_database_changes(self, events):
+        """Remove, add or redraw only the cards of books a change touched"""
+        if not self.books_loaded:
+            return
+        if self.renderer.active:
+            # Books not rendered yet can't be patched; start over instead
+            self.refresh_books()
+            return
+        changed = set()
+        deleted = set()
+        for event in events:
+            if event.kind == BOOK_DELETED:
+                changed.discard(event.book_id)
+                deleted.add(event.book_id)
+            elif event.kind != OPTIONS_CHANGED:
+                changed.add(event.book_id)
+        if deleted:
+            self.books_view.data = [
+                item for item in self.books_view.data if item["book_id"] not in deleted
+            ]
+            self.show_empty_message()
+        if changed:
+            # Books outside the name filter come back empty and stay hidden
+            self.db_executor.submit(
+                "get_book_summaries",
+                changed,
+                name_prefix=self.name_filter or None,
+                on_result=self.update_book_cards,
+            )
 
-        return card
+    def update_book_cards(self, books):
+        """Replace the data of changed books; new books go on top"""
+        data = self.books_view.data
+        positions = {item["book_id"]: index for index, item in enumerate(data)}
+        new_books = []
+        for book in books:
+            index = positions.get(book.id)
+            if index is None:
+                new_books.append(book_view_data(book))
+            else:
+                data[index] = book_view_data(book)
+        if new_books:
+            # Summaries come newest first, as the list is ordered
+            data[0:0] = new_books
+        self.show_empty_message()
 
     def show_add_book_dialog(self, *args):
         """Show dialog to add new book"""
@@ -341,22 +567,31 @@ class BookListScreen(Screen):
             return
 
         if book_name:
-            book_id = self.db_manager.create_book(book_name)
-            if book_id:
+            self.db_executor.submit(
+                "create_book",
+                book_name,
+                on_result=self.on_book_created,
+                on_error=show_write_error,
+            )
+
+    def on_book_created(self, book_id):
+        """Close the add dialog, or explain why the book was not created"""
+        if book_id:
+            if self.change_bus is None:
                 self.refresh_books()
-                self.close_dialog()
-            else:
-                # Show error - book name already exists
-                error_dialog = MDDialog(
-                    title="Error",
-                    text="A book with this name already exists!",
-                    buttons=[
-                        MDRaisedButton(
-                            text="OK", on_release=lambda x: error_dialog.dismiss()
-                        )
-                    ],
-                )
-                error_dialog.open()
+            self.close_dialog()
+        else:
+            # Show error - book name already exists
+            error_dialog = MDDialog(
+                title="Error",
+                text="A book with this name already exists!",
+                buttons=[
+                    MDRaisedButton(
+                        text="OK", on_release=lambda x: error_dialog.dismiss()
+                    )
+                ],
+            )
+            error_dialog.open()
 
     def close_dialog(self, *args):
         """Close the dialog"""
@@ -388,10 +623,44 @@ class BookListScreen(Screen):
         confirm_dialog.open()
 
     def delete_book(self, book_id, dialog):
-        """Delete book from database"""
-        self.db_manager.delete_book(book_id)
-        self.refresh_books()
+        """Delete book from database, showing progress for large books"""
         dialog.dismiss()
+        self.delete_progress_dialog = MDDialog(
+            title="Deleting book",
+            text="Deleting transactions...",
+            auto_dismiss=False,
+        )
+        self.delete_progress_dialog.open()
+        self.delete_executor.submit(
+            "delete_book",
+            book_id,
+            progress=self.delete_executor.on_ui_thread(self.show_delete_progress),
+            on_result=self.on_book_deleted,
+            on_error=self.on_book_deleted,
+        )
+
+    def show_delete_progress(self, deleted, total):
+        """Update the progress dialog between deleted chunks"""
+        if self.delete_progress_dialog is not None:
+            self.delete_progress_dialog.text = (
+                f"Deleted {format_indian_commas(deleted)} of "
+                f"{format_indian_commas(total)} transactions..."
+            )
+
+    def on_book_deleted(self, result):
+        """Close the progress dialog and reload the list, reporting failures"""
+        if self.delete_progress_dialog is not None:
+            self.delete_progress_dialog.dismiss()
+            self.delete_progress_dialog = None
+        if self.change_bus is None or isinstance(result, Exception):
+            self.refresh_books()
+        if isinstance(result, Exception):
+            show_write_error(result)
+
+    def open_reports(self, *args):
+        """Open reports covering every book"""
+        self.manager.get_screen("reports").set_book(None, None, self.name)
+        self.manager.current = "reports"
 
     def open_settings(self, *args):
         """Open settings screen"""
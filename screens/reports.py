@@ -0,0 +1,374 @@
+from kivy.uix.screenmanager import Screen
+from kivy.uix.widget import Widget
+from kivy.graphics import Color, Ellipse, Line, Rectangle
+from kivy.metrics import dp
+from kivy.utils import escape_markup
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.button import MDRaisedButton
+from kivymd.uix.card import MDCard
+from kivymd.uix.label import MDLabel
+from kivymd.uix.scrollview import MDScrollView
+from kivymd.uix.toolbar import MDTopAppBar
+from datetime import date
+from decimal import Decimal
+
+from report_data import downsample, fold_categories, load_report, range_start
+from screens.book_list import format_indian_currency
+
+INCOME_COLOR = [0.2, 0.7, 0.2, 1]
+EXPENSE_COLOR = [0.8, 0.2, 0.2, 1]
+
+# Slice colours for the category breakdown, in order of size
+CATEGORY_COLORS = [
+    [0.2, 0.6, 1, 1],
+    [1, 0.6, 0.2, 1],
+    [0.6, 0.4, 0.8, 1],
+    [0.2, 0.7, 0.6, 1],
+    [0.9, 0.4, 0.6, 1],
+    [0.6, 0.6, 0.6, 1],  # "Other", everything past the largest slices
+]
+
+# Fewest pixels between two points of the time series
+MIN_POINT_SPACING = dp(3)
+TOP_CATEGORIES = 5
+# Range buttons as (calendar months, label); None is all time. Three months
+# stay within report_data.DAILY_RANGE_DAYS, so that range is charted per day
+RANGES = ((3, "LAST 3 MONTHS"), (12, "LAST 12 MONTHS"), (None, "ALL TIME"))
+
+
+class TimeSeriesChart(Widget):
+    """Income and expense lines drawn straight onto the canvas"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.totals_in = []
+        self.totals_out = []
+        self.bind(pos=self.redraw, size=self.redraw)
+
+    def set_data(self, totals_in, totals_out):
+        self.totals_in = totals_in
+        self.totals_out = totals_out
+        self.redraw()
+
+    def redraw(self, *args):
+        """Rebuild the instructions for the current size
+
+        Both series are cut down to one point per MIN_POINT_SPACING pixels,
+        so the line cost depends on the widget width, not the ledger length.
+        """
+        self.canvas.clear()
+        max_points = max(2, int(self.width / MIN_POINT_SPACING))
+        totals_in = downsample(self.totals_in, max_points)
+        totals_out = downsample(self.totals_out, max_points)
+        top = max(totals_in + totals_out + [1])
+
+        with self.canvas:
+            Color(0.85, 0.85, 0.85, 1)
+            Line(points=[self.x, self.y, self.right, self.y], width=1)
+            for color, values in (
+                (INCOME_COLOR, totals_in),
+                (EXPENSE_COLOR, totals_out),
+            ):
+                if not values:
+                    continue
+                Color(*color)
+                if len(values) == 1:
+                    # A single period has no line to draw, so mark it
+                    x = self.center_x
+                    y = self.y + values[0] / top * self.height
+                    Ellipse(pos=(x - dp(3), y - dp(3)), size=(dp(6), dp(6)))
+                    continue
+                step = self.width / (len(values) - 1)
+                points = []
+                for index, value in enumerate(values):
+                    points += [self.x + index * step, self.y + value / top * self.height]
+                Line(points=points, width=dp(1.5))
+
+
+class CategoryPieChart(Widget):
+    """Share of spending per category as pie slices"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.shares = []
+        self.bind(pos=self.redraw, size=self.redraw)
+
+    def set_data(self, shares):
+        """shares is a list of (fraction, colour) in drawing order"""
+        self.shares = shares
+        self.redraw()
+
+    def redraw(self, *args):
+        self.canvas.clear()
+        diameter = min(self.width, self.height)
+        pos = (self.center_x - diameter / 2, self.center_y - diameter / 2)
+        angle = 0
+        with self.canvas:
+            for fraction, color in self.shares:
+                Color(*color)
+                Ellipse(
+                    pos=pos,
+                    size=(diameter, diameter),
+                    angle_start=angle,
+                    angle_end=angle + fraction * 360,
+                )
+                angle += fraction * 360
+
+
+class BarMeter(Widget):
+    """A single horizontal bar filled to a fraction of its width"""
+
+    def __init__(self, fraction, color, **kwargs):
+        super().__init__(**kwargs)
+        self.fraction = fraction
+        self.color = color
+        self.bind(pos=self.redraw, size=self.redraw)
+
+    def redraw(self, *args):
+        self.canvas.clear()
+        bar_height = min(self.height, dp(12))
+        y = self.center_y - bar_height / 2
+        with self.canvas:
+            Color(0.92, 0.92, 0.92, 1)
+            Rectangle(pos=(self.x, y), size=(self.width, bar_height))
+            Color(*self.color)
+            Rectangle(pos=(self.x, y), size=(self.width * self.fraction, bar_height))
+
+
+class ReportsScreen(Screen):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.name = "reports"
+        self.db_manager = None
+        self.db_executor = None
+        self.book_id = None  # None reports on every book
+        self.return_screen = "book_list"
+        self.range_months = 12  # None for all time
+        self.build_ui()
+
+    def build_ui(self):
+        """Build the reports screen UI"""
+        main_layout = MDBoxLayout(orientation="vertical")
+
+        self.toolbar = MDTopAppBar(
+            title="Reports",
+            left_action_items=[["arrow-left", lambda x: self.go_back()]],
+        )
+        main_layout.add_widget(self.toolbar)
+
+        scroll = MDScrollView()
+        content = MDBoxLayout(
+            orientation="vertical",
+            adaptive_height=True,
+            padding="10dp",
+            spacing="15dp",
+        )
+
+        # Range selector
+        range_layout = MDBoxLayout(
+            orientation="horizontal", size_hint_y=None, height="40dp", spacing="10dp"
+        )
+        self.range_buttons = {}
+        for months, text in RANGES:
+            button = MDRaisedButton(
+                text=text, size_hint_x=1 / len(RANGES), font_size="12sp"
+            )
+            button.bind(on_release=lambda x, months=months: self.set_range(months))
+            self.range_buttons[months] = button
+            range_layout.add_widget(button)
+        content.add_widget(range_layout)
+
+        # Totals for the range
+        self.totals_label = MDLabel(
+            text="Loading...",
+            halign="center",
+            theme_text_color="Primary",
+            size_hint_y=None,
+            height="30dp",
+            markup=True,
+        )
+        content.add_widget(self.totals_label)
+
+        # Income vs expense over time
+        series_card = self.create_chart_card("Income vs Expense", "240dp")
+        self.series_chart = TimeSeriesChart()
+        series_card.add_widget(self.series_chart)
+        self.series_caption = MDLabel(
+            text="",
+            font_style="Caption",
+            theme_text_color="Secondary",
+            size_hint_y=None,
+            height="18dp",
+            halign="center",
+        )
+        series_card.add_widget(self.series_caption)
+        content.add_widget(series_card)
+
+        # Category breakdown
+        breakdown_card = self.create_chart_card("Spending by Category", "260dp")
+        breakdown_row = MDBoxLayout(orientation="horizontal", spacing="10dp")
+        self.pie_chart = CategoryPieChart(size_hint_x=0.5)
+        self.pie_legend = MDBoxLayout(orientation="vertical", size_hint_x=0.5)
+        breakdown_row.add_widget(self.pie_chart)
+        breakdown_row.add_widget(self.pie_legend)
+        breakdown_card.add_widget(breakdown_row)
+        content.add_widget(breakdown_card)
+
+        # Top categories
+        top_card = self.create_chart_card("Top Categories", "230dp")
+        self.top_layout = MDBoxLayout(orientation="vertical", spacing="4dp")
+        top_card.add_widget(self.top_layout)
+        content.add_widget(top_card)
+
+        scroll.add_widget(content)
+        main_layout.add_widget(scroll)
+        self.add_widget(main_layout)
+
+    def create_chart_card(self, title, height):
+        """Create a titled card that holds one chart"""
+        card = MDCard(
+            orientation="vertical",
+            size_hint_y=None,
+            height=height,
+            padding="12dp",
+            spacing="8dp",
+            elevation=3,
+            radius=[10],
+            md_bg_color=[1, 1, 1, 1],
+        )
+        card.add_widget(
+            MDLabel(
+                text=title,
+                font_style="Subtitle1",
+                theme_text_color="Primary",
+                size_hint_y=None,
+                height="24dp",
+            )
+        )
+        return card
+
+    def set_book(self, book_id, book_name, return_screen):
+        """Report on one book, or on every book when book_id is None"""
+        self.book_id = book_id
+        self.return_screen = return_screen
+        self.toolbar.title = f"Reports - {book_name}" if book_id else "Reports"
+
+    def on_enter(self):
+        """Load the report when entering the screen"""
+        if self.db_manager is None:
+            from database import DatabaseManager
+
+            self.db_manager = DatabaseManager()
+        if self.db_executor is None:
+            from db_executor import DatabaseExecutor
+
+            self.db_executor = DatabaseExecutor(self.db_manager)
+        self.refresh_report()
+
+    def on_leave(self):
+        """Drop database results this screen is no longer waiting for"""
+        if self.db_executor is not None:
+            self.db_executor.cancel(self)
+
+    def set_range(self, months):
+        """Switch to the last months calendar months, or all time for None"""
+        self.range_months = months
+        self.refresh_report()
+
+    def refresh_report(self):
+        """Load the report data in the background"""
+        for months, button in self.range_buttons.items():
+            button.md_bg_color = (
+                [0.2, 0.6, 1, 1] if months == self.range_months else [0.7, 0.7, 0.7, 1]
+            )
+        self.totals_label.text = "Loading..."
+        # Whole months, so the monthly category totals cover the same days
+        start = range_start(date.today(), self.range_months)
+        book_id = self.book_id
+        self.db_executor.cancel(self)
+        self.db_executor.submit(
+            lambda db: load_report(db, book_id, start),
+            on_result=self.show_report,
+            owner=self,
+        )
+
+    def show_report(self, report):
+        """Feed loaded aggregates to the charts"""
+        series, categories = report
+
+        total_in = sum((total for _, total, _ in series), Decimal(0))
+        total_out = sum((total for _, _, total in series), Decimal(0))
+        self.totals_label.text = (
+            f"[color=33b233]In {format_indian_currency(total_in, short_format=True)}[/color]"
+            f"   [color=cc3333]Out {format_indian_currency(total_out, short_format=True)}[/color]"
+            f"   Net {format_indian_currency(total_in - total_out, short_format=True)}"
+        )
+
+        self.series_chart.set_data(
+            [float(total) for _, total, _ in series],
+            [float(total) for _, _, total in series],
+        )
+        if series:
+            self.series_caption.text = f"{series[0][0]} to {series[-1][0]}"
+        else:
+            self.series_caption.text = "No transactions in this range"
+
+        self.show_breakdown(categories)
+        self.show_top_categories(categories)
+
+    def show_breakdown(self, categories):
+        """Fill the pie and its legend, folding small categories into Other"""
+        self.pie_legend.clear_widgets()
+        slices = fold_categories(categories, len(CATEGORY_COLORS))
+        grand_total = sum((total for _, total in slices), Decimal(0))
+
+        shares = []
+        for (name, total), color in zip(slices, CATEGORY_COLORS):
+            fraction = float(total / grand_total)
+            shares.append((fraction, color))
+            hex_color = "".join(f"{int(channel * 255):02x}" for channel in color[:3])
+            self.pie_legend.add_widget(
+                MDLabel(
+                    text=(
+                        f"[color={hex_color}]■[/color] "
+                        f"{escape_markup(name)} {fraction:.0%}"
+                    ),
+                    markup=True,
+                    font_style="Caption",
+                    theme_text_color="Primary",
+                )
+            )
+        self.pie_chart.set_data(shares)
+
+    def show_top_categories(self, categories):
+        """Show the biggest spending categories as bars"""
+        self.top_layout.clear_widgets()
+        top = categories[:TOP_CATEGORIES]
+        if not top:
+            self.top_layout.add_widget(
+                MDLabel(text="No spending yet", theme_text_color="Hint")
+            )
+            return
+
+        largest = top[0][1]
+        for name, total in top:
+            row = MDBoxLayout(orientation="horizontal", spacing="8dp")
+            row.add_widget(
+                MDLabel(text=name, size_hint_x=0.3, font_style="Caption")
+            )
+            row.add_widget(
+                BarMeter(float(total / largest), EXPENSE_COLOR, size_hint_x=0.45)
+            )
+            row.add_widget(
+                MDLabel(
+                    text=format_indian_currency(total, short_format=True),
+                    size_hint_x=0.25,
+                    halign="right",
+                    font_style="Caption",
+                )
+            )
+            self.top_layout.add_widget(row)
+
+    def go_back(self):
+        """Go back to the screen the report was opened from"""
+        self.manager.current = self.return_screen
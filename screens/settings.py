@@ -8,12 +8,15 @@ from kivymd.uix.card import MDCard
 from kivymd.uix.dialog import MDDialog
 from kivymd.uix.scrollview import MDScrollView
 
+from ui_thread import show_write_error
+
 
 class SettingsScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.name = "settings"
         self.db_manager = None
+        self.db_executor = None
         self.dialog = None
         self.current_setting_type = None
         self.build_ui()
@@ -140,13 +143,27 @@ class SettingsScreen(Screen):
 
             self.db_manager = DatabaseManager()
             print("WARNING: Settings screen had to create its own database manager!")
+        if self.db_executor is None:
+            from db_executor import DatabaseExecutor
+
+            self.db_executor = DatabaseExecutor(self.db_manager)
+
+        # The popup opens once the current options are loaded
+        self.db_executor.submit(
+            "get_dropdown_options",
+            setting_type,
+            on_result=lambda options: self.show_options_popup(title, options),
+            on_error=lambda error: self.show_options_popup(title, []),
+            owner=self,
+        )
 
-        # Get current options
-        try:
-            options = self.db_manager.get_dropdown_options(setting_type)
-        except Exception as e:
-            options = []
+    def on_leave(self):
+        """Drop database results this screen is no longer waiting for"""
+        if self.db_executor is not None:
+            self.db_executor.cancel(self)
 
+    def show_options_popup(self, title, options):
+        """Show the options management popup for the loaded options"""
         # Use basic Kivy Popup instead of MDDialog
         from kivy.uix.popup import Popup
         from kivy.uix.boxlayout import BoxLayout
@@ -295,30 +312,57 @@ class SettingsScreen(Screen):
         """Add new dropdown option"""
         new_option = self.new_option_field.text.strip()
         if new_option:
-            success = self.db_manager.add_dropdown_option(
-                self.current_setting_type, new_option
+            self.db_executor.submit(
+                "add_dropdown_option",
+                self.current_setting_type,
+                new_option,
+                on_result=self.on_option_added,
+                on_error=show_write_error,
             )
-            if success:
-                # Refresh the options list
-                self.refresh_options_list()
-                self.new_option_field.text = ""
-            else:
-                error_dialog = MDDialog(
-                    title="Error",
-                    text="This option already exists!",
-                    buttons=[
-                        MDRaisedButton(
-                            text="OK", on_release=lambda x: error_dialog.dismiss()
-                        )
-                    ],
-                )
-                error_dialog.open()
+
+    def on_option_added(self, success):
+        """Refresh the list, or explain why the option was not added"""
+        if success:
+            # Refresh the options list
+            self.refresh_options_list()
+            self.new_option_field.text = ""
+        else:
+            error_dialog = MDDialog(
+                title="Error",
+                text="This option already exists!",
+                buttons=[
+                    MDRaisedButton(
+                        text="OK", on_release=lambda x: error_dialog.dismiss()
+                    )
+                ],
+            )
+            error_dialog.open()
+
+    def delete_option_message(self, option, usage):
+        """Describe what deleting an option will do to existing transactions"""
+        if usage == 0:
+            return f"Are you sure you want to delete '{option}'?"
+        entries = "entry uses" if usage == 1 else "entries use"
+        return (
+            f"{usage} {entries} '{option}'. It will be removed from the "
+            "dropdown but kept on those entries."
+        )
 
     def delete_option(self, option):
         """Delete dropdown option with confirmation"""
+        self.db_executor.submit(
+            "get_option_usage",
+            self.current_setting_type,
+            option,
+            on_result=lambda usage: self.show_delete_option_dialog(option, usage),
+            owner=self,
+        )
+
+    def show_delete_option_dialog(self, option, usage):
+        """Ask for confirmation, saying how many entries use the option"""
         confirm_dialog = MDDialog(
             title="Confirm Delete",
-            text=f"Are you sure you want to delete '{option}'?",
+            text=self.delete_option_message(option, usage),
             buttons=[
                 MDRaisedButton(
                     text="CANCEL", on_release=lambda x: confirm_dialog.dismiss()
@@ -336,15 +380,31 @@ class SettingsScreen(Screen):
 
     def confirm_delete_option(self, option, dialog):
         """Confirm and delete option"""
-        self.db_manager.remove_dropdown_option(self.current_setting_type, option)
-        self.refresh_options_list()
         dialog.dismiss()
+        self.db_executor.submit(
+            "remove_dropdown_option",
+            self.current_setting_type,
+            option,
+            on_result=lambda removed: self.refresh_options_list(),
+            on_error=show_write_error,
+        )
 
     def refresh_options_list(self):
-        """Refresh the options list in dialog"""
+        """Reload the options list in dialog"""
+        self.db_executor.submit(
+            "get_dropdown_options",
+            self.current_setting_type,
+            on_result=self.show_options_list,
+            on_error=self.show_options_list,
+            owner=self,
+        )
+
+    def show_options_list(self, options):
+        """Show loaded options, or the error that stopped them loading"""
         self.options_list.clear_widgets()
         try:
-            options = self.db_manager.get_dropdown_options(self.current_setting_type)
+            if isinstance(options, Exception):
+                raise options
 
             # Add each option as a simple row
             for option in options:
@@ -426,46 +486,70 @@ Built with love using Python, Kivy & KivyMD
         """Add new option using simple popup"""
         new_option = self.new_option_field.text.strip()
         if new_option:
-            success = self.db_manager.add_dropdown_option(
-                self.current_setting_type, new_option
+            self.db_executor.submit(
+                "add_dropdown_option",
+                self.current_setting_type,
+                new_option,
+                on_result=self.on_option_added_simple,
+                on_error=show_write_error,
             )
-            if success:
-                self.refresh_options_list_simple()
-                self.new_option_field.text = ""
-            else:
-                # Simple error handling
-                from kivy.uix.popup import Popup
-                from kivy.uix.label import Label
-                from kivy.uix.button import Button
-                from kivy.uix.boxlayout import BoxLayout
 
-                layout = BoxLayout(orientation="vertical")
-                layout.add_widget(Label(text="This option already exists!"))
-                btn = Button(text="OK", size_hint_y=None, height=50)
-                layout.add_widget(btn)
+    def on_option_added_simple(self, success):
+        """Refresh the list, or explain why the option was not added"""
+        if success:
+            self.refresh_options_list_simple()
+            self.new_option_field.text = ""
+        else:
+            # Simple error handling
+            from kivy.uix.popup import Popup
+            from kivy.uix.label import Label
+            from kivy.uix.button import Button
+            from kivy.uix.boxlayout import BoxLayout
+
+            layout = BoxLayout(orientation="vertical")
+            layout.add_widget(Label(text="This option already exists!"))
+            btn = Button(text="OK", size_hint_y=None, height=50)
+            layout.add_widget(btn)
 
-                error_popup = Popup(title="Error", content=layout, size_hint=(0.6, 0.3))
-                btn.bind(on_release=error_popup.dismiss)
-                error_popup.open()
+            error_popup = Popup(title="Error", content=layout, size_hint=(0.6, 0.3))
+            btn.bind(on_release=error_popup.dismiss)
+            error_popup.open()
 
     def delete_option_simple(self, option):
         """Delete option using simple popup"""
+        self.db_executor.submit(
+            "get_option_usage",
+            self.current_setting_type,
+            option,
+            on_result=lambda usage: self.confirm_delete_option_simple(option, usage),
+            owner=self,
+        )
+
+    def confirm_delete_option_simple(self, option, usage):
+        """Ask for confirmation, saying how many entries use the option"""
         from kivy.uix.popup import Popup
         from kivy.uix.label import Label
         from kivy.uix.button import Button
         from kivy.uix.boxlayout import BoxLayout
 
         layout = BoxLayout(orientation="vertical", spacing=10)
-        layout.add_widget(Label(text=f"Delete '{option}'?"))
+        message = Label(text=self.delete_option_message(option, usage), halign="center")
+        message.bind(size=lambda instance, value: setattr(instance, "text_size", value))
+        layout.add_widget(message)
 
         btn_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=50)
         cancel_btn = Button(text="CANCEL")
         delete_btn = Button(text="DELETE", background_color=[0.8, 0.2, 0.2, 1])
 
         def do_delete(*args):
-            self.db_manager.remove_dropdown_option(self.current_setting_type, option)
-            self.refresh_options_list_simple()
             confirm_popup.dismiss()
+            self.db_executor.submit(
+                "remove_dropdown_option",
+                self.current_setting_type,
+                option,
+                on_result=lambda removed: self.refresh_options_list_simple(),
+                on_error=show_write_error,
+            )
 
         def do_cancel(*args):
             confirm_popup.dismiss()
@@ -481,10 +565,21 @@ Built with love using Python, Kivy & KivyMD
         confirm_popup.open()
 
     def refresh_options_list_simple(self):
-        """Refresh options list in simple popup"""
+        """Reload the options list in simple popup"""
+        self.db_executor.submit(
+            "get_dropdown_options",
+            self.current_setting_type,
+            on_result=self.show_options_list_simple,
+            on_error=self.show_options_list_simple,
+            owner=self,
+        )
+
+    def show_options_list_simple(self, options):
+        """Show loaded options, or the error that stopped them loading"""
         self.options_list.clear_widgets()
         try:
-            options = self.db_manager.get_dropdown_options(self.current_setting_type)
+            if isinstance(options, Exception):
+                raise options
 
             for option in options:
                 from kivy.uix.boxlayout import BoxLayout
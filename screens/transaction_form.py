@@ -9,13 +9,14 @@ from kivymd.uix.card import MDCard
 from kivymd.uix.dialog import MDDialog
 from kivymd.uix.scrollview import MDScrollView
 from kivy.metrics import dp
+from decimal import Decimal
 
 
 def format_indian_commas(number):
     """Add commas according to Indian numbering system"""
     # Convert to string and handle decimals
-    if isinstance(number, float):
-        if number.is_integer():
+    if isinstance(number, (float, Decimal)):
+        if number == int(number):
             num_str = str(int(number))
         else:
             num_str = f"{number:.2f}"
@@ -55,6 +56,9 @@ class TransactionFormScreen(Screen):
         self.current_book_id = None
         self.is_cash_in = True
         self.db_manager = None
+        self.db_executor = None
+        self.transaction_types = []
+        self.payment_modes = []
         self.type_menu = None
         self.payment_menu = None
         self.build_ui()
@@ -215,7 +219,7 @@ class TransactionFormScreen(Screen):
         content_layout.add_widget(payment_layout)
 
         # Save button
-        save_button = MDRaisedButton(
+        self.save_button = save_button = MDRaisedButton(
             text="SAVE TRANSACTION",
             size_hint_y=None,
             height="50dp",
@@ -281,6 +285,10 @@ class TransactionFormScreen(Screen):
             from database import DatabaseManager
 
             self.db_manager = DatabaseManager()
+        if self.db_executor is None:
+            from db_executor import DatabaseExecutor
+
+            self.db_executor = DatabaseExecutor(self.db_manager)
 
         # Update UI based on transaction type
         if is_cash_in:
@@ -314,11 +322,29 @@ class TransactionFormScreen(Screen):
         self.payment_button.text = "Select Payment Mode"
 
     def load_dropdown_options(self):
-        """Load dropdown options from database"""
-        self.transaction_types = self.db_manager.get_dropdown_options(
-            "transaction_type"
+        """Load dropdown options from database in the background"""
+        # The menus stay disabled until their options arrive
+        self.type_button.disabled = True
+        self.payment_button.disabled = True
+        self.db_executor.submit(
+            lambda db: (
+                db.get_dropdown_options("transaction_type"),
+                db.get_dropdown_options("payment_mode"),
+            ),
+            on_result=self.on_dropdown_options_loaded,
+            owner=self,
         )
-        self.payment_modes = self.db_manager.get_dropdown_options("payment_mode")
+
+    def on_dropdown_options_loaded(self, options):
+        """Enable the menus once their options are loaded"""
+        self.transaction_types, self.payment_modes = options
+        self.type_button.disabled = False
+        self.payment_button.disabled = False
+
+    def on_leave(self):
+        """Drop database results this screen is no longer waiting for"""
+        if self.db_executor is not None:
+            self.db_executor.cancel(self)
 
     def show_type_menu(self, button):
         """Show transaction type dropdown menu"""
@@ -380,17 +406,24 @@ class TransactionFormScreen(Screen):
         trans_type = self.type_button.text
         payment_mode = self.payment_button.text
 
-        # Save to database
-        self.db_manager.add_transaction(
+        # Save to database, with the button disabled so a second tap
+        # can't add the transaction twice
+        self.save_button.disabled = True
+        self.db_executor.submit(
+            "add_transaction",
             self.current_book_id,
             amount,
             description,
             trans_type,
             payment_mode,
             self.is_cash_in,
+            on_result=self.show_saved,
+            on_error=self.show_save_error,
         )
 
-        # Show success dialog
+    def show_saved(self, result):
+        """Confirm that the transaction was saved"""
+        self.save_button.disabled = False
         success_dialog = MDDialog(
             title="Success!",
             text="Transaction saved successfully.",
@@ -403,6 +436,18 @@ class TransactionFormScreen(Screen):
         )
         success_dialog.open()
 
+    def show_save_error(self, error):
+        """Report a transaction that could not be saved"""
+        self.save_button.disabled = False
+        error_dialog = MDDialog(
+            title="Error",
+            text=f"Could not save the transaction: {error}",
+            buttons=[
+                MDRaisedButton(text="OK", on_release=lambda x: error_dialog.dismiss())
+            ],
+        )
+        error_dialog.open()
+
     def validate_form(self):
         """Validate form data"""
         errors = []
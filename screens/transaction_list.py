@@ -1,12 +1,57 @@
+from collections import OrderedDict
+
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, Rectangle, RoundedRectangle
+from kivy.uix.behaviors import ButtonBehavior
 from kivy.uix.screenmanager import Screen
+from kivy.uix.widget import Widget
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.button import MDRaisedButton, MDIconButton
 from kivymd.uix.label import MDLabel
 from kivymd.uix.card import MDCard
-from kivymd.uix.scrollview import MDScrollView
 from kivymd.uix.toolbar import MDTopAppBar
 from kivymd.uix.dialog import MDDialog
+from kivymd.uix.textfield import MDTextField
+from kivy.clock import Clock
+from kivy.metrics import dp, sp
+from kivymd.icon_definitions import md_icons
 from datetime import datetime
+from decimal import Decimal
+
+from book_cache import VECTORISED
+from change_events import OPTIONS_CHANGED, TRANSACTIONS_ADDED, TRANSACTIONS_DELETED
+from progressive import ProgressiveRenderer
+from ui_thread import show_write_error
+
+# Transactions fetched per page; more are loaded as the list is scrolled
+PAGE_SIZE = 50
+# Height of one transaction row and the gap between rows
+ROW_HEIGHT = dp(85)
+ROW_SPACING = dp(8)
+
+# Geometry, type sizes and colours of the drawn rows, matching the
+# Subtitle1, Body2 and Caption styles and the light theme's text colours
+CARD_RADIUS = dp(8)
+AMOUNT_WIDTH = dp(100)
+RIGHT_COLUMN_WIDTH = dp(60)
+SUBTITLE_FONT_SIZE = sp(16)
+BODY_FONT_SIZE = sp(14)
+CAPTION_FONT_SIZE = sp(12)
+ICON_FONT_SIZE = sp(24)
+PRIMARY_TEXT = [0, 0, 0, 0.87]
+HINT_TEXT = [0, 0, 0, 0.38]
+EDIT_ICON_COLOR = [0.2, 0.6, 1, 1]
+
+# Rendered text textures shared by all rows, see text_texture()
+TEXTURE_CACHE_SIZE = 512
+_textures = OrderedDict()
+
+# Seconds of typing pause before a search runs, and the results shown
+SEARCH_DELAY = 0.3
+SEARCH_LIMIT = 100
 
 
 def format_indian_currency(amount, short_format=False):
@@ -20,9 +65,9 @@ def format_indian_currency(amount, short_format=False):
     if short_format:
         # Short format for display in cards
         if abs_amount >= 10000000:  # 1 crore
-            return f"{sign}₹{amount/10000000:.1f}Cr"
+            return f"{sign}₹{abs_amount/10000000:.1f}Cr"
         elif abs_amount >= 100000:  # 1 lakh
-            return f"{sign}₹{amount/100000:.1f}L"
+            return f"{sign}₹{abs_amount/100000:.1f}L"
         else:
             # For small amounts, still add commas
             formatted = format_indian_commas(abs_amount)
@@ -36,8 +81,8 @@ def format_indian_currency(amount, short_format=False):
 def format_indian_commas(number):
     """Add commas according to Indian numbering system"""
     # Convert to string and handle decimals
-    if isinstance(number, float):
-        if number.is_integer():
+    if isinstance(number, (float, Decimal)):
+        if number == int(number):
             num_str = str(int(number))
         else:
             num_str = f"{number:.2f}"
@@ -70,6 +115,198 @@ def remove_commas(text):
     return text.replace(",", "")
 
 
+def transaction_view_data(transaction):
+    """Format a transaction once into the data dict of a TransactionRowView"""
+    trans_id, amount, description, trans_type, payment_mode, trans_date = (
+        transaction[:6]
+    )
+    amount_color = [0, 0.6, 0, 1] if amount > 0 else [0.8, 0, 0, 1]
+    amount_symbol = "+" if amount > 0 else ""
+
+    # Format amount with Indian currency formatting
+    display_amount = format_indian_currency(abs(amount), short_format=True)
+    # Remove the ₹ symbol since we'll add it with the + sign
+    display_amount = display_amount[1:]  # Remove ₹
+
+    return {
+        "trans_id": trans_id,
+        "amount": amount,
+        # Newest-first order of the list, for placing patched rows
+        "sort_key": (trans_date, trans_id),
+        "amount_text": f"{amount_symbol}₹{display_amount}",
+        "amount_color": amount_color,
+        "description": (
+            description[:25] + "..." if len(description) > 25 else description
+        ),
+        "details": f"{trans_type} • {payment_mode}",
+        "date": trans_date[:16].replace("T", " "),
+        "direction": "IN" if amount > 0 else "OUT",
+    }
+
+
+def insert_position(data, sort_key):
+    """Index keeping newest-first data sorted once a row with sort_key goes in"""
+    low, high = 0, len(data)
+    while low < high:
+        middle = (low + high) // 2
+        if data[middle]["sort_key"] > sort_key:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def text_texture(text, font_size, font_name="Roboto"):
+    """Texture of text rendered in white, shared by every row showing it
+
+    Rows tint the texture with a Color instruction, so one texture serves
+    every colour. Category, payment mode and date strings repeat across
+    rows and are rendered once; the least recently used textures are
+    dropped past TEXTURE_CACHE_SIZE.
+    """
+    key = (text, font_size, font_name)
+    texture = _textures.get(key)
+    if texture is None:
+        label = CoreLabel(text=text, font_size=font_size, font_name=font_name)
+        label.refresh()
+        texture = label.texture
+        _textures[key] = texture
+        if len(_textures) > TEXTURE_CACHE_SIZE:
+            _textures.popitem(last=False)
+    else:
+        _textures.move_to_end(key)
+    return texture
+
+
+class TransactionRowView(RecycleDataViewBehavior, ButtonBehavior, Widget):
+    """A transaction card drawn straight onto the canvas
+
+    Looks like the old MDCard of nested layouts and labels, but is one
+    widget: a rounded card, six text textures from text_texture() and no
+    layout pass of its own. The RecycleView reuses it for whichever row
+    it shows; tapping the pencil column opens the edit dialog.
+    """
+
+    # Parts drawn as text, in drawing order
+    PARTS = ("amount", "description", "details", "date", "direction", "edit")
+
+    def __init__(self, **kwargs):
+        super().__init__(size_hint_y=None, height=ROW_HEIGHT, **kwargs)
+        self.trans_id = None
+        self.list_view = None
+        self._textures = dict.fromkeys(self.PARTS)
+
+        with self.canvas:
+            # Soft shadow standing in for the card elevation
+            Color(0, 0, 0, 0.12)
+            self._shadow = RoundedRectangle(radius=[CARD_RADIUS])
+            Color(1, 1, 1, 1)
+            self._card = RoundedRectangle(radius=[CARD_RADIUS])
+            self._parts = {}
+            for part in self.PARTS:
+                self._parts[part] = (Color(1, 1, 1, 1), Rectangle(size=(0, 0)))
+        self.bind(pos=self._layout, size=self._layout)
+
+    def refresh_view_attrs(self, rv, index, data):
+        """Show the row at index; data comes from transaction_view_data()"""
+        self.list_view = rv
+        self.trans_id = data["trans_id"]
+        amount_color = data["amount_color"]
+        for part, text, size, color in (
+            ("amount", data["amount_text"], SUBTITLE_FONT_SIZE, amount_color),
+            ("description", data["description"], BODY_FONT_SIZE, PRIMARY_TEXT),
+            ("details", data["details"], CAPTION_FONT_SIZE, HINT_TEXT),
+            ("date", data["date"], CAPTION_FONT_SIZE, HINT_TEXT),
+            ("direction", data["direction"], CAPTION_FONT_SIZE, amount_color),
+        ):
+            self._textures[part] = text_texture(text, size)
+            self._parts[part][0].rgba = color
+        self._textures["edit"] = text_texture(
+            md_icons["pencil"], ICON_FONT_SIZE, font_name="Icons"
+        )
+        self._parts["edit"][0].rgba = EDIT_ICON_COLOR
+        self._layout()
+
+    def _layout(self, *args):
+        """Place the card and its texts for the current position and size"""
+        self._shadow.pos = (self.x, self.y - dp(1))
+        self._shadow.size = self.size
+        self._card.pos = self.pos
+        self._card.size = self.size
+
+        padding = dp(10)
+        left = self.x + padding
+        top = self.top - padding
+        # Right-hand column with the edit icon and the IN/OUT tag
+        column_left = self.right - padding - RIGHT_COLUMN_WIDTH
+        info_width = column_left - dp(8) - left
+
+        # Amount and description row, then the details and date rows
+        row_middle = top - dp(12.5)
+        self._place("amount", left, row_middle, AMOUNT_WIDTH)
+        self._place(
+            "description", left + AMOUNT_WIDTH, row_middle, info_width - AMOUNT_WIDTH
+        )
+        details_middle = top - dp(25) - dp(2) - dp(8)
+        self._place("details", left, details_middle, info_width)
+        self._place("date", left, details_middle - dp(18), info_width)
+
+        icon_center = column_left + dp(15)
+        self._place("edit", icon_center, top - dp(20), dp(30), centered=True)
+        self._place(
+            "direction",
+            column_left + RIGHT_COLUMN_WIDTH / 2,
+            self.y + padding + dp(10),
+            RIGHT_COLUMN_WIDTH,
+            centered=True,
+        )
+
+    def _place(self, part, x, middle, max_width, centered=False):
+        """Draw a part's texture with its left edge (or centre) at x,
+        vertically centred on middle and clipped to max_width"""
+        rectangle = self._parts[part][1]
+        texture = self._textures[part]
+        if texture is None:
+            rectangle.size = (0, 0)
+            return
+        width = max(0, min(texture.width, max_width))
+        if width < texture.width:
+            texture = texture.get_region(0, 0, width, texture.height)
+        rectangle.texture = texture
+        rectangle.size = (width, texture.height)
+        left = x - width / 2 if centered else x
+        rectangle.pos = (left, middle - texture.height / 2)
+
+    def on_release(self):
+        """Open the edit dialog when the pencil column is tapped"""
+        touch = self.last_touch
+        if touch is not None and touch.x >= self.right - dp(10) - RIGHT_COLUMN_WIDTH:
+            self.edit()
+
+    def edit(self):
+        """Open the edit dialog for the shown transaction"""
+        if self.list_view is not None and self.trans_id is not None:
+            self.list_view.on_edit(self.trans_id)
+
+
+class TransactionRecycleView(RecycleView):
+    """Virtualised transaction list; on_edit(trans_id) is set by the screen"""
+
+    def __init__(self, on_edit, **kwargs):
+        super().__init__(**kwargs)
+        self.on_edit = on_edit
+        self.viewclass = TransactionRowView
+        self.layout = RecycleBoxLayout(
+            orientation="vertical",
+            default_size=(None, ROW_HEIGHT),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+            spacing=ROW_SPACING,
+        )
+        self.layout.bind(minimum_height=self.layout.setter("height"))
+        self.add_widget(self.layout)
+
+
 class TransactionListScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -77,14 +314,42 @@ class TransactionListScreen(Screen):
         self.current_book_id = None
         self.current_book_name = ""
         self.db_manager = None
+        self.db_executor = None
+        # Columnar copy of the open book used for filtering, once loaded;
+        # only opened when it filters faster than SQL (book_cache.VECTORISED)
+        self.book_cache = None
+        # Delivers database changes; without one the list reloads on enter
+        self.change_bus = None
+        self.needs_refresh = True
+        # Bumped by every reload; row fetches for patches started before it
+        # are dropped, since the reload already shows their changes
+        self.refresh_generation = 0
+        # Patch fetches submitted in this generation and not yet delivered
+        self.patches_pending = 0
+        # Balance on display, moved by deltas as rows are patched
+        self.balance = Decimal(0)
+        # Fills the list a frame's budget at a time after the first screenful
+        self.renderer = ProgressiveRenderer()
+
+        # Keyset cursor of the next page, None once everything is loaded
+        self.next_page_cursor = None
+        # Set while a page is being fetched so scrolling doesn't queue another
+        self.loading_page = False
 
         # Filter variables
         self.filter_from_date = None
         self.filter_to_date = None
-        self.filter_payment_type = "All"
-        self.filter_expense_type = "All"
+        self.filter_payment_modes = set()
+        self.filter_types = set()
+        self.filter_amount_min = None
+        self.filter_amount_max = None
+        self.filter_text = ""
         self.filter_active = False
 
+        # Description search; runs once typing pauses for SEARCH_DELAY
+        self.search_text = ""
+        self.search_trigger = Clock.create_trigger(self.run_search, SEARCH_DELAY)
+
         self.build_ui()
 
     def build_ui(self):
@@ -95,10 +360,26 @@ class TransactionListScreen(Screen):
         self.toolbar = MDTopAppBar(
             title="Cashlytics",
             left_action_items=[["arrow-left", lambda x: self.go_back()]],
-            right_action_items=[["filter", lambda x: self.show_filter_dialog()]],
+            right_action_items=[
+                ["magnify", lambda x: self.toggle_search()],
+                ["chart-bar", lambda x: self.open_reports()],
+                ["filter", lambda x: self.show_filter_dialog()],
+            ],
         )
         main_layout.add_widget(self.toolbar)
 
+        # Search field under the toolbar, hidden until the search action
+        self.search_field = MDTextField(
+            hint_text="Search descriptions",
+            mode="rectangle",
+            size_hint_y=None,
+            height="0dp",
+            opacity=0,
+            disabled=True,
+        )
+        self.search_field.bind(text=self.on_search_text)
+        main_layout.add_widget(self.search_field)
+
         # Centered Logo and Title Header (no background)
         header_layout = MDBoxLayout(
             orientation="vertical",
@@ -250,18 +531,31 @@ class TransactionListScreen(Screen):
         )
         content_layout.add_widget(self.filter_status_label)
 
-        self.transactions_scroll = MDScrollView()
-        self.transactions_layout = MDBoxLayout(
-            orientation="vertical", adaptive_height=True, spacing="8dp"
+        # Loading and empty-list messages, hidden while rows are shown
+        self.list_message = MDLabel(
+            text="",
+            theme_text_color="Hint",
+            halign="center",
+            size_hint_y=None,
+            height="0dp",
         )
-        self.transactions_scroll.add_widget(self.transactions_layout)
-        content_layout.add_widget(self.transactions_scroll)
+        content_layout.add_widget(self.list_message)
+
+        # Rows are a paged data model: one dict per loaded transaction,
+        # drawn by as many recycled cards as fit on screen
+        self.transactions_view = TransactionRecycleView(
+            on_edit=self.edit_transaction
+        )
+        self.transactions_view.bind(on_scroll_stop=self.on_transactions_scroll_stop)
+        content_layout.add_widget(self.transactions_view)
 
         main_layout.add_widget(content_layout)
         self.add_widget(main_layout)
 
     def set_current_book(self, book_id, book_name):
         """Set the current book and refresh data"""
+        if book_id != self.current_book_id:
+            self.close_book_cache()
         self.current_book_id = book_id
         self.current_book_name = book_name
         self.toolbar.title = book_name
@@ -271,168 +565,275 @@ class TransactionListScreen(Screen):
             from database import DatabaseManager
 
             self.db_manager = DatabaseManager()
+        if self.db_executor is None:
+            from db_executor import DatabaseExecutor
+
+            self.db_executor = DatabaseExecutor(self.db_manager)
 
+        # Start from an empty list so the previous book never shows
+        self.transactions_view.data = []
+        self.search_text = ""
+        self.search_field.text = ""
         self.refresh_data()
+        if VECTORISED and self.book_cache is None:
+            # Loaded after the first page so it never holds that up
+            self.db_executor.submit(
+                "open_book_cache", book_id, on_result=self.on_book_cache_loaded
+            )
+
+    def on_book_cache_loaded(self, cache):
+        """Filter in memory from now on, unless the book was closed meanwhile"""
+        if cache.book_id == self.current_book_id:
+            self.book_cache = cache
+
+    def close_book_cache(self):
+        """Evict the open book's cache so its memory is freed"""
+        self.book_cache = None
+        if self.current_book_id is not None and self.db_executor is not None:
+            self.db_executor.submit("close_book_cache", self.current_book_id)
 
     def refresh_data(self):
         """Refresh balance and transactions"""
         if self.current_book_id is None:
             return
 
+        book_id = self.current_book_id
+        fetch_page = self.page_query()
+        self.needs_refresh = False
+        self.start_loading()
+        self.db_executor.submit(
+            lambda db: (db.get_balance(book_id), fetch_page(db)),
+            on_result=self.show_data,
+            owner=self,
+        )
+
+    def show_data(self, data):
+        """Show a loaded balance and first page of transactions"""
+        balance, page = data
+        self.show_balance(balance)
+
+        # Update transactions list
+        if self.search_text:
+            self.run_search()
+        else:
+            self.show_transactions(page)
+
+    def show_balance(self, balance):
+        """Show the book balance"""
+        self.balance = balance
+
         # Update balance with proper formatting for large numbers
-        balance = self.db_manager.get_balance(self.current_book_id)
         balance_color = [0, 0.6, 0, 1] if balance >= 0 else [0.8, 0, 0, 1]
 
         # Format balance for display with Indian comma system
         display_balance = format_indian_currency(balance, short_format=True)
 
         self.balance_label.text = display_balance
-        self.balance_label.text_color = balance_color  # Update transactions list
-        self.refresh_transactions()
+        self.balance_label.text_color = balance_color
 
     def refresh_transactions(self):
         """Refresh the transactions list with applied filters"""
-        self.transactions_layout.clear_widgets()
-
-        transactions = self.db_manager.get_transactions(self.current_book_id)
-
-        # Apply filters if active
-        if self.filter_active and transactions:
-            transactions = self.apply_filters(transactions)
+        if self.search_text:
+            self.run_search()
+            return
+        self.start_loading()
+        self.db_executor.submit(
+            self.page_query(), on_result=self.show_transactions, owner=self
+        )
+
+    def start_loading(self):
+        """Drop stale fetches and show a loading message on an empty list"""
+        # Results for an earlier book or filter are no longer wanted
+        self.db_executor.cancel(self)
+        self.renderer.cancel()
+        self.refresh_generation += 1
+        self.patches_pending = 0
+        self.loading_page = True
+        if not self.transactions_view.data:
+            self.show_list_message("Loading transactions...")
+
+    def show_list_message(self, text):
+        """Show a message above the list, or hide it given an empty text"""
+        self.list_message.text = text
+        self.list_message.height = "40dp" if text else "0dp"
+
+    def show_transactions(self, page):
+        """Replace the list with a loaded first page"""
+        transactions, self.next_page_cursor, filter_result = page
+        self.loading_page = False
+
+        # Only the first page is loaded now; the rest loads on scroll
+        self.render_rows(transactions)
 
         # Update filter status
-        self.update_filter_status(len(transactions) if transactions else 0)
+        self.update_filter_status(filter_result)
 
         if not transactions:
-            no_transactions_label = MDLabel(
-                text=(
-                    "No transactions match the current filters!"
-                    if self.filter_active
-                    else "No transactions yet. Add your first transaction!"
-                ),
-                theme_text_color="Hint",
-                halign="center",
+            self.show_list_message(
+                "No transactions match the current filters!"
+                if self.filter_active
+                else "No transactions yet. Add your first transaction!"
             )
-            self.transactions_layout.add_widget(no_transactions_label)
         else:
-            for transaction in transactions:
-                card = self.create_transaction_card(transaction)
-                self.transactions_layout.add_widget(card)
-
-    def create_transaction_card(self, transaction):
-        """Create a card for each transaction"""
-        trans_id, amount, description, trans_type, payment_mode, trans_date = (
-            transaction
-        )
-
-        card = MDCard(
-            size_hint_y=None,
-            height="85dp",
-            padding="10dp",
-            elevation=2,
-            radius=[8],
-            md_bg_color=[1, 1, 1, 1],
-        )
-
-        card_layout = MDBoxLayout(orientation="horizontal", spacing="8dp")
-
-        # Left side - Transaction info
-        info_layout = MDBoxLayout(orientation="vertical", spacing="2dp")
-
-        # Amount and description row
-        amount_desc_layout = MDBoxLayout(
-            orientation="horizontal", size_hint_y=None, height="25dp"
-        )
-
-        amount_color = [0, 0.6, 0, 1] if amount > 0 else [0.8, 0, 0, 1]
-        amount_symbol = "+" if amount > 0 else ""
-
-        # Format amount with Indian currency formatting
-        display_amount = format_indian_currency(abs(amount), short_format=True)
-        # Remove the ₹ symbol since we'll add it with the + sign
-        display_amount = display_amount[1:]  # Remove ₹
+            self.show_list_message("")
+
+    def render_rows(self, transactions):
+        """Replace the rows, formatting the first screenful at once
+
+        The rest are formatted in frame-budgeted batches; a new load or
+        leaving the screen cancels whatever is left.
+        """
+        view = self.transactions_view
+        view.data = []
+        view.scroll_y = 1
+        screenful = int(view.height // (ROW_HEIGHT + ROW_SPACING)) + 2
+        self.renderer.start(
+            transactions,
+            transaction_view_data,
+            lambda batch: view.data.extend(batch),
+            first_batch=screenful,
+        )
+
+    def toggle_search(self):
+        """Show the search field, or hide it and go back to the full list"""
+        field = self.search_field
+        if field.disabled:
+            field.disabled = False
+            field.height = "56dp"
+            field.opacity = 1
+            field.focus = True
+        else:
+            field.text = ""
+            field.focus = False
+            field.disabled = True
+            field.height = "0dp"
+            field.opacity = 0
+
+    def on_search_text(self, instance, value):
+        """Restart the debounce timer on every keystroke"""
+        self.search_trigger.cancel()
+        if value.strip() != self.search_text:
+            self.search_trigger()
+
+    def run_search(self, *args):
+        """Search the current book's descriptions in the background"""
+        self.search_text = self.search_field.text.strip()
+        if not self.search_text:
+            self.refresh_transactions()
+            return
 
-        amount_label = MDLabel(
-            text=f"{amount_symbol}₹{display_amount}",
-            font_style="Subtitle1",
-            theme_text_color="Custom",
-            text_color=amount_color,
-            size_hint_x=None,
-            width="100dp",
-            halign="left",
-            valign="middle",
-            text_size=("100dp", None),
+        self.start_loading()
+        self.db_executor.submit(
+            "search_transactions",
+            self.search_text,
+            book_id=self.current_book_id,
+            limit=SEARCH_LIMIT,
+            on_result=self.show_search_results,
+            owner=self,
         )
 
-        description_label = MDLabel(
-            text=description[:25] + "..." if len(description) > 25 else description,
-            font_style="Body2",
-            theme_text_color="Primary",
-            halign="left",
-            valign="middle",
-            text_size=(None, None),
-        )
+    def show_search_results(self, results):
+        """Replace the list with search results, best matches first"""
+        self.loading_page = False
+        self.next_page_cursor = None  # Results come as one page
+        self.render_rows(results)
 
-        amount_desc_layout.add_widget(amount_label)
-        amount_desc_layout.add_widget(description_label)
+        shown = f"{len(results)}+" if len(results) == SEARCH_LIMIT else len(results)
+        self.filter_status_label.text = f'Search "{self.search_text}": {shown} matches'
+        self.filter_status_label.height = "25dp"
 
-        # Details row: Type and Payment mode
-        details_label = MDLabel(
-            text=f"{trans_type} • {payment_mode}",
-            font_style="Caption",
-            theme_text_color="Hint",
-            size_hint_y=None,
-            height="16dp",
-            halign="left",
-        )
+        self.show_list_message(
+            "" if results else "No transactions match your search!"
+        )
+
+    def page_query(self, after=None):
+        """Build the worker call fetching one page, with active filters in SQL
+
+        The filter state is captured now, on the UI thread. The call returns
+        the rows, the cursor of the following page and, when filters are
+        active, the filter result carrying the match count and totals.
+        """
+        book_id = self.current_book_id
+        if self.filter_active:
+            filters = dict(
+                date_from=self.filter_from_date,
+                date_to=self.filter_to_date,
+                payment_modes=sorted(self.filter_payment_modes),
+                types=sorted(self.filter_types),
+                amount_min=self.filter_amount_min,
+                amount_max=self.filter_amount_max,
+                text=self.filter_text or None,
+            )
 
-        # Date row
-        date_label = MDLabel(
-            text=trans_date[:16].replace("T", " "),
-            font_style="Caption",
-            theme_text_color="Hint",
-            size_hint_y=None,
-            height="16dp",
-            halign="left",
-        )
+            cache = self.book_cache
 
-        info_layout.add_widget(amount_desc_layout)
-        info_layout.add_widget(details_label)
-        info_layout.add_widget(date_label)
+            def fetch(db):
+                if cache is not None:
+                    # Kept current by the database, so no SQL round trip
+                    result = cache.query(limit=PAGE_SIZE, after=after, **filters)
+                else:
+                    result = db.get_transactions_filtered(
+                        book_id, limit=PAGE_SIZE, after=after, **filters
+                    )
+                return result.rows, result.next_cursor, result
 
-        # Right side - Edit button and type indicator
-        right_layout = MDBoxLayout(
-            orientation="vertical", size_hint_x=None, width="60dp", spacing="5dp"
-        )
+            return fetch
 
-        edit_btn = MDIconButton(
-            icon="pencil",
-            size_hint_x=None,
-            width="30dp",
-            theme_icon_color="Custom",
-            icon_color=[0.2, 0.6, 1, 1],
-            on_release=lambda x: self.edit_transaction(trans_id),
+        def fetch(db):
+            transactions, next_cursor = db.get_transactions_page(
+                book_id, PAGE_SIZE, after=after
+            )
+            return transactions, next_cursor, None
+
+        return fetch
+
+    def on_transactions_scroll_stop(self, scroll_view, *args):
+        """Load the next page when the list is scrolled near its end"""
+        if (
+            self.next_page_cursor is not None
+            and not self.loading_page
+            and not self.renderer.active
+            and scroll_view.scroll_y <= 0.05
+        ):
+            self.load_next_page()
+
+    def load_next_page(self):
+        """Fetch the next page of transactions in the background"""
+        self.loading_page = True
+        self.db_executor.submit(
+            self.page_query(after=self.next_page_cursor),
+            on_result=self.append_page,
+            owner=self,
+        )
+
+    def append_page(self, page):
+        """Append a loaded page, keeping the scroll position"""
+        transactions, self.next_page_cursor, _ = page
+        self.loading_page = False
+        if not transactions:
+            return
+        self.keep_scroll_offset()
+        self.transactions_view.data.extend(
+            transaction_view_data(transaction) for transaction in transactions
         )
 
-        type_indicator = MDLabel(
-            text="IN" if amount > 0 else "OUT",
-            font_style="Caption",
-            theme_text_color="Custom",
-            text_color=amount_color,
-            halign="center",
-            valign="middle",
-            size_hint_y=None,
-            height="20dp",
-        )
+    def keep_scroll_offset(self):
+        """Hold the distance scrolled from the top across a change in rows
 
-        right_layout.add_widget(edit_btn)
-        right_layout.add_widget(type_indicator)
+        Call before changing the number of rows; scroll_y is relative, so
+        without this the view would jump once the list height changes.
+        """
+        scroll_view = self.transactions_view
+        layout = scroll_view.layout
+        offset = (1 - scroll_view.scroll_y) * max(layout.height - scroll_view.height, 0)
 
-        card_layout.add_widget(info_layout)
-        card_layout.add_widget(right_layout)
-        card.add_widget(card_layout)
+        def restore_offset(*args):
+            layout.unbind(height=restore_offset)
+            scrollable = layout.height - scroll_view.height
+            if scrollable > 0:
+                scroll_view.scroll_y = min(1, max(0, 1 - offset / scrollable))
 
-        return card
+        layout.bind(height=restore_offset)
 
     def open_transaction_form(self, is_cash_in):
         """Open transaction form screen"""
@@ -440,14 +841,34 @@ class TransactionListScreen(Screen):
         form_screen.set_transaction_data(self.current_book_id, is_cash_in)
         self.manager.current = "transaction_form"
 
+    def open_reports(self):
+        """Open reports for the current book"""
+        reports_screen = self.manager.get_screen("reports")
+        reports_screen.set_book(self.current_book_id, self.current_book_name, self.name)
+        self.manager.current = "reports"
+
     def go_back(self):
-        """Go back to book list"""
+        """Go back to book list, closing the book"""
+        self.close_book_cache()
+        self.current_book_id = None
         self.manager.current = "book_list"
 
     def edit_transaction(self, trans_id):
         """Edit an existing transaction"""
-        # Get transaction details
-        transaction = self.db_manager.get_transaction_by_id(trans_id)
+        # Get transaction details and the dropdown options in the background
+        self.db_executor.submit(
+            lambda db: (
+                db.get_transaction_by_id(trans_id),
+                db.get_dropdown_options("transaction_type"),
+                db.get_dropdown_options("payment_mode"),
+            ),
+            on_result=self.on_edit_data_loaded,
+            owner=self,
+        )
+
+    def on_edit_data_loaded(self, data):
+        """Open the edit dialog for a loaded transaction"""
+        transaction, transaction_types, payment_modes = data
         if not transaction:
             return
 
@@ -466,6 +887,8 @@ class TransactionListScreen(Screen):
             payment_mode,
             is_cash_in,
             trans_date,
+            transaction_types,
+            payment_modes,
         )
 
     def show_edit_dialog(
@@ -477,6 +900,8 @@ class TransactionListScreen(Screen):
         payment_mode,
         is_cash_in,
         trans_date,
+        transaction_types,
+        payment_modes,
     ):
         """Show transaction edit dialog"""
         from kivy.uix.popup import Popup
@@ -560,7 +985,6 @@ class TransactionListScreen(Screen):
             orientation="horizontal", size_hint_y=None, height=50, spacing=10
         )
         type_layout.add_widget(Label(text="Type:", size_hint_x=0.3, color=[0, 0, 0, 1]))
-        transaction_types = self.db_manager.get_dropdown_options("transaction_type")
         self.edit_type_spinner = Spinner(
             text=trans_type,
             values=transaction_types,
@@ -577,7 +1001,6 @@ class TransactionListScreen(Screen):
         payment_layout.add_widget(
             Label(text="Payment:", size_hint_x=0.3, color=[0, 0, 0, 1])
         )
-        payment_modes = self.db_manager.get_dropdown_options("payment_mode")
         self.edit_payment_spinner = Spinner(
             text=payment_mode,
             values=payment_modes,
@@ -643,22 +1066,27 @@ class TransactionListScreen(Screen):
                 if new_amount <= 0 or not new_desc:
                     return
 
-                success = self.db_manager.update_transaction(
+                self.db_executor.submit(
+                    "update_transaction",
                     trans_id,
                     new_amount,
                     new_desc,
                     new_type,
                     new_payment,
                     self.edit_is_cash_in,
-                    self.edit_selected_date.isoformat(),
+                    self.edit_selected_date,
+                    on_result=on_saved,
+                    on_error=show_write_error,
                 )
-
-                if success:
-                    self.refresh_transactions()
-                    edit_popup.dismiss()
             except ValueError:
                 pass
 
+        def on_saved(success):
+            if success:
+                if self.change_bus is None:
+                    self.refresh_data()
+                edit_popup.dismiss()
+
         def delete_transaction(*args):
             # Add delete confirmation
             confirm_layout = BoxLayout(orientation="vertical", spacing=10)
@@ -670,17 +1098,19 @@ class TransactionListScreen(Screen):
             )
 
             def do_delete(*args):
-                conn = self.db_manager.db_name
-                import sqlite3
-
-                conn = sqlite3.connect(conn)
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM transactions WHERE id = ?", (trans_id,))
-                conn.commit()
-                conn.close()
-                self.refresh_transactions()
                 confirm_popup.dismiss()
                 edit_popup.dismiss()
+                # Without change events, reload balance and list ourselves
+                self.db_executor.submit(
+                    "delete_transaction",
+                    trans_id,
+                    on_result=(
+                        (lambda deleted: self.refresh_data())
+                        if self.change_bus is None
+                        else None
+                    ),
+                    on_error=show_write_error,
+                )
 
             confirm_cancel = Button(text="CANCEL")
             confirm_delete = Button(text="DELETE", background_color=[0.8, 0.2, 0.2, 1])
@@ -882,12 +1312,13 @@ class TransactionListScreen(Screen):
 
         def save_date(*args):
             try:
-                from datetime import datetime
-
                 year = int(year_spinner.text)
                 month = int(month_spinner.text)
                 day = int(day_spinner.text)
-                self.edit_selected_date = datetime(year, month, day)
+                # Keep the original time of day so ordering within the day holds
+                self.edit_selected_date = self.edit_selected_date.replace(
+                    year=year, month=month, day=day
+                )
                 self.edit_date_btn.text = self.edit_selected_date.strftime("%Y-%m-%d")
                 date_popup.dismiss()
             except ValueError:
@@ -910,49 +1341,7 @@ class TransactionListScreen(Screen):
         self.edit_selected_date = value
         self.edit_date_btn.text = value.strftime("%Y-%m-%d")
 
-    def apply_filters(self, transactions):
-        """Apply active filters to transactions list"""
-        filtered = []
-
-        for transaction in transactions:
-            trans_id, amount, description, trans_type, payment_mode, trans_date = (
-                transaction
-            )
-
-            # Parse transaction date
-            try:
-                trans_datetime = datetime.fromisoformat(
-                    trans_date.replace("Z", "+00:00")
-                )
-                trans_date_only = trans_datetime.date()
-            except:
-                continue
-
-            # Check date range filter
-            if self.filter_from_date and trans_date_only < self.filter_from_date:
-                continue
-            if self.filter_to_date and trans_date_only > self.filter_to_date:
-                continue
-
-            # Check payment type filter
-            if (
-                self.filter_payment_type != "All"
-                and payment_mode != self.filter_payment_type
-            ):
-                continue
-
-            # Check expense type filter
-            if (
-                self.filter_expense_type != "All"
-                and trans_type != self.filter_expense_type
-            ):
-                continue
-
-            filtered.append(transaction)
-
-        return filtered
-
-    def update_filter_status(self, count):
+    def update_filter_status(self, result):
         """Update filter status indicator"""
         if not self.filter_active:
             self.filter_status_label.text = ""
@@ -971,23 +1360,57 @@ class TransactionListScreen(Screen):
             elif self.filter_to_date:
                 filters.append(f"Until: {self.filter_to_date}")
 
-        if self.filter_payment_type != "All":
-            filters.append(f"Payment: {self.filter_payment_type}")
+        if self.filter_payment_modes:
+            filters.append(f"Payment: {', '.join(sorted(self.filter_payment_modes))}")
+
+        if self.filter_types:
+            filters.append(f"Type: {', '.join(sorted(self.filter_types))}")
+
+        if self.filter_amount_min is not None or self.filter_amount_max is not None:
+            low = (
+                format_indian_currency(self.filter_amount_min)
+                if self.filter_amount_min is not None
+                else "any"
+            )
+            high = (
+                format_indian_currency(self.filter_amount_max)
+                if self.filter_amount_max is not None
+                else "any"
+            )
+            filters.append(f"Amount: {low} to {high}")
 
-        if self.filter_expense_type != "All":
-            filters.append(f"Type: {self.filter_expense_type}")
+        if self.filter_text:
+            filters.append(f'Text: "{self.filter_text}"')
 
         filter_text = " • ".join(filters)
-        self.filter_status_label.text = f"Filters: {filter_text} ({count} transactions)"
+        totals = (
+            f"In {format_indian_currency(result.total_in, short_format=True)}"
+            f" • Out {format_indian_currency(result.total_out, short_format=True)}"
+        )
+        self.filter_status_label.text = (
+            f"Filters: {filter_text} ({result.count} transactions • {totals})"
+        )
         self.filter_status_label.height = "25dp"
 
     def show_filter_dialog(self):
+        """Load the filter options, then show the filter dialog"""
+        self.db_executor.submit(
+            lambda db: (
+                db.get_dropdown_options("payment_mode"),
+                db.get_dropdown_options("transaction_type"),
+            ),
+            on_result=lambda options: self.open_filter_dialog(*options),
+            owner=self,
+        )
+
+    def open_filter_dialog(self, payment_modes, transaction_types):
         """Show comprehensive filter dialog"""
         from kivy.uix.popup import Popup
         from kivy.uix.boxlayout import BoxLayout
         from kivy.uix.label import Label
         from kivy.uix.button import Button
-        from kivy.uix.spinner import Spinner
+        from kivy.uix.scrollview import ScrollView
+        from kivy.uix.textinput import TextInput
 
         # Main layout with white background
         main_layout = BoxLayout(orientation="vertical", spacing=10, padding=20)
@@ -1013,6 +1436,11 @@ class TransactionListScreen(Screen):
         )
         main_layout.add_widget(title_label)
 
+        # Scrollable form so long option lists still fit on small screens
+        form_scroll = ScrollView()
+        form_layout = BoxLayout(orientation="vertical", spacing=10, size_hint_y=None)
+        form_layout.bind(minimum_height=form_layout.setter("height"))
+
         # Date range section
         date_header = Label(
             text="Date Range",
@@ -1021,7 +1449,7 @@ class TransactionListScreen(Screen):
             color=[0.3, 0.3, 0.3, 1],
             bold=True,
         )
-        main_layout.add_widget(date_header)
+        form_layout.add_widget(date_header)
 
         # From date
         from_layout = BoxLayout(
@@ -1040,7 +1468,7 @@ class TransactionListScreen(Screen):
         )
         self.filter_from_btn.bind(on_release=lambda x: self.show_date_picker("from"))
         from_layout.add_widget(self.filter_from_btn)
-        main_layout.add_widget(from_layout)
+        form_layout.add_widget(from_layout)
 
         # To date
         to_layout = BoxLayout(
@@ -1059,9 +1487,9 @@ class TransactionListScreen(Screen):
         )
         self.filter_to_btn.bind(on_release=lambda x: self.show_date_picker("to"))
         to_layout.add_widget(self.filter_to_btn)
-        main_layout.add_widget(to_layout)
+        form_layout.add_widget(to_layout)
 
-        # Payment type section
+        # Payment mode section - any number of modes can be selected
         payment_header = Label(
             text="Payment Mode",
             size_hint_y=None,
@@ -1069,26 +1497,14 @@ class TransactionListScreen(Screen):
             color=[0.3, 0.3, 0.3, 1],
             bold=True,
         )
-        main_layout.add_widget(payment_header)
+        form_layout.add_widget(payment_header)
 
-        payment_layout = BoxLayout(
-            orientation="horizontal", size_hint_y=None, height=40, spacing=10
-        )
-        payment_layout.add_widget(
-            Label(text="Payment:", size_hint_x=0.3, color=[0, 0, 0, 1])
+        payment_grid = self.create_option_toggles(
+            payment_modes, self.filter_payment_modes
         )
-        payment_modes = ["All"] + self.db_manager.get_dropdown_options("payment_mode")
-        self.filter_payment_spinner = Spinner(
-            text=self.filter_payment_type,
-            values=payment_modes,
-            size_hint_x=0.7,
-            background_color=[1, 1, 1, 1],
-            color=[0, 0, 0, 1],
-        )
-        payment_layout.add_widget(self.filter_payment_spinner)
-        main_layout.add_widget(payment_layout)
+        form_layout.add_widget(payment_grid)
 
-        # Expense type section
+        # Transaction type section - any number of types can be selected
         expense_header = Label(
             text="Transaction Type",
             size_hint_y=None,
@@ -1096,26 +1512,70 @@ class TransactionListScreen(Screen):
             color=[0.3, 0.3, 0.3, 1],
             bold=True,
         )
-        main_layout.add_widget(expense_header)
+        form_layout.add_widget(expense_header)
+
+        type_grid = self.create_option_toggles(transaction_types, self.filter_types)
+        form_layout.add_widget(type_grid)
 
-        expense_layout = BoxLayout(
+        # Amount range section
+        amount_header = Label(
+            text="Amount Range",
+            size_hint_y=None,
+            height=25,
+            color=[0.3, 0.3, 0.3, 1],
+            bold=True,
+        )
+        form_layout.add_widget(amount_header)
+
+        amount_layout = BoxLayout(
             orientation="horizontal", size_hint_y=None, height=40, spacing=10
         )
-        expense_layout.add_widget(
-            Label(text="Type:", size_hint_x=0.3, color=[0, 0, 0, 1])
+        amount_min_field = TextInput(
+            text=(
+                format_indian_commas(self.filter_amount_min)
+                if self.filter_amount_min is not None
+                else ""
+            ),
+            hint_text="Min",
+            multiline=False,
+            background_color=[1, 1, 1, 1],
+            foreground_color=[0, 0, 0, 1],
+        )
+        amount_max_field = TextInput(
+            text=(
+                format_indian_commas(self.filter_amount_max)
+                if self.filter_amount_max is not None
+                else ""
+            ),
+            hint_text="Max",
+            multiline=False,
+            background_color=[1, 1, 1, 1],
+            foreground_color=[0, 0, 0, 1],
+        )
+        amount_layout.add_widget(amount_min_field)
+        amount_layout.add_widget(amount_max_field)
+        form_layout.add_widget(amount_layout)
+
+        # Description text section
+        text_layout = BoxLayout(
+            orientation="horizontal", size_hint_y=None, height=40, spacing=10
         )
-        expense_types = ["All"] + self.db_manager.get_dropdown_options(
-            "transaction_type"
+        text_layout.add_widget(
+            Label(text="Contains:", size_hint_x=0.3, color=[0, 0, 0, 1])
         )
-        self.filter_expense_spinner = Spinner(
-            text=self.filter_expense_type,
-            values=expense_types,
+        text_field = TextInput(
+            text=self.filter_text,
+            hint_text="Description text",
+            multiline=False,
             size_hint_x=0.7,
             background_color=[1, 1, 1, 1],
-            color=[0, 0, 0, 1],
+            foreground_color=[0, 0, 0, 1],
         )
-        expense_layout.add_widget(self.filter_expense_spinner)
-        main_layout.add_widget(expense_layout)
+        text_layout.add_widget(text_field)
+        form_layout.add_widget(text_layout)
+
+        form_scroll.add_widget(form_layout)
+        main_layout.add_widget(form_scroll)
 
         # Buttons
         button_layout = BoxLayout(
@@ -1131,25 +1591,40 @@ class TransactionListScreen(Screen):
             text="CANCEL", background_color=[0.8, 0.2, 0.2, 1], color=[1, 1, 1, 1]
         )
 
+        def parse_amount(text):
+            try:
+                return float(remove_commas(text.strip())) if text.strip() else None
+            except ValueError:
+                return None
+
         def clear_filters(*args):
             self.filter_from_date = None
             self.filter_to_date = None
-            self.filter_payment_type = "All"
-            self.filter_expense_type = "All"
+            self.filter_payment_modes = set()
+            self.filter_types = set()
+            self.filter_amount_min = None
+            self.filter_amount_max = None
+            self.filter_text = ""
             self.filter_active = False
             self.refresh_transactions()
             filter_popup.dismiss()
 
         def apply_filters(*args):
-            self.filter_payment_type = self.filter_payment_spinner.text
-            self.filter_expense_type = self.filter_expense_spinner.text
+            self.filter_payment_modes = self.get_selected_toggles(payment_grid)
+            self.filter_types = self.get_selected_toggles(type_grid)
+            self.filter_amount_min = parse_amount(amount_min_field.text)
+            self.filter_amount_max = parse_amount(amount_max_field.text)
+            self.filter_text = text_field.text.strip()
 
             # Check if any filters are actually set
             has_filters = (
                 self.filter_from_date is not None
                 or self.filter_to_date is not None
-                or self.filter_payment_type != "All"
-                or self.filter_expense_type != "All"
+                or bool(self.filter_payment_modes)
+                or bool(self.filter_types)
+                or self.filter_amount_min is not None
+                or self.filter_amount_max is not None
+                or bool(self.filter_text)
             )
 
             self.filter_active = has_filters
@@ -1166,10 +1641,48 @@ class TransactionListScreen(Screen):
         main_layout.add_widget(button_layout)
 
         filter_popup = Popup(
-            title="", content=main_layout, size_hint=(0.9, 0.8), auto_dismiss=False
+            title="", content=main_layout, size_hint=(0.9, 0.9), auto_dismiss=False
         )
         filter_popup.open()
 
+    def create_option_toggles(self, options, selected):
+        """Create a grid of toggle buttons for multi-selecting filter options"""
+        from kivy.uix.gridlayout import GridLayout
+        from kivy.uix.togglebutton import ToggleButton
+
+        grid = GridLayout(
+            cols=3,
+            spacing=5,
+            size_hint_y=None,
+            row_default_height=36,
+            row_force_default=True,
+        )
+        grid.bind(minimum_height=grid.setter("height"))
+
+        def update_toggle_color(toggle, state):
+            selected_state = state == "down"
+            toggle.background_color = (
+                [0.2, 0.6, 1, 1] if selected_state else [0.9, 0.9, 0.9, 1]
+            )
+            toggle.color = [1, 1, 1, 1] if selected_state else [0, 0, 0, 1]
+
+        for option in options:
+            toggle = ToggleButton(
+                text=option,
+                state="down" if option in selected else "normal",
+                font_size="12sp",
+                shorten=True,
+            )
+            update_toggle_color(toggle, toggle.state)
+            toggle.bind(state=update_toggle_color)
+            grid.add_widget(toggle)
+
+        return grid
+
+    def get_selected_toggles(self, grid):
+        """Get the option values currently toggled on in a grid"""
+        return {toggle.text for toggle in grid.children if toggle.state == "down"}
+
     def show_date_picker(self, date_type):
         """Show date picker for filter dates"""
         from kivy.uix.popup import Popup
@@ -1314,6 +1827,135 @@ class TransactionListScreen(Screen):
         date_popup.open()
 
     def on_enter(self):
-        """Refresh data when entering screen"""
-        if self.current_book_id is not None:
+        """Refresh data when entering screen, if anything changed"""
+        if self.current_book_id is not None and (
+            self.change_bus is None or self.needs_refresh
+        ):
             self.refresh_data()
+
+    def on_database_changes(self, events):
+        """Patch the rows a change touched, or reload when patching can't do
+
+        Filtered and searched lists, option changes and changes bigger than
+        a page are reloaded; plain adds, edits and deletes on the open book
+        are patched into the list in place.
+        """
+        events = [
+            event
+            for event in events
+            if event.book_id == self.current_book_id or event.kind == OPTIONS_CHANGED
+        ]
+        if self.current_book_id is None or not events:
+            return
+        if (
+            self.filter_active
+            or self.search_text
+            or self.renderer.active
+            or any(event.kind == OPTIONS_CHANGED for event in events)
+            or sum(len(event.ids) for event in events) > PAGE_SIZE
+        ):
+            if self.manager is not None and self.manager.current == self.name:
+                self.refresh_data()
+            else:
+                self.needs_refresh = True
+            return
+        self.patch_rows(events)
+
+    def patch_rows(self, events):
+        """Drop deleted and edited rows, then fetch the edited and added ones"""
+        removed = set()
+        fetched = []
+        for event in events:
+            if event.kind != TRANSACTIONS_ADDED:
+                removed.update(event.ids)
+            if event.kind != TRANSACTIONS_DELETED:
+                fetched.extend(event.ids)
+
+        data = self.transactions_view.data
+        delta = Decimal(0)
+        # Amounts of rows not loaded yet are unknown; the balance is then
+        # read back instead of moved by a delta
+        delta_known = True
+        loaded = {item["trans_id"]: item for item in data}
+        for trans_id in removed:
+            item = loaded.get(trans_id)
+            if item is None:
+                delta_known = False
+            else:
+                delta -= item["amount"]
+        if removed & loaded.keys():
+            kept = [item for item in data if item["trans_id"] not in removed]
+            if len(kept) != len(data):
+                self.keep_scroll_offset()
+            self.transactions_view.data = kept
+
+        if not fetched:
+            self.finish_patch(delta, delta_known)
+            return
+        book_id = self.current_book_id
+        generation = self.refresh_generation
+        self.patches_pending += 1
+        self.db_executor.submit(
+            "get_transactions_by_ids",
+            tuple(fetched),
+            on_result=lambda rows: self.insert_rows(
+                book_id, generation, rows, delta, delta_known
+            ),
+            owner=self,
+        )
+
+    def insert_rows(self, book_id, generation, rows, delta, delta_known):
+        """Place fetched rows at their position among the loaded ones"""
+        if book_id != self.current_book_id or generation != self.refresh_generation:
+            return
+        self.patches_pending -= 1
+        data = self.transactions_view.data
+        loaded = {item["trans_id"] for item in data}
+        scroll_kept = False
+        for row in rows:
+            if row.id in loaded:
+                # A page loaded since the change already holds the row;
+                # whether the balance counts it is unknown, so re-read it
+                delta_known = False
+                continue
+            delta += row.amount
+            item = transaction_view_data(row)
+            position = insert_position(data, item["sort_key"])
+            # A row past the loaded pages arrives with its page later
+            if position == len(data) and self.next_page_cursor is not None:
+                continue
+            if not scroll_kept:
+                self.keep_scroll_offset()
+                scroll_kept = True
+            data.insert(position, item)
+        self.finish_patch(delta, delta_known)
+
+    def finish_patch(self, delta, delta_known):
+        """Move the balance by delta and refresh the empty-list message"""
+        if delta_known:
+            self.show_balance(self.balance + delta)
+        else:
+            self.db_executor.submit(
+                "get_balance", self.current_book_id, on_result=self.show_balance
+            )
+        if self.transactions_view.data:
+            self.show_list_message("")
+        elif self.next_page_cursor is None:
+            self.show_list_message(
+                "No transactions yet. Add your first transaction!"
+            )
+
+    def on_leave(self):
+        """Drop database results this screen is no longer waiting for"""
+        if self.db_executor is not None:
+            self.db_executor.cancel(self)
+        self.loading_page = False
+        if self.patches_pending:
+            # Their fetches were just cancelled, so reload on the way back
+            self.refresh_generation += 1
+            self.patches_pending = 0
+            self.needs_refresh = True
+        if self.renderer.active:
+            # A half-filled list is reloaded on the way back
+            self.renderer.cancel()
+            self.needs_refresh = True
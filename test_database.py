@@ -3,14 +3,55 @@
 Test script to verify database functionality
 """
 
-from database import DatabaseManager
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import date, datetime
+
+from decimal import Decimal
+
+from change_events import (
+    BOOK_CREATED,
+    BOOK_DELETED,
+    OPTIONS_CHANGED,
+    TRANSACTIONS_ADDED,
+    TRANSACTIONS_DELETED,
+    TRANSACTIONS_UPDATED,
+    ChangeBus,
+    ChangeEvent,
+    coalesce,
+)
+from database import (
+    TRANSACTION_COLUMNS,
+    TRANSACTION_SOURCE,
+    DatabaseManager,
+    from_timestamp,
+    to_timestamp,
+)
+from db_executor import DatabaseExecutor
+from migrations import SCHEMA_VERSION
+from progressive import ProgressiveRenderer
+from report_data import (
+    DAILY_RANGE_DAYS,
+    downsample,
+    fold_categories,
+    load_report,
+    range_start,
+)
+
+
+def make_test_db():
+    """Create a DatabaseManager backed by a throwaway database file"""
+    db_dir = tempfile.mkdtemp()
+    return DatabaseManager(os.path.join(db_dir, "test_tracker.db"))
 
 
 def test_database():
     print("Testing database functionality...")
 
     # Initialize database
-    db = DatabaseManager()
+    db = make_test_db()
     print("✓ Database initialized")
 
     # Test creating a book
@@ -48,8 +89,1232 @@ def test_database():
     payment_modes = db.get_dropdown_options("payment_mode")
     print(f"✓ Payment modes: {payment_modes}")
 
+    db.close()
     print("\n🎉 All database tests passed!")
 
 
+def test_connection_lifecycle():
+    print("Testing connection lifecycle...")
+
+    with make_test_db() as db:
+        journal_mode = db.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert journal_mode == "wal"
+        assert db.conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        print(f"✓ Connection tuned (journal_mode={journal_mode})")
+
+        # The same connection is reused across calls
+        conn = db.conn
+        db.create_book("Lifecycle Book")
+        db.get_books()
+        assert db.conn is conn
+        print("✓ Connection reused across calls")
+
+        # Duplicate names roll back cleanly without holding the write lock
+        assert db.create_book("Lifecycle Book") is None
+        assert db.create_book("Another Book") is not None
+        print("✓ Failed write rolled back")
+
+    assert db._conn is None
+    print("✓ Connection closed on exit")
+
+
+def test_schema_migrations():
+    print("Testing schema migrations...")
+
+    # Build a database the way older releases did: no UNIQUE on settings
+    db_path = os.path.join(tempfile.mkdtemp(), "legacy_tracker.db")
+    legacy = sqlite3.connect(db_path)
+    legacy.executescript(
+        """
+        CREATE TABLE books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            created_date TEXT NOT NULL
+        );
+        CREATE TABLE transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT NOT NULL,
+            transaction_type TEXT NOT NULL,
+            payment_mode TEXT NOT NULL,
+            transaction_date TEXT NOT NULL,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        );
+        CREATE TABLE settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            setting_type TEXT NOT NULL,
+            value TEXT NOT NULL
+        );
+        INSERT INTO settings (setting_type, value) VALUES
+            ('payment_mode', 'Cash'), ('payment_mode', 'Cash'), ('payment_mode', 'UPI');
+        INSERT INTO books (id, name, created_date) VALUES
+            (1, 'Old Book', '2025-01-01T10:00:00');
+        INSERT INTO transactions
+            (book_id, amount, description, transaction_type, payment_mode, transaction_date)
+        VALUES
+            (1, 1000.1, 'Salary', 'Other', 'UPI', '2025-01-02T10:00:00'),
+            (1, -0.29, 'Stamp', 'Other', 'Cash', '2025-01-03T10:00:00'),
+            (1, -0.58, 'Stamps', 'Other', 'Cash', '2025-01-04T10:00:00');
+        DELETE FROM transactions WHERE id = 3;
+        INSERT INTO transactions
+            (book_id, amount, description, transaction_type, payment_mode, transaction_date)
+        VALUES (1, -0.58, 'Stamps', 'Other', 'Cash', '2025-01-04T10:00:00');
+        """
+    )
+    legacy.close()
+
+    db = DatabaseManager(db_path)
+    version = db.conn.execute("PRAGMA user_version").fetchone()[0]
+    assert version == SCHEMA_VERSION
+    assert db.get_dropdown_options("payment_mode") == ["Cash", "UPI"]
+    assert not db.add_dropdown_option("payment_mode", "UPI")
+    assert db.get_balance(1) == Decimal("999.23")
+    assert [row[1] for row in db.get_transactions(1)] == [
+        Decimal("-0.58"),
+        Decimal("-0.29"),
+        Decimal("1000.10"),
+    ]
+    # Ids of rows deleted before the upgrade are never reused
+    db.add_transaction(1, 1, "New", "Other", "Cash", True)
+    assert db.get_transactions(1)[0][0] == 5
+    print(f"✓ Legacy database migrated to version {version}")
+    db.close()
+
+    # Reopening a current database must not run any DDL
+    db = DatabaseManager(db_path)
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    db.init_database()
+    db.conn.set_trace_callback(None)
+    assert statements == ["PRAGMA user_version"]
+    print("✓ Current schema skips migrations")
+    db.close()
+
+
+def test_legacy_edge_cases():
+    print("Testing legacy dates and amounts that need care...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), "legacy_dates.db")
+    legacy = sqlite3.connect(db_path)
+    legacy.executescript(
+        """
+        CREATE TABLE books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            created_date TEXT NOT NULL
+        );
+        CREATE TABLE transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT NOT NULL,
+            transaction_type TEXT NOT NULL,
+            payment_mode TEXT NOT NULL,
+            transaction_date TEXT NOT NULL,
+            FOREIGN KEY (book_id) REFERENCES books (id)
+        );
+        INSERT INTO books (id, name, created_date) VALUES
+            (1, 'Old Book', '2025-01-01T10:00:00');
+        INSERT INTO transactions
+            (book_id, amount, description, transaction_type, payment_mode, transaction_date)
+        VALUES
+            (1, 10, 'Good', 'Other', 'Cash', '2025-01-02T10:00:00'),
+            (1, -5, 'Typed by hand', 'Other', 'Cash', '02/01/2025'),
+            (1, -2, 'Out of range', 'Other', 'Cash', '2025-13-45'),
+            (1, 1, 'With offset', 'Other', 'Cash', '2025-01-02T10:00:00.75+05:30'),
+            (1, -1.005, 'Half paisa', 'Other', 'Cash', '2025-01-03T10:00:00');
+        """
+    )
+    legacy.close()
+
+    with DatabaseManager(db_path) as db:
+        dates = {row[2]: row[5] for row in db.get_transactions(1)}
+        assert dates["Good"] == "2025-01-02T10:00:00"
+        # Offsets follow the same rule as writes through to_timestamp
+        offset = "2025-01-02T10:00:00.75+05:30"
+        assert dates["With offset"] == from_timestamp(to_timestamp(offset)).isoformat()
+        db.update_transaction(4, 1, "With offset", "Other", "Cash", True, offset)
+        assert {row[2]: row[5] for row in db.get_transactions(1)}["With offset"] == (
+            dates["With offset"]
+        )
+        assert db.conn.execute(
+            "SELECT transaction_id, transaction_date FROM unparsed_transaction_dates"
+            " ORDER BY transaction_id"
+        ).fetchall() == [(2, "02/01/2025"), (3, "2025-13-45")]
+        # 1.005 is a shade under in binary; it still rounds half up
+        amounts = {row[2]: row[1] for row in db.get_transactions(1)}
+        assert amounts["Half paisa"] == Decimal("-1.01")
+        assert db.get_balance(1) == Decimal("2.99")
+    print("✓ Unparseable dates kept, offsets and half paise converted as on write")
+
+
+def query_plan(db, sql, params=()):
+    """Return the EXPLAIN QUERY PLAN details of a statement as one string"""
+    rows = db.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_query_plans_use_indexes():
+    print("Testing query plans...")
+
+    with make_test_db() as db:
+        plan = query_plan(
+            db,
+            f"""
+            SELECT {TRANSACTION_COLUMNS}
+            FROM {TRANSACTION_SOURCE} WHERE t.book_id = ?
+            ORDER BY t.transaction_ts DESC, t.id DESC
+            """,
+            (1,),
+        )
+        assert "idx_transactions_book_date" in plan and "TEMP B-TREE" not in plan
+        print(f"✓ get_transactions: {plan}")
+
+        plan = query_plan(
+            db,
+            "SELECT SUM(amount_paise) FROM transactions WHERE book_id = ? AND direction = ?",
+            (1, -1),
+        )
+        assert "COVERING INDEX idx_transactions_book_amount" in plan
+        print(f"✓ per-book SUM: {plan}")
+
+        plan = query_plan(db, "DELETE FROM transactions WHERE book_id = ?", (1,))
+        assert "USING" in plan and "INDEX" in plan
+        print(f"✓ delete_book: {plan}")
+
+        plan = query_plan(
+            db,
+            "SELECT COUNT(*) FROM transactions WHERE category_id = ?",
+            (1,),
+        )
+        assert "COVERING INDEX idx_transactions_category" in plan
+        print(f"✓ get_option_usage: {plan}")
+
+        plan = query_plan(
+            db,
+            "SELECT id FROM books WHERE name >= ? COLLATE NOCASE "
+            "AND name < ? COLLATE NOCASE",
+            ("ab", "ac"),
+        )
+        assert "idx_books_name_nocase" in plan
+        print(f"✓ book name filter: {plan}")
+
+
+def test_dropdown_options():
+    print("Testing dropdown options...")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Options")
+        db.add_transaction(book_id, 100.0, "Lunch", "Food", "Cash", False)
+        db.add_transaction(book_id, 50.0, "Snacks", "Snacks", "Cash", False)
+
+        # A value typed outside the dropdown is kept but not offered
+        assert "Snacks" not in db.get_dropdown_options("transaction_type")
+        assert db.get_transactions(book_id)[0][3] == "Snacks"
+        print("✓ Unknown values stored as hidden options")
+
+        assert db.add_dropdown_option("payment_mode", "Wallet")
+        assert not db.add_dropdown_option("payment_mode", "Wallet")
+        assert db.get_dropdown_options("payment_mode")[-1] == "Wallet"
+        assert db.remove_dropdown_option("payment_mode", "Wallet")
+        assert "Wallet" not in db.get_dropdown_options("payment_mode")
+        print("✓ Unused option added and deleted")
+
+        # Removing an option in use hides it without touching transactions
+        assert db.get_option_usage("transaction_type", "Food") == 1
+        assert db.remove_dropdown_option("transaction_type", "Food")
+        assert "Food" not in db.get_dropdown_options("transaction_type")
+        assert db.get_transactions(book_id)[1][3] == "Food"
+        assert db.add_dropdown_option("transaction_type", "Food")
+        assert "Food" in db.get_dropdown_options("transaction_type")
+        print("✓ In-use option hidden and restored")
+
+        assert db.rename_dropdown_option("transaction_type", "Food", "Meals")
+        assert not db.rename_dropdown_option("transaction_type", "Meals", "Other")
+        assert [row[3] for row in db.get_transactions(book_id)] == ["Snacks", "Meals"]
+        print("✓ Rename follows through to transactions")
+
+        assert db.remove_dropdown_option("transaction_type", "Snacks", replacement="Meals")
+        assert [row[3] for row in db.get_transactions(book_id)] == ["Meals", "Meals"]
+        assert db.get_option_usage("transaction_type", "Snacks") == 0
+        print("✓ Merge moves transactions to the replacement")
+
+        try:
+            db.get_dropdown_options("colour")
+        except ValueError:
+            print("✓ Unknown setting type rejected")
+        else:
+            raise AssertionError("unknown setting type accepted")
+
+
+def test_bulk_writes():
+    print("Testing bulk writes...")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Bulk")
+        rows = [
+            (book_id, 10 + i, f"Entry {i}", "Food", "Cash", i % 2 == 0)
+            for i in range(2000)
+        ]
+        rows.append((book_id, 5, "Imported", "Gifts", "UPI", True, "2020-01-02T03:04:05"))
+        assert db.add_transactions_bulk(rows) == 2001
+        assert db.get_book_summaries()[0].transaction_count == 2001
+        assert db.get_transactions(book_id)[-1][5] == "2020-01-02T03:04:05"
+        assert "Gifts" not in db.get_dropdown_options("transaction_type")
+        print("✓ 2001 rows added in one transaction")
+
+        balance = db.get_balance(book_id)
+        with db.batch():
+            db.add_transaction(book_id, 1, "Batched", "Food", "Cash", True)
+            assert db.create_book("Bulk") is None  # Inner failure, batch goes on
+            db.add_dropdown_option("payment_mode", "Wallet")
+        assert db.get_balance(book_id) == balance + 1
+        assert "Wallet" in db.get_dropdown_options("payment_mode")
+        print("✓ Batch commits its writes together")
+
+        try:
+            with db.batch():
+                db.add_transaction(book_id, 1, "Lost", "Food", "Cash", True)
+                db.rename_dropdown_option("payment_mode", "Wallet", "Purse")
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        assert db.get_balance(book_id) == balance + 1
+        assert "Wallet" in db.get_dropdown_options("payment_mode")
+        assert not db.conn.in_transaction
+        print("✓ Failed batch rolls back every write")
+
+
+def test_database_executor():
+    print("Testing background database executor...")
+
+    with make_test_db() as db:
+        # Callbacks are queued here and run by the test, standing in for
+        # the Kivy main thread
+        ui_calls = []
+        executor = DatabaseExecutor(db, dispatch=ui_calls.append)
+        results, errors = [], []
+        owner = object()
+
+        book_id = executor.submit("create_book", "Async").result(timeout=5)
+        executor.submit(
+            "add_transaction", book_id, 25, "Tea", "Food", "Cash", False
+        ).result(timeout=5)
+        request = executor.submit(
+            lambda manager: manager.get_balance(book_id),
+            on_result=results.append,
+            owner=owner,
+        )
+        assert request.result(timeout=5) == Decimal("-25.00")
+        executor.submit(
+            "get_dropdown_options", "colour", on_error=errors.append
+        ).exception(timeout=5)
+        assert not results and not errors  # Nothing runs off the UI thread
+        for call in ui_calls:
+            call()
+        assert results == [Decimal("-25.00")]
+        assert isinstance(errors[0], ValueError)
+        print("✓ Results and errors delivered through the dispatcher")
+
+        # Block the worker so later requests are still queued when cancelled
+        gate = threading.Event()
+        release = executor.submit(lambda manager: gate.wait(5))
+        queued = executor.submit("get_books", on_result=results.append, owner=owner)
+        ui_calls.clear()
+        executor.cancel(owner)
+        gate.set()
+        release.result(timeout=5)
+        executor.shutdown()
+        assert queued.cancelled()
+        for call in ui_calls:
+            call()
+        assert len(results) == 1
+        print("✓ Cancelled requests never run or deliver")
+
+
+def test_search_transactions():
+    print("Testing full-text search...")
+
+    with make_test_db() as db:
+        home = db.create_book("Home")
+        trip = db.create_book("Trip")
+        db.add_transactions_bulk(
+            [
+                (home, 120, "Grocery shopping at market", "Food", "Cash", False),
+                (home, 80, "Groceries", "Food", "UPI", False),
+                (home, 40, "Bus ticket", "Transport", "Cash", False),
+                (trip, 900, "Hotel grocery run", "Food", "Cash", False),
+                (trip, 30, "Café latte", "Food", "Cash", False),
+            ]
+        )
+
+        results = db.search_transactions("groc")
+        assert {row.description for row in results} == {
+            "Grocery shopping at market",
+            "Groceries",
+            "Hotel grocery run",
+        }
+        assert {row.book_name for row in results} == {"Home", "Trip"}
+        print(f"✓ Prefix search across books: {len(results)} matches")
+
+        results = db.search_transactions("groc", book_id=trip)
+        assert [row.description for row in results] == ["Hotel grocery run"]
+        assert results[0].amount == Decimal("-900.00")
+        assert db.search_transactions("GROCERY MAR")[0].description == (
+            "Grocery shopping at market"
+        )
+        assert db.search_transactions("cafe")[0].description == "Café latte"
+        assert db.search_transactions('"') == []
+        assert db.search_transactions("bus OR NOT") == []
+        print("✓ Book filter, multi-word, diacritics and literal syntax")
+
+        trans_id = db.search_transactions("ticket")[0].id
+        db.update_transaction(trans_id, 40, "Train ticket", "Transport", "Cash", False)
+        assert db.search_transactions("bus") == []
+        assert db.search_transactions("train")[0].id == trans_id
+        db.delete_book(trip)
+        assert db.search_transactions("hotel") == []
+        print("✓ Index follows updates and deletes")
+
+        plan = query_plan(
+            db,
+            "SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH ?",
+            ('"groc"*',),
+        )
+        assert "VIRTUAL TABLE INDEX" in plan
+        print(f"✓ search_transactions: {plan}")
+
+
+def test_period_rollups():
+    print("Testing period rollups...")
+
+    with make_test_db() as db:
+        home = db.create_book("Home")
+        trip = db.create_book("Trip")
+        db.add_transactions_bulk(
+            [
+                (home, 1000, "Salary", "Other", "UPI", True, "2024-01-31T09:00:00"),
+                (home, 200, "Lunch", "Food", "Cash", False, "2024-01-31T13:00:00"),
+                (home, 50, "Bus", "Transport", "Cash", False, "2024-02-01T08:00:00"),
+                (home, 75, "Dinner", "Food", "Cash", False, "2024-02-10T20:00:00"),
+                (trip, 300, "Hotel", "Other", "Cash", False, "2025-03-05T12:00:00"),
+            ]
+        )
+
+        days = db.get_period_summary(home, "day")
+        assert [row.period for row in days] == [
+            date(2024, 1, 31),
+            date(2024, 2, 1),
+            date(2024, 2, 10),
+        ]
+        assert days[0].total_in == Decimal("1000.00")
+        assert days[0].total_out == Decimal("200.00")
+        assert days[0].transaction_count == 2
+        print("✓ Daily totals")
+
+        months = db.get_period_summary(home, "month", group_by="category")
+        assert [(row.period, row.category, row.total_out) for row in months] == [
+            (date(2024, 1, 1), "Food", Decimal("200.00")),
+            (date(2024, 1, 1), "Other", Decimal("0.00")),
+            (date(2024, 2, 1), "Food", Decimal("75.00")),
+            (date(2024, 2, 1), "Transport", Decimal("50.00")),
+        ]
+        years = db.get_period_summary(None, "year")
+        assert [(row.period.year, row.total_out) for row in years] == [
+            (2024, Decimal("325.00")),
+            (2025, Decimal("300.00")),
+        ]
+        feb = db.get_period_summary(
+            home, "day", start=date(2024, 2, 1), end=date(2024, 2, 1)
+        )
+        assert [row.total_out for row in feb] == [Decimal("50.00")]
+        print("✓ Monthly, category, yearly and bounded summaries")
+
+        # Edits move totals between periods and categories
+        bus = db.search_transactions("bus")[0].id
+        db.update_transaction(
+            bus, 60, "Bus", "Food", "Cash", False, datetime(2024, 1, 31, 18, 0)
+        )
+        db.delete_book(trip)
+        jan = db.get_period_summary(home, "month", end=date(2024, 1, 31), group_by="category")
+        assert [(row.category, row.total_out, row.transaction_count) for row in jan] == [
+            ("Food", Decimal("260.00"), 2),
+            ("Other", Decimal("0.00"), 1),
+        ]
+        assert len(db.get_period_summary(home, "day")) == 2
+        assert db.get_period_summary(trip, "year") == []
+        print("✓ Rollups follow updates and deletes")
+
+        tables = ("daily_totals", "monthly_category_totals")
+        expected = [db.conn.execute(f"SELECT * FROM {t}").fetchall() for t in tables]
+        db.conn.execute("DELETE FROM daily_totals")
+        db.rebuild_rollups()
+        assert [
+            db.conn.execute(f"SELECT * FROM {t}").fetchall() for t in tables
+        ] == expected
+        print("✓ Rebuild reproduces the trigger-maintained rows")
+
+        # Days before 1970 round down in the triggers as in the bounds
+        old = db.create_book("Old")
+        db.add_transactions_bulk(
+            [(old, 5, "Eve", "Food", "Cash", False, "1969-12-31T18:00:00")]
+        )
+        eve = date(1969, 12, 31)
+        days = db.get_period_summary(old, "day", start=eve, end=eve)
+        assert [(row.period, row.total_out) for row in days] == [(eve, Decimal("5.00"))]
+        assert db.get_period_summary(old, "day", start=date(1970, 1, 1)) == []
+        expected = [db.conn.execute(f"SELECT * FROM {t}").fetchall() for t in tables]
+        db.rebuild_rollups()
+        assert [
+            db.conn.execute(f"SELECT * FROM {t}").fetchall() for t in tables
+        ] == expected
+        db.delete_book(old)
+        print("✓ Pre-1970 days agree between rollups and bounds")
+
+        plan = query_plan(
+            db,
+            "SELECT SUM(total_out) FROM daily_totals WHERE book_id = ? AND day >= ?",
+            (home, 0),
+        )
+        assert "PRIMARY KEY" in plan
+        print(f"✓ get_period_summary: {plan}")
+
+
+def test_report_data():
+    print("Testing report aggregation...")
+
+    assert downsample([1, 2, 3], 5) == [1, 2, 3]
+    assert downsample(list(range(10)), 4) == [0 + 1 + 2, 3 + 4 + 5, 6 + 7 + 8, 9]
+    assert sum(downsample(list(range(1000)), 7)) == sum(range(1000))
+    print("✓ Downsampled buckets keep the sums")
+
+    assert range_start(date(2024, 10, 18), 12) == date(2023, 11, 1)
+    assert range_start(date(2024, 1, 31), 3) == date(2023, 11, 1)
+    assert range_start(date(2024, 5, 5), None) is None
+    # Three whole months always fit the daily range
+    assert (date(2024, 7, 31) - range_start(date(2024, 7, 31), 3)).days <= (
+        DAILY_RANGE_DAYS
+    )
+    print("✓ Ranges start on the first of a month")
+
+    categories = [(f"C{i}", Decimal(10 - i)) for i in range(8)]
+    folded = fold_categories(categories, 6)
+    assert folded[:5] == categories[:5]
+    assert folded[5] == ("Other categories", Decimal(5 + 4 + 3))
+    assert fold_categories(categories[:4], 6) == categories[:4]
+    print("✓ Small categories folded into Other")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Report")
+        db.add_transactions_bulk(
+            [
+                (book_id, 100, "Pay", "Other", "UPI", True, "2024-01-20T09:00:00"),
+                (book_id, 40, "Lunch", "Food", "Cash", False, "2024-02-02T13:00:00"),
+                (book_id, 10, "Tea", "Food", "Cash", False, "2024-02-04T16:00:00"),
+                (book_id, 25, "Bus", "Transport", "Cash", False, "2024-04-03T08:00:00"),
+                (book_id, 99, "Old", "Food", "Cash", False, "2023-04-30T08:00:00"),
+            ]
+        )
+        end = date(2024, 4, 10)
+        series, categories = load_report(db, book_id, range_start(end, 3), end)
+        # Daily: empty days between activity are zero-filled
+        assert series[0] == (date(2024, 2, 2), Decimal(0), Decimal("40.00"))
+        assert series[1] == (date(2024, 2, 3), Decimal(0), Decimal(0))
+        assert series[-1][0] == date(2024, 4, 3)
+        assert len(series) == (date(2024, 4, 3) - date(2024, 2, 2)).days + 1
+        assert categories == [("Food", Decimal("50.00")), ("Transport", Decimal("25.00"))]
+
+        series, categories = load_report(db, book_id, range_start(end, 12), end)
+        # Monthly from May 2023: the April row is outside, March is empty
+        assert [period for period, _, _ in series] == [
+            date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1), date(2024, 4, 1)
+        ]
+        assert series[2][1:] == (Decimal(0), Decimal(0))
+        assert sum(total for _, _, total in series) == Decimal("75.00")
+        assert sum(total for _, total in categories) == Decimal("75.00")
+        print("✓ load_report reads zero-filled daily and monthly series")
+
+
+def test_chunked_deletes():
+    print("Testing deletes...")
+
+    with make_test_db() as db:
+        keep = db.create_book("Keep")
+        drop = db.create_book("Drop")
+        db.add_transactions_bulk(
+            [(keep, 10, "Kept tea", "Food", "Cash", False, "2024-05-01")]
+            + [
+                (drop, 1 + i % 7, f"Dropped {i}", "Food", "Cash", i % 2 == 0, "2024-05-01")
+                for i in range(2500)
+            ]
+        )
+
+        ids = [row[0] for row in db.get_transactions(keep)]
+        db.add_transaction(keep, 5, "Extra", "Food", "UPI", True)
+        extra = db.get_transactions(keep)[0][0]
+        assert db.delete_transaction(extra) == 1
+        assert db.delete_transaction([extra]) == 0
+        assert db.get_balance(keep) == Decimal("-10.00")
+        assert db.search_transactions("extra") == []
+        print("✓ delete_transaction keeps summary and search in step")
+
+        calls = []
+        db.delete_book(drop, progress=lambda done, total: calls.append((done, total)), chunk_size=1000)
+        assert calls == [(1000, 2500), (2000, 2500), (2500, 2500)]
+        assert [book[0] for book in db.get_books()] == [keep]
+        assert db.conn.execute(
+            "SELECT COUNT(*) FROM transactions WHERE book_id = ?", (drop,)
+        ).fetchone()[0] == 0
+        for table in ("book_summary", "daily_totals", "monthly_category_totals"):
+            rows = db.conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE book_id = ?", (drop,)
+            ).fetchone()[0]
+            assert rows == 0, table
+        assert db.search_transactions("dropped") == []
+        assert db.get_period_summary(None, "month")[0].total_out == Decimal("10.00")
+        assert [row[0] for row in db.get_transactions(keep)] == ids
+        print(f"✓ delete_book in {len(calls)} chunks with progress")
+
+        # On its own worker, a delete lets the screens' worker read between
+        # chunks; queued behind the delete this read would time out
+        big = db.create_book("Big")
+        db.add_transactions_bulk([(big, 1, "Bulk", "Food", "Cash", True)] * 300)
+        screens = DatabaseExecutor(db, dispatch=lambda callback: callback())
+        deletes = DatabaseExecutor(db, dispatch=lambda callback: callback())
+        reads = []
+
+        def read_mid_delete(done, total):
+            if not reads:
+                request = screens.submit("get_balance", keep)
+                reads.append((request.result(timeout=5), done, total))
+
+        deleting = deletes.submit(
+            "delete_book", big, progress=read_mid_delete, chunk_size=100
+        )
+        deleting.result(timeout=5)
+        assert reads == [(Decimal("-10.00"), 100, 300)]
+        screens.shutdown()
+        deletes.shutdown()
+        print("✓ Reads run between the chunks of a delete")
+
+
+        # An interrupted delete hides the book and is finished later
+        redo = db.create_book("Redo")
+        db.add_transactions_bulk([(redo, 1, "Half", "Food", "Cash", True)] * 3)
+
+        def interrupt(done, total):
+            raise KeyboardInterrupt
+
+        try:
+            db.delete_book(redo, progress=interrupt, chunk_size=2)
+        except KeyboardInterrupt:
+            pass
+        assert redo not in [book.id for book in db.get_book_summaries()]
+        assert db.finish_pending_deletes() == 1
+        assert db.conn.execute("SELECT COUNT(*) FROM books").fetchone()[0] == 1
+        assert db.conn.execute("PRAGMA foreign_key_check").fetchall() == []
+        print("✓ Interrupted delete finished by finish_pending_deletes")
+
+        # Shutting down stops a delete after its chunk and drops queued ones;
+        # the next start finishes them
+        stopped = db.create_book("Stopped")
+        queued = db.create_book("Queued")
+        db.add_transactions_bulk(
+            [(stopped, 1, "Bulk", "Food", "Cash", True)] * 300
+            + [(queued, 1, "Bulk", "Food", "Cash", True)]
+        )
+        deletes = DatabaseExecutor(db, dispatch=lambda callback: callback())
+        gate, drained = threading.Event(), threading.Event()
+
+        def stop_after_first_chunk(done, total):
+            db.stop_deletes()
+            gate.set()
+            drained.wait(5)  # Keep the queued delete queued until shutdown
+
+        running = deletes.submit(
+            "delete_book", stopped, progress=stop_after_first_chunk, chunk_size=100
+        )
+        waiting = deletes.submit("delete_book", queued)
+        gate.wait(5)
+        deletes.shutdown(wait=False, cancel_queued=True)
+        drained.set()
+        assert running.result(timeout=5) is None and waiting.cancelled()
+        assert db.conn.execute(
+            "SELECT COUNT(*) FROM transactions WHERE book_id = ?", (stopped,)
+        ).fetchone()[0] == 200
+        with DatabaseManager(db.db_name) as restarted:
+            assert restarted.finish_pending_deletes() == 1
+            assert restarted.get_transactions(stopped) == []
+            assert [book.id for book in restarted.get_book_summaries()] == [queued, keep]
+        print("✓ Shutdown leaves deletes pending for the next start")
+
+
+def test_iter_transactions():
+    print("Testing streaming iteration...")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Stream")
+        db.add_transactions_bulk(
+            [
+                (book_id, 10 + i, f"Entry {i}", "Food" if i % 3 else "Other",
+                 "Cash", i % 2 == 0, datetime(2024, 1, 1 + i % 28, 12, 0))
+                for i in range(1234)
+            ]
+        )
+
+        newest_first = list(db.iter_transactions(book_id, batch_size=100))
+        assert newest_first == db.get_transactions(book_id)
+        assert newest_first[0].transaction_date >= newest_first[-1].transaction_date
+        oldest_first = list(db.iter_transactions(book_id, order="asc", batch_size=100))
+        assert oldest_first == newest_first[::-1]
+        print(f"✓ {len(newest_first)} rows in both orders across batches")
+
+        filters = {"types": ["Other"], "amount_min": 500}
+        streamed = list(db.iter_transactions(book_id, filters=filters, batch_size=7))
+        expected = db.get_transactions_filtered(book_id, **filters).rows
+        assert streamed == expected and streamed
+        assert all(row.transaction_type == "Other" for row in streamed)
+        print(f"✓ Filtered stream matches get_transactions_filtered: {len(streamed)}")
+
+        # The connection stays usable while a stream is part way through
+        rows = db.iter_transactions(book_id, batch_size=50)
+        first = next(rows)
+        db.add_transaction(book_id, 1, "Written mid-stream", "Food", "Cash", True)
+        assert sum(1 for _ in rows) == 1233
+        assert first.id == newest_first[0].id
+        print("✓ Writes can run between batches")
+
+        try:
+            next(db.iter_transactions(book_id, order="sideways"))
+        except ValueError:
+            print("✓ Unknown order rejected")
+        else:
+            raise AssertionError("unknown order accepted")
+
+
+def test_book_cache():
+    print("Testing columnar book cache...")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Cached")
+        other_id = db.create_book("Other")
+        db.add_transactions_bulk(
+            [
+                (book_id, 10 + i, f"Entry {i % 40}", "Food" if i % 3 else "Other",
+                 "Cash" if i % 5 else "UPI", i % 2 == 0,
+                 datetime(2024, 1 + i % 12, 1 + i % 28, 12, 0))
+                for i in range(600)
+            ]
+        )
+        cache = db.open_book_cache(book_id)
+        assert db.open_book_cache(book_id) is cache
+        assert len(cache) == 600 and len(cache.descriptions) == 40
+
+        def check(**filters):
+            expected = db.get_transactions_filtered(book_id, limit=25, **filters)
+            cached = cache.query(limit=25, **filters)
+            assert cached == expected, filters
+            if expected.next_cursor is not None:
+                after = expected.next_cursor
+                assert cache.query(limit=25, after=after, **filters) == (
+                    db.get_transactions_filtered(
+                        book_id, limit=25, after=after, **filters
+                    )
+                )
+
+        for filters in (
+            {},
+            {"types": ["Other"], "amount_min": 300},
+            {"payment_modes": ["UPI"], "date_from": date(2024, 3, 1),
+             "date_to": date(2024, 6, 30)},
+            {"text": "entry 1", "amount_max": 100},
+        ):
+            check(**filters)
+        print("✓ In-memory filtering matches get_transactions_filtered")
+
+        # Later pages of one filter reuse its matches until the cache changes
+        cache.query(limit=25, types=["Food"])
+        matches = cache._matches
+        cache.query(limit=25, after=(0, 0), types=["Food"])
+        assert cache._matches is matches
+        cache.query(limit=25, types=["Other"])
+        assert cache._matches is not matches
+        print("✓ Matches computed once per filter")
+
+        # Only ASCII letters fold, as with LIKE, so é never matches É
+        for text in ("Café", "CAFÉ", "cafe"):
+            db.add_transaction(book_id, 1, text, "Food", "Cash", True)
+        for text in ("café", "CAFÉ", "CAFE"):
+            check(text=text)
+        assert [row.description for row in cache.query(text="café").rows] == ["Café"]
+        db.delete_transaction([row.id for row in cache.query(text="caf").rows])
+        print("✓ Text filter folds case like SQL LIKE")
+
+        groups = cache.group_totals(by="category")
+        assert set(groups) == {"Food", "Other"}
+        result = cache.query()
+        assert sum(total_in for total_in, _ in groups.values()) == result.total_in
+        print("✓ Grouped totals add up")
+
+        # Committed writes are patched in; rolled back ones are not
+        db.add_transaction(book_id, 7.5, "Fresh", "Snacks", "Cash", False)
+        fresh = cache.query(limit=1).rows[0]
+        assert fresh.description == "Fresh" and fresh.transaction_type == "Snacks"
+        db.update_transaction(fresh.id, 9, "Fresher", "Food", "UPI", True,
+                              datetime(2023, 1, 1))
+        assert cache.query().rows[-1].description == "Fresher"
+        db.delete_transaction(fresh.id)
+        db.add_transaction(other_id, 1, "Elsewhere", "Food", "Cash", True)
+        try:
+            with db.batch():
+                db.add_transaction(book_id, 1, "Rolled back", "Food", "Cash", True)
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        db.rename_dropdown_option("transaction_type", "Other", "Misc")
+        db.merge_dropdown_options("payment_mode", "UPI", "Cash")
+        check()
+        check(types=["Misc"])
+        assert len(cache) == 600
+        print("✓ Adds, edits, deletes and option changes patched in place")
+
+        usage = db.book_cache_memory()[book_id]
+        assert usage["rows"] == 600 and usage["columns"] >= 600 * 36
+        print(f"✓ Cache holds {usage['total']} bytes for {usage['rows']} rows")
+
+        db.delete_book(book_id)
+        assert db.book_cache_memory() == {}
+        print("✓ Cache evicted with its book")
+
+
+def test_result_cache():
+    print("Testing result cache...")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Cached reads")
+        db.add_transaction(book_id, 100, "Salary", "Other", "UPI", True)
+
+        first = db.get_balance(book_id)
+        books = db.get_books()
+        assert db.get_balance(book_id) == first and db.get_books() == books
+        stats = db.result_cache_stats()
+        assert stats["hits"] == 2 and stats["misses"] == 2
+        print("✓ Repeated reads are served from the cache")
+
+        # Callers get their own list, not the cached one
+        books.append("junk")
+        assert db.get_books() != books
+        rows, _ = db.get_transactions_page(book_id)
+        rows.clear()
+        assert len(db.get_transactions_page(book_id)[0]) == 1
+        db.get_transactions_filtered(book_id).rows.clear()
+        assert db.get_transactions_filtered(book_id).count == 1
+        assert len(db.get_transactions_filtered(book_id).rows) == 1
+
+        db.add_transaction(book_id, 30, "Lunch", "Food", "Cash", False)
+        assert db.get_balance(book_id) == first - 30
+        print("✓ A write on this connection invalidates cached results")
+
+        other = sqlite3.connect(db.db_name)
+        other.execute("UPDATE transactions SET amount_paise = 5000 WHERE description = 'Lunch'")
+        other.commit()
+        other.close()
+        assert db.get_balance(book_id) == first - 50
+        print("✓ A write from another connection invalidates cached results")
+
+        with db.batch():
+            db.add_transaction(book_id, 1, "Inside", "Food", "Cash", False)
+            assert db.get_balance(book_id) == first - 51
+        assert db.get_balance(book_id) == first - 51
+        print("✓ Reads inside a write transaction see its changes")
+
+        filters = {"types": ["Food"], "payment_modes": {"Cash"}}
+        db.get_transactions_filtered(book_id, **filters)
+        hits = db.result_cache_stats()["hits"]
+        db.get_transactions_filtered(book_id, **filters)
+        assert db.result_cache_stats()["hits"] == hits + 1
+        print("✓ Calls with list and set arguments are cached")
+
+
+def test_change_events():
+    print("Testing change events...")
+
+    with make_test_db() as db:
+        frames = []  # Flushes waiting for the next "frame"
+        bus = ChangeBus(db, dispatch=frames.append)
+        received = []
+        bus.subscribe(received.append)
+
+        book_id = db.create_book("Events")
+        db.add_transaction(book_id, 10, "Tea", "Food", "Cash", False)
+        db.add_transactions_bulk(
+            [(book_id, i + 1, f"Row {i}", "Food", "Cash", True) for i in range(50)]
+        )
+        assert len(frames) == 1, "one flush per frame however many commits"
+        frames.pop()()
+        (events,) = received
+        kinds = [event.kind for event in events]
+        assert kinds == [BOOK_CREATED, TRANSACTIONS_ADDED]
+        assert len(events[1].ids) == 51 and events[1].book_id == book_id
+        print("✓ Commits within a frame arrive as one merged batch")
+
+        rows = db.get_transactions(book_id)
+        db.update_transaction(rows[0].id, 5, "Edited", "Food", "Cash", True)
+        db.delete_transaction([rows[0].id, rows[1].id])
+        try:
+            with db.batch():
+                db.add_transaction(book_id, 1, "Rolled back", "Food", "Cash", True)
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        db.rename_dropdown_option("transaction_type", "Food", "Meals")
+        frames.pop()()
+        events = received[-1]
+        deleted, options = events
+        assert deleted.kind == TRANSACTIONS_DELETED and deleted.book_id == book_id
+        assert set(deleted.ids) == {rows[0].id, rows[1].id}
+        assert options == ChangeEvent(OPTIONS_CHANGED, None, (), "transaction_type")
+        print("✓ Edits folded into deletes; rolled back writes never announced")
+
+        assert not db.rename_dropdown_option("transaction_type", "Missing", "X")
+        assert not frames
+        print("✓ Renames that change nothing are not announced")
+
+        db.delete_book(book_id)
+        frames.pop()()
+        assert received[-1] == [ChangeEvent(BOOK_DELETED, book_id)]
+        print("✓ Book deletes announced")
+
+        bus.close()
+        db.create_book("Unheard")
+        assert not frames
+
+    merged = coalesce(
+        [
+            ChangeEvent(TRANSACTIONS_ADDED, 1, (1, 2)),
+            ChangeEvent(TRANSACTIONS_UPDATED, 1, (2, 3)),
+            ChangeEvent(TRANSACTIONS_DELETED, 1, (1,)),
+            ChangeEvent(TRANSACTIONS_ADDED, 2, (9,)),
+            ChangeEvent(BOOK_DELETED, 2),
+        ]
+    )
+    assert merged == [
+        ChangeEvent(TRANSACTIONS_ADDED, 1, (2,)),
+        ChangeEvent(TRANSACTIONS_UPDATED, 1, (3,)),
+        ChangeEvent(BOOK_DELETED, 2),
+    ]
+    print("✓ Add-then-delete cancels out and deleted books drop their events")
+
+
+def test_snapshots():
+    print("Testing read snapshots...")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Snapshot")
+        db.add_transaction(book_id, 100, "Salary", "Other", "UPI", True)
+
+        with db.snapshot() as ro:
+            before = ro.get_balance(book_id)
+            # A write commits while the snapshot is open, without waiting
+            db.add_transaction(book_id, 40, "Lunch", "Food", "Cash", False)
+            assert db.get_balance(book_id) == before - 40
+            assert ro.get_balance(book_id) == before
+            assert len(ro.get_transactions(book_id)) == 1
+            assert ro.get_period_summary(book_id, "day")[0].total_out == 0
+            print("✓ Snapshot keeps its view while writes commit")
+
+            try:
+                ro.add_transaction(book_id, 1, "Nope", "Food", "Cash", True)
+            except sqlite3.OperationalError:
+                print("✓ Writes through a snapshot are refused")
+            else:
+                raise AssertionError("snapshot accepted a write")
+
+        with db.snapshot() as ro:
+            assert ro.get_balance(book_id) == before - 40
+        print("✓ A new snapshot sees the latest commit")
+
+        # A snapshot read on another thread does not hold the shared lock
+        results = []
+
+        def read_balance():
+            with db.snapshot() as ro:
+                results.append(ro.get_balance(book_id))
+
+        with db._lock:
+            reader = threading.Thread(target=read_balance)
+            reader.start()
+            reader.join(timeout=5)
+            assert results == [before - 40]
+        print("✓ Snapshots read without the writer's lock")
+
+
+def test_progressive_renderer():
+    print("Testing progressive rendering...")
+
+    frames = []  # Steps waiting for the next "frame"
+    ticks = [0.0]
+
+    def clock():
+        # Every converted item costs a millisecond
+        ticks[0] += 0.001
+        return ticks[0]
+
+    renderer = ProgressiveRenderer(schedule=frames.append, budget=0.008, clock=clock)
+    shown = []
+    done = []
+    renderer.start(
+        range(100), lambda n: n * 2, shown.extend, first_batch=10,
+        on_done=lambda: done.append(True),
+    )
+    assert shown == [n * 2 for n in range(10)] and renderer.active
+    batches = 0
+    while frames:
+        frames.pop(0)()
+        batches += 1
+    assert shown == [n * 2 for n in range(100)] and done == [True]
+    assert not renderer.active and batches > 5
+    print(f"✓ First screenful at once, the rest over {batches} budgeted frames")
+
+    shown.clear()
+    renderer.start(range(100), str, shown.extend, first_batch=10)
+    renderer.start(range(3), str, shown.extend, first_batch=10)
+    while frames:
+        frames.pop(0)()
+    assert shown == [str(n) for n in range(10)] + ["0", "1", "2"]
+    print("✓ Starting over drops the rest of the previous render")
+
+    shown.clear()
+    renderer.start(range(100), str, shown.extend, first_batch=5)
+    renderer.cancel()
+    while frames:
+        frames.pop(0)()
+    assert len(shown) == 5 and not renderer.active
+    print("✓ Cancelled renders stop")
+
+
+def test_book_summaries():
+    print("Testing book summaries...")
+
+    with make_test_db() as db:
+        first = db.create_book("First")
+        second = db.create_book("Second")
+        db.add_transaction(first, 500.0, "Salary", "Other", "UPI", True)
+        db.add_transaction(first, 120.0, "Lunch", "Food", "Cash", False)
+        db.add_transaction(second, 40.0, "Bus", "Transport", "Cash", False)
+
+        trans_id = db.get_transactions(first)[0][0]
+        db.update_transaction(trans_id, 200.0, "Dinner", "Food", "Cash", False)
+
+        summaries = {book.id: book for book in db.get_book_summaries()}
+        extra = db.create_book("secondary")
+        matches = db.get_book_summaries(name_prefix="SEC")
+        assert [book.name for book in matches] == ["secondary", "Second"]
+        assert matches[1].balance == summaries[second].balance
+        assert db.get_book_summaries(name_prefix="Third") == []
+        db.delete_book(extra)
+
+        # Bounds hold where NOCASE folds the character after the prefix
+        edge_names = ["Mx@1", "MX@2", "mx[3", "Mx_4", "MXa5", "mXZ6", "mxz7",
+                      "Mx{8", "MX[9", "mx\\0", "Mxy1", "Mx`2"]
+        edge_ids = [db.create_book(name) for name in edge_names]
+        for prefix in ("mX@", "MX@", "Mxz", "MXZ", "mx[", "MX[", "Mx"):
+            expected = {
+                name for name in edge_names
+                if name.lower().startswith(prefix.lower())
+            }
+            found = {book.name for book in db.get_book_summaries(name_prefix=prefix)}
+            assert found == expected, (prefix, found)
+        for book_id in edge_ids:
+            db.delete_book(book_id)
+        print("✓ Name prefix filter ignores case and carries balances")
+
+        assert summaries[first].balance == 300.0
+        assert summaries[first].total_in == 500.0
+        assert summaries[first].total_out == 200.0
+        assert summaries[first].transaction_count == 2
+        assert summaries[second].balance == -40.0
+        assert db.get_balance(first) == 300.0
+        print(f"✓ Summaries follow inserts and updates: {summaries[first]}")
+
+        db.delete_book(second)
+        summaries = db.get_book_summaries()
+        assert [book.id for book in summaries] == [first]
+        print("✓ Summary removed with its book")
+
+
+def test_transaction_pages():
+    print("Testing keyset pagination...")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Paged")
+        for i in range(25):
+            db.add_transaction(book_id, 10.0 + i, f"Entry {i}", "Food", "Cash", True)
+
+        pages = []
+        rows, cursor = db.get_transactions_page(book_id, limit=10)
+        pages.append(rows)
+        while cursor is not None:
+            rows, cursor = db.get_transactions_page(book_id, limit=10, after=cursor)
+            pages.append(rows)
+
+        assert [len(page) for page in pages] == [10, 10, 5]
+        assert [row for page in pages for row in page] == db.get_transactions(book_id)
+        print("✓ Pages cover the book exactly once, in order")
+
+        everything = db.get_transactions(book_id)
+        wanted = (everything[7].id, everything[2].id, 99999)
+        assert db.get_transactions_by_ids(wanted) == [everything[2], everything[7]]
+        print("✓ Rows fetched by id come newest first, missing ids skipped")
+
+        plan = query_plan(
+            db,
+            """
+            SELECT id FROM transactions
+            WHERE book_id = ? AND (transaction_ts, id) < (?, ?)
+            ORDER BY transaction_ts DESC, id DESC LIMIT 10
+            """,
+            (book_id, 1900000000, 1),
+        )
+        assert "idx_transactions_book_date" in plan and "TEMP B-TREE" not in plan
+        print(f"✓ Next page seeks the index: {plan}")
+
+
+def test_filtered_transactions():
+    print("Testing SQL filters...")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Filtered")
+        db.add_transaction(book_id, 1000.0, "Salary 100%", "Other", "UPI", True)
+        db.add_transaction(book_id, 250.0, "Groceries", "Food", "Cash", False)
+        db.add_transaction(book_id, 80.0, "Snacks", "Food", "UPI", False)
+        db.add_transaction(book_id, 30.0, "Bus fare", "Transport", "Cash", False)
+        trans_id = db.get_transactions(book_id)[-1][0]
+        db.update_transaction(
+            trans_id, 1000.0, "Salary 100%", "Other", "UPI", True, "2024-01-15T09:00:00"
+        )
+
+        result = db.get_transactions_filtered(book_id, types=["Food"])
+        assert [row[2] for row in result.rows] == ["Snacks", "Groceries"]
+        assert (result.count, result.total_in, result.total_out) == (2, 0, 330.0)
+        print(f"✓ Type filter: {result.count} matches, out {result.total_out}")
+
+        result = db.get_transactions_filtered(
+            book_id, payment_modes=["UPI", "Cash"], types=["Food", "Other"]
+        )
+        assert result.count == 3
+        print("✓ Multi-select modes and types")
+
+        result = db.get_transactions_filtered(
+            book_id, date_from=date(2024, 1, 1), date_to=date(2024, 1, 15)
+        )
+        assert [row[2] for row in result.rows] == ["Salary 100%"]
+        result = db.get_transactions_filtered(book_id, date_to=date(2024, 1, 14))
+        assert result.rows == [] and result.count == 0 and result.total_in == 0
+        print("✓ Inclusive date range")
+
+        result = db.get_transactions_filtered(book_id, amount_min=50, amount_max=300)
+        assert result.count == 2
+        result = db.get_transactions_filtered(book_id, text="0%")
+        assert [row[2] for row in result.rows] == ["Salary 100%"]
+        print("✓ Amount range and escaped text search")
+
+        page = db.get_transactions_filtered(book_id, payment_modes=["Cash", "UPI"], limit=2)
+        assert len(page.rows) == 2 and page.count == 4
+        rest = db.get_transactions_filtered(
+            book_id, payment_modes=["Cash", "UPI"], limit=2, after=page.next_cursor
+        )
+        assert rest.next_cursor is None and rest.count == 4
+        assert page.rows + rest.rows == db.get_transactions(book_id)
+        print("✓ Filtered pages keep totals for the whole match")
+
+
+def test_exact_amounts():
+    print("Testing exact amounts...")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Exact")
+        for _ in range(10):
+            db.add_transaction(book_id, 0.1, "Ten paise", "Food", "Cash", True)
+        db.add_transaction(book_id, "0.30", "Thirty paise", "Food", "Cash", False)
+        db.add_transaction(book_id, Decimal("1234567.89"), "Big", "Other", "UPI", True)
+
+        balance = db.get_balance(book_id)
+        assert balance == Decimal("1234568.59")
+        assert isinstance(balance, Decimal)
+        print(f"✓ Balance is exact: {balance}")
+
+        summary = db.get_book_summaries()[0]
+        assert summary.total_in == Decimal("1234568.89")
+        assert summary.total_out == Decimal("0.30")
+        result = db.get_transactions_filtered(book_id, amount_min=0.1, amount_max=0.3)
+        assert result.count == 11 and result.total_out == Decimal("0.30")
+        print("✓ Totals and amount filters are exact")
+
+        trans_id = db.get_transactions(book_id)[0][0]
+        db.update_transaction(trans_id, 0.07, "Changed", "Food", "Cash", False)
+        assert db.get_transaction_by_id(trans_id)[1] == Decimal("-0.07")
+        assert db.get_balance(book_id) == Decimal("0.63")
+        print("✓ Updates switch direction exactly")
+
+
+def test_integer_timestamps():
+    print("Testing integer timestamps...")
+
+    with make_test_db() as db:
+        book_id = db.create_book("Dated")
+        for description in ("Late", "Early", "Midday"):
+            db.add_transaction(book_id, 10, description, "Food", "Cash", True)
+        late, early, midday = [row[0] for row in db.get_transactions(book_id)][::-1]
+
+        # Mixed input formats all land on one sortable integer column
+        db.update_transaction(late, 10, "Late", "Food", "Cash", True, "2025-03-01T23:30:00")
+        db.update_transaction(early, 10, "Early", "Food", "Cash", True, date(2025, 3, 1))
+        db.update_transaction(
+            midday, 10, "Midday", "Food", "Cash", True, datetime(2025, 3, 1, 12, 0)
+        )
+
+        rows = db.get_transactions(book_id)
+        assert [row[2] for row in rows] == ["Late", "Midday", "Early"]
+        assert [row[5] for row in rows] == [
+            "2025-03-01T23:30:00",
+            "2025-03-01T12:00:00",
+            "2025-03-01T00:00:00",
+        ]
+        stored = db.conn.execute("SELECT typeof(transaction_ts) FROM transactions")
+        assert {row[0] for row in stored} == {"integer"}
+        print("✓ Date-only and full timestamps order correctly")
+
+        result = db.get_transactions_filtered(
+            book_id, date_from=date(2025, 3, 1), date_to=date(2025, 3, 1)
+        )
+        assert result.count == 3
+        assert db.get_book_summaries()[0].last_activity == "2025-03-01T23:30:00"
+        print("✓ Day range and last activity use the integer column")
+
+
 if __name__ == "__main__":
     test_database()
+    test_connection_lifecycle()
+    test_schema_migrations()
+    test_legacy_edge_cases()
+    test_query_plans_use_indexes()
+    test_dropdown_options()
+    test_bulk_writes()
+    test_database_executor()
+    test_search_transactions()
+    test_period_rollups()
+    test_report_data()
+    test_chunked_deletes()
+    test_iter_transactions()
+    test_book_cache()
+    test_result_cache()
+    test_change_events()
+    test_snapshots()
+    test_progressive_renderer()
+    test_book_summaries()
+    test_transaction_pages()
+    test_filtered_transactions()
+    test_exact_amounts()
+    test_integer_timestamps()
@@ -0,0 +1,30 @@
+"""
+Hand work to the Kivy main thread
+
+Workers, the change bus and the progressive renderer all schedule their
+callbacks through next_frame, and screens report failed writes with
+show_write_error. Kivy is imported on first use, so modules that take the
+scheduler as an argument stay importable in tests without it.
+"""
+
+
+def next_frame(callback):
+    """Run a callback on the Kivy main thread at the next frame"""
+    from kivy.clock import Clock
+
+    Clock.schedule_once(lambda dt: callback(), 0)
+
+
+def show_write_error(error):
+    """Report a change that could not be saved; an on_error for writes"""
+    from kivymd.uix.button import MDRaisedButton
+    from kivymd.uix.dialog import MDDialog
+
+    error_dialog = MDDialog(
+        title="Error",
+        text=f"Could not save the change: {error}",
+        buttons=[
+            MDRaisedButton(text="OK", on_release=lambda x: error_dialog.dismiss())
+        ],
+    )
+    error_dialog.open()